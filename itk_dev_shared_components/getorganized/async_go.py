@@ -0,0 +1,140 @@
+"""This module contains an async version of the GetOrganized client for use with asyncio,
+so one event loop can have many GetOrganized calls in flight.
+
+There is no NTLM support for the async HTTP libraries, so the calls run on a bounded thread pool
+owned by an AsyncGOClient and share the authenticated connections of its GOClient.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import Any, BinaryIO, Callable, Literal
+
+from requests import Response
+
+from itk_dev_shared_components.getorganized.go_client import GOClient
+
+
+class AsyncGOClient:
+    """An object that handles async access to the GetOrganized api.
+    It wraps a GOClient and limits the number of concurrent calls made through it.
+    Calls beyond the limit wait in the event loop without using a thread.
+    Share one object between all tasks to bound the total parallelism.
+
+    Use it as an async context manager or call close when done.
+    Closing the AsyncGOClient doesn't close the GOClient.
+    """
+    def __init__(self, client: GOClient, *, max_concurrency: int | None = None) -> None:
+        """Create a new AsyncGOClient.
+
+        Args:
+            client: The GOClient used to send the requests.
+            max_concurrency: The maximum number of calls running at the same time.
+                Defaults to the pool size of the client.
+
+        Raises:
+            ValueError: If max_concurrency is less than 1.
+        """
+        if max_concurrency is None:
+            max_concurrency = client.pool_size
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1.")
+
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="go")
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous function on the thread pool and wait for the result.
+        This can be used to make async versions of other functions using the GOClient.
+
+        Args:
+            function: The function to run.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def upload_document(self, *, file: bytearray | bytes | BinaryIO, case_id: str, filename: str, agent_name: str | None = None,
+                              date_string: str | None = None, doc_category: str | None = None, case_type: Literal["EMN", "GEO"],
+                              overwrite: bool = True) -> str:
+        """Async version of GOClient.upload_document.
+
+        Args:
+            file: Bytearray of file to upload or a binary file object open for reading.
+            case_id: Case ID already present in GO.
+            filename: Name of file when saved in GO.
+            agent_name: Agent name, used for creating a folder in GO. Defaults to None.
+            date_string: A date to add as metadata to GetOrganized. Defaults to None.
+            doc_category: A category to add as metadata to GetOrganized. Defaults to None.
+            case_type: The case type prefix of the case.
+            overwrite: Whether to overwrite a document with the same name. Defaults to True.
+
+        Returns:
+            Return response text.
+        """
+        return await self.run(self.client.upload_document, file=file, case_id=case_id, filename=filename, agent_name=agent_name,
+                              date_string=date_string, doc_category=doc_category, case_type=case_type, overwrite=overwrite)
+
+    async def delete_document(self, document_id: int) -> Response:
+        """Async version of GOClient.delete_document.
+
+        Args:
+            document_id: ID of the document to delete.
+
+        Returns:
+            Return the response.
+        """
+        return await self.run(self.client.delete_document, document_id)
+
+    async def create_case(self, title: str, category: str, department: str, kle: str, case_type: Literal["EMN", "GEO"]) -> str:
+        """Async version of GOClient.create_case.
+
+        Args:
+            title: Title of the case being created.
+            category: Case category to create the case for.
+            department: Department for the case.
+            kle: KLE number for the case (https://www.kle-online.dk/emneplan/00/)
+            case_type: The case type prefix of the case.
+
+        Returns:
+            Return the caseID of the created case.
+        """
+        return await self.run(self.client.create_case, title, category, department, kle, case_type)
+
+    async def get_case_metadata(self, case_id: str) -> str:
+        """Async version of GOClient.get_case_metadata.
+
+        Args:
+            case_id: Case ID to get metadata on.
+
+        Returns:
+            Return the metadata for the case as an XML string.
+        """
+        return await self.run(self.client.get_case_metadata, case_id)
+
+    async def find_case(self, case_title: str, case_type: Literal["EMN", "GEO"]) -> list[str]:
+        """Async version of GOClient.find_case.
+
+        Args:
+            case_title: The title to search for.
+            case_type: The case type prefix to search in.
+
+        Returns:
+            The case id of the found case(s) if any.
+        """
+        return await self.run(self.client.find_case, case_title, case_type)
+
+    def close(self) -> None:
+        """Shut down the thread pool. Calls already started are allowed to finish."""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncGOClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
@@ -1,10 +1,13 @@
 """Functions for working with the GetOrganized API."""
 
+import io
 import json
+import os
 from urllib.parse import urljoin
-from typing import Literal
+from typing import BinaryIO, Iterator, Literal
 
 from requests import Session
+from requests.adapters import HTTPAdapter
 from requests_ntlm import HttpNtlmAuth
 
 
@@ -21,16 +24,40 @@ def create_session(username: str, password: str) -> Session:
     session = Session()
     session.headers.setdefault("Content-Type", "application/json")
     session.auth = HttpNtlmAuth(username, password)
+    adapter = NtlmAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     return session
 
 
-def upload_document(*, apiurl: str, file: bytearray, case_id: str, filename: str, agent_name: str | None = None, date_string: str | None = None, session: Session, doc_category: str | None = None, case_type: str = Literal["EMN", "GEO"], overwrite: bool = True) -> tuple[str, Session]:
+class NtlmAdapter(HTTPAdapter):
+    """A transport adapter that rewinds a seekable request body before each send.
+    requests_ntlm sends the body again in each leg of the NTLM handshake,
+    but only rewinds it before the second leg, so a streamed body would be empty in the last leg.
+    """
+    def send(self, request, *args, **kwargs):  # pylint: disable=arguments-differ
+        if hasattr(request.body, "seek"):
+            request.body.seek(0)
+        return super().send(request, *args, **kwargs)
+
+
+# The json representation of each byte value in the Bytes array of a document
+_BYTE_STRINGS = [str(i) for i in range(256)]
+
+# Maps each byte value to the number of digits it has minus one
+_DIGIT_CLASSES = bytes(0 if i < 10 else 1 if i < 100 else 2 for i in range(256))
+
+
+def upload_document(*, apiurl: str, file: bytearray | bytes | BinaryIO, case_id: str, filename: str, agent_name: str | None = None, date_string: str | None = None, session: Session, doc_category: str | None = None, case_type: str = Literal["EMN", "GEO"], overwrite: bool = True) -> tuple[str, Session]:
     """Upload a document to Get Organized.
+    With a session from create_session the document is encoded as json while it's being sent,
+    so the request body is never held in memory as a whole. Other sessions can't rewind the body
+    between the legs of the NTLM handshake, so the body is encoded in memory before it's sent.
 
     Args:
         apiurl: Base url for API.
         session: Session token for request.
-        file: Bytearray of file to upload.
+        file: Bytearray of file to upload or a binary file object open for reading.
         case_id: Case ID already present in GO.
         filename: Name of file when saved in GO.
         agent_name: Agent name, used for creating a folder in GO. Defaults to None.
@@ -41,7 +68,6 @@ def upload_document(*, apiurl: str, file: bytearray, case_id: str, filename: str
     """
     url = apiurl + "/_goapi/Documents/AddToCase"
     payload = {
-        "Bytes": list(file),
         "CaseId": case_id,
         "SiteUrl": urljoin(apiurl, f"/case{case_type}/{case_id}"),
         "ListName": "Dokumenter",
@@ -50,11 +76,125 @@ def upload_document(*, apiurl: str, file: bytearray, case_id: str, filename: str
         "Metadata": f"<z:row xmlns:z='#RowsetSchema' ows_Dato='{date_string}' ows_Kategori='{doc_category}'/>",
         "Overwrite": overwrite
     }
-    response = session.post(url, data=json.dumps(payload), timeout=60)
+    body = DocumentBody(payload, file)
+    data = body if isinstance(session.get_adapter(url), NtlmAdapter) else body.read()
+    response = session.post(url, data=data, timeout=60)
     response.raise_for_status()
     return response.text
 
 
+# pylint: disable-next=too-many-instance-attributes
+class DocumentBody(io.RawIOBase):
+    """A read-only file object of the json body of a document upload.
+    The bytes of the file are added to the payload as a json array of numbers in the 'Bytes' field,
+    which is the format GetOrganized expects, but the array is encoded in chunks while the body is read.
+
+    The body is seekable and has a length, so it can be sent again in each leg of the NTLM handshake.
+    Send it with a session from create_session, which rewinds the body before each leg.
+    The file is read once to calculate the length before the body is sent.
+    """
+    def __init__(self, payload: dict, file: bytearray | bytes | BinaryIO, *, chunk_size: int = 64 * 1024) -> None:
+        """Create a new DocumentBody.
+
+        Args:
+            payload: The json fields of the request except 'Bytes'.
+            file: The bytes of the file or a binary file object open for reading.
+            chunk_size: The number of bytes of the file to encode at a time. Defaults to 64 KiB.
+        """
+        super().__init__()
+        self._head = (json.dumps({**payload, "Bytes": []})[:-3] + "[").encode()
+        self._tail = b"]}"
+        self._file = file
+        self._file_start = file.tell() if hasattr(file, "read") else 0
+        self._chunk_size = chunk_size
+
+        self._length = len(self._head) + self._get_array_length() + len(self._tail)
+        self._position = 0
+        self._buffer = memoryview(b"")
+        self._chunks = self._encode_chunks()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+
+        if offset < 0:
+            raise ValueError("Negative seek position.")
+
+        if offset < self._position:
+            # Start over and skip forward to the position
+            self._position = 0
+            self._buffer = memoryview(b"")
+            self._chunks = self._encode_chunks()
+
+        while self._position < offset and self.read(min(offset - self._position, 1024 * 1024)):
+            pass
+
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._position += size
+        return size
+
+    def _read_file_chunks(self) -> Iterator[bytes]:
+        """Read the file from the start in chunks."""
+        if not hasattr(self._file, "read"):
+            data = memoryview(self._file).cast("B")
+            for i in range(0, len(data), self._chunk_size):
+                yield data[i:i + self._chunk_size]
+            return
+
+        self._file.seek(self._file_start)
+        while chunk := self._file.read(self._chunk_size):
+            yield chunk
+
+    def _get_array_length(self) -> int:
+        """Get the length of the json array of the bytes of the file without encoding it."""
+        count = 0
+        digits = 0
+        for chunk in self._read_file_chunks():
+            classes = bytes(chunk).translate(_DIGIT_CLASSES)
+            count += len(chunk)
+            digits += len(chunk) + classes.count(1) + 2 * classes.count(2)
+
+        commas = max(count - 1, 0)
+        return digits + commas
+
+    def _encode_chunks(self) -> Iterator[bytes]:
+        """Encode the whole body in chunks."""
+        yield self._head
+
+        first = True
+        for chunk in self._read_file_chunks():
+            encoded = ",".join(map(_BYTE_STRINGS.__getitem__, chunk)).encode()
+            yield encoded if first else b"," + encoded
+            first = False
+
+        yield self._tail
+
+
 def delete_document(apiurl: str, document_id: int, session: Session) -> tuple[str, Session]:
     """Delete a document from GetOrganized.
 
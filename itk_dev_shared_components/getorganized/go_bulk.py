@@ -0,0 +1,151 @@
+"""This module has functions to do bulk operations against the GetOrganized api,
+like uploading a large number of documents concurrently."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Literal, Optional
+
+from requests import ConnectionError as RequestsConnectionError, HTTPError, Timeout
+
+from itk_dev_shared_components.getorganized.go_client import GOClient
+
+
+# HTTP status codes GetOrganized answers with when it's overloaded or restarting
+TRANSIENT_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+@dataclass(slots=True, kw_only=True)
+# pylint: disable-next=too-many-instance-attributes
+class DocumentUpload:
+    """A dataclass representing a document to upload to a case.
+    The file can be the path of a file on disk, the bytes of the file or a binary stream.
+    Files on disk are opened when they're uploaded and streamed from disk.
+    """
+    case_id: str
+    filename: str
+    file: str | os.PathLike | bytes | bytearray | BinaryIO
+    case_type: Literal["EMN", "GEO"]
+    agent_name: Optional[str] = None
+    date_string: Optional[str] = None
+    doc_category: Optional[str] = None
+    overwrite: bool = True
+
+
+@dataclass(slots=True, kw_only=True)
+class DocumentUploadResult:
+    """A dataclass representing the result of uploading a single document."""
+    document: DocumentUpload
+    success: bool
+    attempts: int
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True, kw_only=True)
+class DocumentUploadReport:
+    """A dataclass representing the result of a bulk document upload."""
+    results: list[DocumentUploadResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> list[DocumentUploadResult]:
+        """The results of the documents that were uploaded."""
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed(self) -> list[DocumentUploadResult]:
+        """The results of the documents that failed to upload."""
+        return [r for r in self.results if not r.success]
+
+
+def upload_documents(documents: Iterable[DocumentUpload], client: GOClient, max_workers: int = 4,
+                     max_retries: int = 3, retry_delay: float = 1) -> DocumentUploadReport:
+    """Upload many documents to GetOrganized concurrently using GOClient.upload_document.
+    The documents are consumed lazily, so the input can be a generator and files on disk
+    are only opened while they're being uploaded.
+
+    Uploads failing with a connection error, a timeout or a transient HTTP status like 503
+    are retried with an exponential backoff. Other errors fail the document at once.
+    A failing document doesn't stop the other uploads.
+
+    Args:
+        documents: The documents to upload.
+        client: The GOClient used to upload. Its pool_size should be at least max_workers.
+        max_workers: The number of documents to upload in parallel. Defaults to 4.
+        max_retries: The maximum number of times to retry a document. Defaults to 3.
+        retry_delay: The number of seconds to wait before the first retry. Doubled for each retry. Defaults to 1.
+
+    Returns:
+        A report with a result for each document.
+
+    Raises:
+        ValueError: If max_workers is less than 1.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    report = DocumentUploadReport()
+
+    def collect(future: Future) -> None:
+        report.results.append(future.result())
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Keep a bounded number of documents in flight so the input stream isn't read all at once
+        in_flight: set[Future] = set()
+        for document in documents:
+            if len(in_flight) >= max_workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+
+            in_flight.add(executor.submit(_upload_document, document, client, max_retries, retry_delay))
+
+        for future in in_flight:
+            wait([future])
+            collect(future)
+
+    return report
+
+
+def _upload_document(document: DocumentUpload, client: GOClient, max_retries: int, retry_delay: float) -> DocumentUploadResult:
+    """Upload a single document, retrying transient errors.
+
+    Returns:
+        The result of the upload. Errors are caught and reported in the result.
+    """
+    attempt = 0
+    start_position = document.file.tell() if hasattr(document.file, "seek") else 0
+
+    while True:
+        attempt += 1
+        try:
+            if isinstance(document.file, (str, os.PathLike)):
+                with open(document.file, 'rb') as file:
+                    response = _send(document, file, client)
+            else:
+                if hasattr(document.file, "seek"):
+                    document.file.seek(start_position)
+                response = _send(document, document.file, client)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if attempt > max_retries or not _is_transient(e):
+                return DocumentUploadResult(document=document, success=False, attempts=attempt, error=repr(e))
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+            continue
+
+        return DocumentUploadResult(document=document, success=True, attempts=attempt, response=response)
+
+
+def _send(document: DocumentUpload, file: bytes | bytearray | BinaryIO, client: GOClient) -> str:
+    """Send the upload request of a document with the given file content."""
+    return client.upload_document(file=file, case_id=document.case_id, filename=document.filename,
+                                  agent_name=document.agent_name, date_string=document.date_string,
+                                  doc_category=document.doc_category, case_type=document.case_type,
+                                  overwrite=document.overwrite)
+
+
+def _is_transient(error: Exception) -> bool:
+    """Check if an upload error is likely to go away if the upload is retried."""
+    if isinstance(error, HTTPError):
+        return error.response is not None and error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (RequestsConnectionError, Timeout))
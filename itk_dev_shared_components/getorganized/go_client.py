@@ -0,0 +1,186 @@
+"""This module contains a client for the GetOrganized API that can be shared by several threads
+and keeps its NTLM authenticated connections open between requests.
+"""
+
+import threading
+from typing import BinaryIO, Literal
+
+from requests import Response, Session
+from requests_ntlm import HttpNtlmAuth
+
+from itk_dev_shared_components.getorganized import go_api
+
+
+# The number of times a request is sent if its NTLM handshake is interrupted by another thread
+MAX_HANDSHAKE_ATTEMPTS = 3
+
+
+class GOClient:
+    """A thread safe client for the GetOrganized API with a pool of keep-alive connections.
+
+    GetOrganized authenticates each connection with a three leg NTLM handshake,
+    and a connection stays authenticated until it's closed. The client therefore sends
+    at most pool_size requests at a time, so every request can reuse an authenticated connection
+    from the pool instead of opening a new one, which is discarded after use, when the pool is full.
+    """
+    def __init__(self, apiurl: str, username: str, password: str, *, pool_size: int = 10) -> None:
+        """Create a new GOClient.
+
+        Args:
+            apiurl: Base url for API.
+            username: Username for login.
+            password: Password for login.
+            pool_size: The maximum number of connections to keep open and requests to send at a time. Defaults to 10.
+        """
+        self.apiurl = apiurl
+        self.pool_size = pool_size
+        self.session = _PooledSession(pool_size)
+        self.session.headers.setdefault("Content-Type", "application/json")
+        self.session.auth = HttpNtlmAuth(username, password)
+
+    def upload_document(self, *, file: bytearray | bytes | BinaryIO, case_id: str, filename: str, agent_name: str | None = None,
+                        date_string: str | None = None, doc_category: str | None = None, case_type: Literal["EMN", "GEO"],
+                        overwrite: bool = True) -> str:
+        """Upload a document to Get Organized. See go_api.upload_document.
+
+        Args:
+            file: Bytearray of file to upload or a binary file object open for reading.
+            case_id: Case ID already present in GO.
+            filename: Name of file when saved in GO.
+            agent_name: Agent name, used for creating a folder in GO. Defaults to None.
+            date_string: A date to add as metadata to GetOrganized. Defaults to None.
+            doc_category: A category to add as metadata to GetOrganized. Defaults to None.
+            case_type: The case type prefix of the case.
+            overwrite: Whether to overwrite a document with the same name. Defaults to True.
+
+        Returns:
+            Return response text.
+        """
+        return go_api.upload_document(apiurl=self.apiurl, file=file, case_id=case_id, filename=filename, agent_name=agent_name,
+                                      date_string=date_string, session=self.session, doc_category=doc_category,
+                                      case_type=case_type, overwrite=overwrite)
+
+    def delete_document(self, document_id: int) -> Response:
+        """Delete a document from GetOrganized.
+
+        Args:
+            document_id: ID of the document to delete.
+
+        Returns:
+            Return the response.
+        """
+        return go_api.delete_document(self.apiurl, document_id, self.session)
+
+    def create_case(self, title: str, category: str, department: str, kle: str, case_type: Literal["EMN", "GEO"]) -> str:
+        """Create a case in GetOrganized.
+
+        Args:
+            title: Title of the case being created.
+            category: Case category to create the case for.
+            department: Department for the case.
+            kle: KLE number for the case (https://www.kle-online.dk/emneplan/00/)
+            case_type: The case type prefix of the case.
+
+        Returns:
+            Return the caseID of the created case.
+        """
+        return go_api.create_case(self.session, self.apiurl, title, category, department, kle, case_type)
+
+    def get_case_metadata(self, case_id: str) -> str:
+        """Get metadata for a GetOrganized case, to look through parameters and values.
+
+        Args:
+            case_id: Case ID to get metadata on.
+
+        Returns:
+            Return the metadata for the case as an XML string.
+        """
+        return go_api.get_case_metadata(self.session, self.apiurl, case_id)
+
+    def find_case(self, case_title: str, case_type: Literal["EMN", "GEO"]) -> list[str]:
+        """Search for an existing case in GO with the given case title.
+        The search finds any case that contains the given title in its title.
+
+        Args:
+            case_title: The title to search for.
+            case_type: The case type prefix to search in.
+
+        Returns:
+            The case id of the found case(s) if any.
+        """
+        return go_api.find_case(self.session, self.apiurl, case_title, case_type)
+
+    def close(self) -> None:
+        """Close all connections of the client."""
+        self.session.close()
+
+    def __enter__(self) -> "GOClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _PooledSession(Session):
+    """A session that sends at most a number of requests at a time on a pool of the same size.
+
+    requests_ntlm returns the connection to the pool between the legs of the handshake,
+    so another thread can take it and make the handshake fail. Such requests are sent again,
+    at most MAX_HANDSHAKE_ATTEMPTS times in all. A handshake failing without being interrupted,
+    e.g. because of a wrong password, isn't retried.
+    """
+    def __init__(self, pool_size: int) -> None:
+        super().__init__()
+        adapter = _ConnectionTrackingAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self._semaphore = threading.BoundedSemaphore(pool_size)
+
+    def request(self, method, url, *args, **kwargs):  # pylint: disable=arguments-differ
+        with self._semaphore:
+            response = super().request(method, url, *args, **kwargs)
+
+            attempts = 1
+            while response.status_code == 401 and _is_handshake_interrupted(response) and attempts < MAX_HANDSHAKE_ATTEMPTS:
+                data = kwargs.get("data")
+                if hasattr(data, "seek"):
+                    data.seek(0)
+                response = super().request(method, url, *args, **kwargs)
+                attempts += 1
+
+            return response
+
+
+class _ConnectionTrackingAdapter(go_api.NtlmAdapter):
+    """A transport adapter that remembers the connection each response was received on
+    and how many responses the connection had received, as connection_use on the response.
+    The connection is released to the pool when the body has been read, so it can't be found later.
+    """
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        connection = resp.connection
+        if connection is not None:
+            connection.response_count = getattr(connection, "response_count", 0) + 1
+            response.connection_use = (connection, connection.response_count)
+        return response
+
+
+def _is_handshake_interrupted(response: Response) -> bool:
+    """Check if another request used the connection of an NTLM handshake between the challenge
+    and the last leg, or the last leg was sent on another connection.
+
+    Args:
+        response: The final response of a request.
+
+    Returns:
+        True if the handshake was interrupted.
+    """
+    if len(response.history) < 2:
+        return False
+
+    connection_use = getattr(response, "connection_use", None)
+    challenge_use = getattr(response.history[-1], "connection_use", None)
+    if connection_use is None or challenge_use is None:
+        return False
+
+    return connection_use[0] is not challenge_use[0] or connection_use[1] != challenge_use[1] + 1
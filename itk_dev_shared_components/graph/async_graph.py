@@ -0,0 +1,169 @@
+"""This module contains async versions of the most used mail and site functions for use with asyncio,
+so one process can service many mailboxes and sites concurrently.
+
+The functions run the synchronous functions on a bounded thread pool owned by an AsyncGraphAccess object,
+so they share the pooled HTTP session, throttling retries and per-mailbox limits of the GraphClient.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import io
+from typing import Any, Callable, Iterable
+
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph import mail, site
+from itk_dev_shared_components.graph.mail import Attachment, Email
+
+
+class AsyncGraphAccess:
+    """An object that handles async access to the Graph api.
+    It wraps a GraphAccess object and limits the number of concurrent Graph calls
+    made through it. Share one object between all tasks to bound the total parallelism.
+
+    Use it as an async context manager or call close when done.
+    """
+    def __init__(self, graph_access: GraphAccess, *, max_concurrency: int = 8) -> None:
+        """Create a new AsyncGraphAccess.
+
+        Args:
+            graph_access: The GraphAccess object used to authenticate.
+            max_concurrency: The maximum number of Graph calls running at the same time. Defaults to 8.
+
+        Raises:
+            ValueError: If max_concurrency is less than 1.
+        """
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1.")
+
+        self.graph_access = graph_access
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="graph")
+
+    async def get_access_token(self) -> str:
+        """Get the access token to Graph without blocking the event loop.
+        See GraphAccess.get_access_token.
+
+        Returns:
+            str: The Graph access token.
+        """
+        return await self.run(self.graph_access.get_access_token)
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run a synchronous function on the thread pool and wait for the result.
+        This can be used to make async versions of other functions in the graph package.
+
+        Args:
+            function: The function to run.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    def close(self) -> None:
+        """Shut down the thread pool. Calls already started are allowed to finish."""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncGraphAccess":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+async def get_emails_from_folder(user: str, folder_path: str, graph_access: AsyncGraphAccess, limit: int = 100,
+                                 fields: Iterable[str] | None = None) -> tuple[Email]:
+    """Async version of mail.get_emails_from_folder.
+    Note that the body of emails fetched without the body field is loaded synchronously on first access.
+
+    Args:
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+        graph_access: The AsyncGraphAccess object used to authenticate.
+        limit: The maximum number of mails to fetch.
+        fields: The fields of the Email objects to fetch. See mail.iter_emails. Defaults to None.
+
+    Returns:
+        tuple[Email]: The emails from the given folder.
+    """
+    return await graph_access.run(mail.get_emails_from_folder, user, folder_path, graph_access.graph_access, limit, fields)
+
+
+async def list_email_attachments(email: Email, graph_access: AsyncGraphAccess) -> tuple[Attachment]:
+    """Async version of mail.list_email_attachments.
+
+    Args:
+        email: The email which attachments to list.
+        graph_access: The AsyncGraphAccess object used to authenticate.
+
+    Returns:
+        tuple[Attachment]: A tuple of Attachment objects describing the attachments.
+    """
+    return await graph_access.run(mail.list_email_attachments, email, graph_access.graph_access)
+
+
+async def get_attachment_data(attachment: Attachment, graph_access: AsyncGraphAccess) -> io.BytesIO:
+    """Async version of mail.get_attachment_data.
+
+    Args:
+        attachment: The attachment to get.
+        graph_access: The AsyncGraphAccess object used to authenticate.
+
+    Returns:
+        io.BytesIO: A file-like object representing the attachment.
+    """
+    return await graph_access.run(mail.get_attachment_data, attachment, graph_access.graph_access)
+
+
+async def move_email(email: Email, folder_path: str, graph_access: AsyncGraphAccess, *, well_known_folder: bool = False) -> None:
+    """Async version of mail.move_email.
+    The id of the email is updated when the move is done.
+
+    Args:
+        email: The email to move.
+        folder_path: The absolute path to the new folder. E.g. 'Inbox/Economy/May'
+        graph_access: The AsyncGraphAccess object used to authenticate.
+        well_known_folder: Whether the path is a 'well known folder'. Defaults to False.
+    """
+    await graph_access.run(mail.move_email, email, folder_path, graph_access.graph_access, well_known_folder=well_known_folder)
+
+
+async def delete_email(email: Email, graph_access: AsyncGraphAccess, *, permanent: bool = False) -> None:
+    """Async version of mail.delete_email.
+
+    Args:
+        email: The email to delete.
+        graph_access: The AsyncGraphAccess object used to authenticate.
+        permanent: Whether to permanently remove the email or not. Defaults to False.
+    """
+    await graph_access.run(mail.delete_email, email, graph_access.graph_access, permanent=permanent)
+
+
+async def download_file_contents(graph_access: AsyncGraphAccess, site_id: str, drive_item_id: str) -> bytes:
+    """Async version of site.download_file_contents.
+
+    Args:
+        graph_access: The AsyncGraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_id: The id of the DriveItem in SharePoint.
+
+    Returns:
+        bytes containing the contents of the file
+    """
+    return await graph_access.run(site.download_file_contents, graph_access.graph_access, site_id, drive_item_id)
+
+
+async def upload_file_contents(graph_access: AsyncGraphAccess, site_id: str, drive_item_path: str, file_contents: bytes) -> None:
+    """Async version of site.upload_file_contents.
+
+    Args:
+        graph_access: The AsyncGraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_path: The path to upload the file contents to.
+        file_contents: A bytes object containing the file's contents.
+    """
+    await graph_access.run(site.upload_file_contents, graph_access.graph_access, site_id, drive_item_path, file_contents)
@@ -1,23 +1,37 @@
 """This module is responsible for authenticating a Microsoft Graph
 connection."""
 
+import threading
+import time
+
 import msal
 
 
+# The number of seconds before expiry an access token is refreshed.
+# Tokens valid for less than twice the margin are refreshed halfway through their lifetime.
+TOKEN_REFRESH_MARGIN = 300
+
+
 # pylint: disable-next=too-few-public-methods
 class GraphAccess:
     """An object that handles access to the Graph api.
     This object should not be created directly but instead
     using one of the authorize methods in the graph.authentication module.
+
+    The access token is kept in memory and is only refreshed when it's
+    about to expire, so it's cheap to get and safe to use from many threads.
     """
     def __init__(self, app: msal.PublicClientApplication, scopes: list[str]) -> str:
         self.app = app
         self.scopes = scopes
+        # The current token and the monotonic time it should be refreshed
+        self._token: tuple[str, float] | None = None
+        self._lock = threading.Lock()
 
     def get_access_token(self):
         """Get the access token to Graph.
         This function automatically reuses an existing token
-        or refreshes an expired one.
+        or refreshes one that is about to expire.
 
         Raises:
             RuntimeError: If the access token couldn't be acquired.
@@ -25,11 +39,45 @@ class GraphAccess:
         Returns:
             str: The Graph access token.
         """
+        token = self._token
+        if token and time.monotonic() < token[1]:
+            return token[0]
+
+        with self._lock:
+            # Another thread might have refreshed the token while this one waited
+            token = self._token
+            if token and time.monotonic() < token[1]:
+                return token[0]
+
+            access_token, expires_in = self._acquire_token()
+            margin = min(TOKEN_REFRESH_MARGIN, expires_in / 2)
+            self._token = (access_token, time.monotonic() + expires_in - margin)
+            return access_token
+
+    @property
+    def tenant_key(self) -> str:
+        """The tenant and client id of the access, used to keep data cached for different tenants apart."""
+        return f"{self.app.authority.tenant}:{self.app.client_id}"
+
+    def invalidate_token(self) -> None:
+        """Forget the current access token so the next call to get_access_token gets a new one."""
+        with self._lock:
+            self._token = None
+
+    def _acquire_token(self) -> tuple[str, float]:
+        """Get an access token from MSAL.
+
+        Raises:
+            RuntimeError: If the access token couldn't be acquired.
+
+        Returns:
+            The access token and the number of seconds it's valid.
+        """
         account = self.app.get_accounts()[0]
         token = self.app.acquire_token_silent(self.scopes, account)
 
         if "access_token" in token:
-            return token['access_token']
+            return token['access_token'], float(token.get('expires_in', 0))
 
         if 'error_description' in token:
             raise RuntimeError(f"Token could not be acquired. {token['error_description']}")
@@ -1,10 +1,390 @@
 """This module contains common functions like HTTP request wrappers which are used across other modules."""
 
-from typing import Any
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import os
+import re
+import threading
+import time
+from typing import Any, BinaryIO, Iterator
+import weakref
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph.telemetry import MetricsSink, RequestRecord, get_endpoint_template, get_throttle_headers
+
+
+# Status codes where Graph asks the client to back off and try again
+RETRY_STATUS_CODES = (429, 503, 504)
+
+# Methods that can be sent again without changing the result if the first request was processed.
+# Graph may have processed a request answered with 503 or 504, so only these are retried on those.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+BATCH_ENDPOINT = "https://graph.microsoft.com/v1.0/$batch"
+
+# The maximum number of requests Graph accepts in a single batch
+BATCH_SIZE = 20
+
+_MAILBOX_PATTERN = re.compile(r"/users/([^/?]+)", re.IGNORECASE)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class GraphClient:
+    """A client that sends requests to the Graph api on a pooled HTTP session.
+
+    Throttled requests (HTTP 429, 503 and 504) are retried after the delay given in the
+    Retry-After header or with an exponential backoff if the header is missing.
+    HTTP 503 and 504 are only retried for idempotent requests, see is_retryable.
+    Requests to the same mailbox are limited to a number of concurrent requests,
+    since Graph throttles mailboxes with more than 4 concurrent requests.
+
+    If a metrics sink is given, a RequestRecord of every request sent is passed to it.
+    See the graph.telemetry module.
+
+    A client is created automatically for each GraphAccess object the first time it's used.
+    Use configure_client to change the settings of the client.
+    """
+    def __init__(self, graph_access: GraphAccess, *, pool_size: int = 10, max_retries: int = 5,
+                 max_retry_wait: float = 120, mailbox_concurrency: int | None = 4, timeout: float = 30,
+                 metrics_sink: MetricsSink | None = None) -> None:
+        """Create a new GraphClient.
+
+        Args:
+            graph_access: The GraphAccess object used to authenticate.
+            pool_size: The maximum number of connections to keep open. Defaults to 10.
+            max_retries: The maximum number of times to retry a throttled request. Defaults to 5.
+            max_retry_wait: The maximum number of seconds to wait before a retry. Defaults to 120.
+            mailbox_concurrency: The maximum number of concurrent requests per mailbox. None for no limit. Defaults to 4.
+            timeout: The default timeout of requests in seconds. Defaults to 30.
+            metrics_sink: A function called with a RequestRecord after each request. Defaults to None.
+        """
+        # Only keep a weak reference so the client doesn't keep its GraphAccess alive in _clients
+        self._graph_access_ref = weakref.ref(graph_access)
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.mailbox_concurrency = mailbox_concurrency
+        self.timeout = timeout
+        self.metrics_sink = metrics_sink
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._mailbox_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def graph_access(self) -> GraphAccess:
+        """The GraphAccess object used to authenticate."""
+        return self._graph_access_ref()
+
+    def request(self, method: str, endpoint: str, *, headers: dict | None = None, authenticate: bool = True, **kwargs) -> requests.models.Response:
+        """Send a request to the given Graph endpoint.
+        Throttled requests are retried so the request body must be replayable,
+        e.g. bytes or a json object and not a stream.
+        If the access token is rejected, e.g. because it was revoked before it expired,
+        the token is invalidated and the request is sent once more with a new token.
+
+        Args:
+            method: The HTTP method of the request.
+            endpoint: The URL of the Graph endpoint.
+            headers: Extra headers to send with the request. Defaults to None.
+            authenticate: Whether to send the access token. Pre-authenticated URLs like
+                upload sessions reject requests with a token. Defaults to True.
+            **kwargs: Extra arguments passed on to requests.Session.request.
+
+        Returns:
+            Response: The response object of the request.
+
+        Raises:
+            HTTPError: Any errors raised while performing the request.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        with self._mailbox_slot(endpoint):
+            attempt = 0
+            token_refreshed = False
+            while True:
+                request_headers = {"Authorization": f"Bearer {self.graph_access.get_access_token()}"} if authenticate else {}
+                if headers:
+                    request_headers.update(headers)
+
+                start_time = time.perf_counter()
+                try:
+                    response = self.session.request(method, endpoint, headers=request_headers, **kwargs)
+                except requests.RequestException:
+                    self._record(method, endpoint, None, start_time, attempt)
+                    raise
+                self._record(method, endpoint, response, start_time, attempt, streamed=kwargs.get("stream", False))
+
+                if response.status_code == 401 and authenticate and not token_refreshed:
+                    response.close()
+                    self.graph_access.invalidate_token()
+                    token_refreshed = True
+                    continue
+
+                if not is_retryable(method, response.status_code, headers) or attempt >= self.max_retries:
+                    break
+
+                delay = self._get_retry_delay(response, attempt)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+
+        response.raise_for_status()
+        return response
+
+    def close(self) -> None:
+        """Close all open connections of the client."""
+        self.session.close()
+
+    # pylint: disable-next=too-many-arguments
+    def _record(self, method: str, endpoint: str, response: requests.models.Response | None, start_time: float, attempt: int,
+                *, streamed: bool = False) -> None:
+        """Pass a record of a request to the metrics sink if there is one.
+
+        Args:
+            method: The HTTP method of the request.
+            endpoint: The URL of the Graph endpoint.
+            response: The response or None if the request failed without a response.
+            start_time: The value of time.perf_counter when the request was sent.
+            attempt: The number of retries made before the request.
+            streamed: Whether the response body is streamed and hasn't been read. Defaults to False.
+        """
+        if self.metrics_sink is None:
+            return
+
+        latency = time.perf_counter() - start_time
+        record = RequestRecord(
+            method=method,
+            endpoint_template=get_endpoint_template(endpoint),
+            mailbox=get_mailbox(endpoint),
+            status=None,
+            latency=latency,
+            request_bytes=None,
+            response_bytes=None,
+            attempt=attempt
+        )
+
+        if response is not None:
+            record.status = response.status_code
+            record.request_bytes = _get_body_size(response.request.body)
+            record.response_bytes = _get_response_size(response, streamed)
+            record.retry_after = response.headers.get("Retry-After")
+            record.throttle_headers = get_throttle_headers(response.headers)
+
+        self.metrics_sink(record)
+
+    def _mailbox_slot(self, endpoint: str):
+        """Get a context manager that holds one of the concurrency slots of the mailbox
+        the endpoint points to. If the endpoint doesn't point to a mailbox or
+        mailbox_concurrency is None the context manager does nothing.
+
+        Args:
+            endpoint: The URL of the Graph endpoint.
+
+        Returns:
+            A context manager.
+        """
+        mailbox = get_mailbox(endpoint)
+        if mailbox is None or self.mailbox_concurrency is None:
+            return nullcontext()
+
+        with self._lock:
+            if mailbox not in self._mailbox_semaphores:
+                self._mailbox_semaphores[mailbox] = threading.BoundedSemaphore(self.mailbox_concurrency)
+            return self._mailbox_semaphores[mailbox]
+
+    def _get_retry_delay(self, response: requests.models.Response, attempt: int) -> float:
+        """Get the number of seconds to wait before retrying a throttled request.
+
+        Args:
+            response: The throttled response.
+            attempt: The number of retries made so far.
+
+        Returns:
+            The number of seconds to wait.
+        """
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = 2 ** attempt
+
+        return min(delay, self.max_retry_wait)
+
+
+@dataclass
+class BatchResponse:
+    """A dataclass representing the response to a single request in a Graph json batch."""
+    status: int
+    headers: dict[str, str] = field(default_factory=dict, repr=False)
+    body: Any = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+        return 200 <= self.status < 300
+
+    @property
+    def error_message(self) -> str | None:
+        """The error message returned by Graph if any."""
+        if self.ok:
+            return None
+        if isinstance(self.body, dict) and 'error' in self.body:
+            return self.body['error'].get('message')
+        return f"HTTP {self.status}"
+
+
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_client(graph_access: GraphAccess) -> GraphClient:
+    """Get the GraphClient used for the given GraphAccess object.
+    A client with default settings is created if none exists.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        The GraphClient of the GraphAccess object.
+    """
+    with _clients_lock:
+        client = _clients.get(graph_access)
+        if client is None:
+            client = GraphClient(graph_access)
+            _clients[graph_access] = client
+        return client
+
+
+def configure_client(graph_access: GraphAccess, **kwargs) -> GraphClient:
+    """Create a new GraphClient with the given settings and use it for all
+    requests made with the given GraphAccess object.
+    See GraphClient for a description of the settings.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        **kwargs: The settings passed on to GraphClient.
+
+    Returns:
+        The new GraphClient.
+    """
+    client = GraphClient(graph_access, **kwargs)
+    with _clients_lock:
+        old_client = _clients.get(graph_access)
+        _clients[graph_access] = client
+
+    if old_client:
+        old_client.close()
+
+    return client
+
+
+def get_mailbox(endpoint: str) -> str | None:
+    """Get the mailbox an endpoint points to.
+
+    Args:
+        endpoint: The URL of the Graph endpoint.
+
+    Returns:
+        The lowercase user id or email address in the endpoint or None if the endpoint isn't under /users/.
+    """
+    match = _MAILBOX_PATTERN.search(endpoint)
+    if match:
+        return match.group(1).lower()
+    return None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse the value of a Retry-After header.
+    The value is either a number of seconds or a HTTP date.
+
+    Args:
+        value: The value of the header.
+
+    Returns:
+        The number of seconds to wait or None if the value couldn't be parsed.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max((retry_time - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def is_retryable(method: str, status_code: int, headers: dict | None = None) -> bool:
+    """Check if a request answered with the given status code should be retried.
+    Graph rejects throttled requests (HTTP 429) before processing them, so they're always retried.
+    A request answered with HTTP 503 or 504 may have been processed anyway, e.g. an email that was moved,
+    so it's only retried if sending it again gives the same result. That is GET, HEAD, OPTIONS, PUT
+    and DELETE requests and PATCH requests writing a byte range given in a Content-Range header.
+
+    Args:
+        method: The HTTP method of the request.
+        status_code: The status code of the response.
+        headers: The headers of the request. Defaults to None.
+
+    Returns:
+        True if the request should be retried.
+    """
+    if status_code == 429:
+        return True
+    if status_code not in RETRY_STATUS_CODES:
+        return False
+
+    method = method.upper()
+    return method in IDEMPOTENT_METHODS or (method == "PATCH" and "Content-Range" in (headers or {}))
+
+
+def _get_body_size(body: Any) -> int | None:
+    """Get the size of a request body.
+
+    Args:
+        body: The body of a prepared request.
+
+    Returns:
+        The number of bytes in the body or None if the body is a stream.
+    """
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return None
+
+
+def _get_response_size(response: requests.models.Response, streamed: bool) -> int | None:
+    """Get the size of a response body without reading a streamed body.
+
+    Args:
+        response: The response.
+        streamed: Whether the body is streamed and hasn't been read.
+
+    Returns:
+        The number of bytes in the body or None if it isn't known yet.
+    """
+    content_length = response.headers.get("Content-Length")
+    if content_length and content_length.isdigit():
+        return int(content_length)
+
+    if not streamed:
+        return len(response.content)
+    return None
 
 
 def get_request(endpoint: str, graph_access: GraphAccess) -> requests.models.Response:
@@ -21,13 +401,94 @@ def get_request(endpoint: str, graph_access: GraphAccess) -> requests.models.Res
     Raises:
         HTTPError: Any errors raised while performing GET request.
     """
-    token = graph_access.get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    return get_client(graph_access).request("GET", endpoint)
+
 
-    response = requests.get(endpoint, headers=headers, timeout=30)
-    response.raise_for_status()
+def get_paginated(endpoint: str, graph_access: GraphAccess) -> Iterator[dict]:
+    """Get all items from a Graph collection endpoint.
+    The pages are fetched lazily by following '@odata.nextLink'.
 
-    return response
+    Args:
+        endpoint: The URL of the Graph endpoint.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Yields:
+        The json dictionary of each item in the collection.
+
+    Raises:
+        HTTPError: Any errors raised while performing GET requests.
+    """
+    while endpoint:
+        response = get_request(endpoint, graph_access).json()
+        yield from response['value']
+        endpoint = response.get('@odata.nextLink')
+
+
+def stream_download(endpoint: str, graph_access: GraphAccess, destination: str | os.PathLike | BinaryIO,
+                    *, chunk_size: int = 1024 * 1024, max_resumes: int = 5) -> int:
+    """Download the content of a Graph endpoint directly to a file or stream in chunks,
+    so the content is never held in memory as a whole.
+    If the connection drops, the download is resumed using a HTTP Range request.
+    If the server doesn't support ranges the download starts over.
+
+    Args:
+        endpoint: The URL of the Graph endpoint.
+        graph_access: The GraphAccess object used to authenticate.
+        destination: A file path or a writable binary stream.
+        chunk_size: The number of bytes to read at a time. Defaults to 1 MiB.
+        max_resumes: The maximum number of times to resume after a dropped connection. Defaults to 5.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        HTTPError: Any errors raised while performing the request.
+        ConnectionError: If the connection dropped more than max_resumes times or
+            a download to a non-seekable stream couldn't be resumed.
+    """
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, 'wb') as file:
+            return _stream_to_file(endpoint, graph_access, file, chunk_size, max_resumes)
+
+    return _stream_to_file(endpoint, graph_access, destination, chunk_size, max_resumes)
+
+
+def _stream_to_file(endpoint: str, graph_access: GraphAccess, file: BinaryIO, chunk_size: int, max_resumes: int) -> int:
+    """Download the content of a Graph endpoint to an open file.
+    See stream_download for a description of the arguments.
+
+    Returns:
+        The number of bytes written.
+    """
+    client = get_client(graph_access)
+    start_position = file.tell() if file.seekable() else None
+    written = 0
+    resumes = 0
+
+    while True:
+        headers = {"Range": f"bytes={written}-"} if written else None
+        try:
+            with client.request("GET", endpoint, headers=headers, stream=True) as response:
+                if written and response.status_code != 206:
+                    # The server ignored the range so start over
+                    if start_position is None:
+                        break
+                    file.seek(start_position)
+                    file.truncate()
+                    written = 0
+
+                for chunk in response.iter_content(chunk_size):
+                    file.write(chunk)
+                    written += len(chunk)
+
+            return written
+
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError):
+            resumes += 1
+            if resumes > max_resumes:
+                raise
+
+    raise requests.ConnectionError("The download couldn't be resumed since the server doesn't support ranges and the stream isn't seekable.")
 
 
 def put_request(endpoint: str, graph_access: GraphAccess, data: Any) -> requests.models.Response:
@@ -45,10 +506,166 @@ def put_request(endpoint: str, graph_access: GraphAccess, data: Any) -> requests
     Raises:
         HTTPError: Any errors raised while performing PUT request.
     """
-    token = graph_access.get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    return get_client(graph_access).request("PUT", endpoint, data=data)
+
+
+def post_request(endpoint: str, graph_access: GraphAccess, json: Any) -> requests.models.Response:
+    """Sends a post request with a json body to the given Graph endpoint using the GraphAccess.
+
+    Args:
+        endpoint: The URL of the Graph endpoint.
+        graph_access: The GraphAccess object used to authenticate.
+        json: The json object to send in the request.
+
+    Returns:
+        Response: The response object of the POST request.
+
+    Raises:
+        HTTPError: Any errors raised while performing POST request.
+    """
+    return get_client(graph_access).request("POST", endpoint, json=json)
+
+
+def delete_request(endpoint: str, graph_access: GraphAccess) -> requests.models.Response:
+    """Sends a delete request to the given Graph endpoint using the GraphAccess.
+
+    Args:
+        endpoint: The URL of the Graph endpoint.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        Response: The response object of the DELETE request.
+
+    Raises:
+        HTTPError: Any errors raised while performing DELETE request.
+    """
+    return get_client(graph_access).request("DELETE", endpoint)
+
+
+def batch_request(batch_requests: list[dict], graph_access: GraphAccess) -> list[BatchResponse]:
+    """Send a number of requests to Graph using json batching.
+    The requests are sent in batches of 20, which is the maximum Graph allows.
+    Requests that are throttled inside a batch are retried using the retry settings of the GraphClient.
+    Like single requests, only idempotent requests are retried on HTTP 503 and 504, see is_retryable.
+    If the GraphClient has a metrics sink, each request in a batch is recorded besides the batch itself.
+    See https://learn.microsoft.com/en-us/graph/json-batching for further documentation.
+
+    Args:
+        batch_requests: A list of requests described as dictionaries with a 'method', a 'url'
+            relative to the Graph version e.g. '/users/{user}/messages' and optionally a json 'body'.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        A list of responses in the same order as the requests.
+
+    Raises:
+        HTTPError: If a batch as a whole failed.
+    """
+    client = get_client(graph_access)
+    responses: list[BatchResponse | None] = [None] * len(batch_requests)
+
+    pending = list(range(len(batch_requests)))
+    attempt = 0
+    while pending:
+        throttled = []
+        delay = 0
+
+        for i in range(0, len(pending), BATCH_SIZE):
+            for index, response in _send_batch(client, batch_requests, pending[i:i+BATCH_SIZE], attempt):
+                responses[index] = response
+
+                if is_retryable(batch_requests[index]['method'], response.status) and attempt < client.max_retries:
+                    throttled.append(index)
+                    item_delay = parse_retry_after(response.headers.get("Retry-After"))
+                    delay = max(delay, item_delay if item_delay is not None else 2 ** attempt)
+
+        pending = sorted(throttled)
+        if pending:
+            time.sleep(min(delay, client.max_retry_wait))
+            attempt += 1
+
+    return responses
+
+
+def _send_batch(client: GraphClient, batch_requests: list[dict], indices: list[int], attempt: int) -> list[tuple[int, BatchResponse]]:
+    """Send a single json batch of at most 20 requests.
+
+    Args:
+        client: The GraphClient to send the batch with.
+        batch_requests: All requests of the batch operation.
+        indices: The indices of the requests to send in this batch.
+        attempt: The number of times the requests have been retried.
+
+    Returns:
+        A list of tuples of request index and response.
+    """
+    body = {"requests": [_create_batch_item(index, batch_requests[index]) for index in indices]}
+    start_time = time.perf_counter()
+    response = client.request("POST", BATCH_ENDPOINT, json=body)
+
+    responses = [
+        (
+            int(item['id']),
+            BatchResponse(status=item['status'], headers=item.get('headers', {}), body=item.get('body'))
+        ) for item in response.json()['responses']
+    ]
+
+    if client.metrics_sink:
+        latency = time.perf_counter() - start_time
+        for index, batch_response in responses:
+            client.metrics_sink(_create_batch_record(batch_requests[index], batch_response, latency, attempt))
+
+    return responses
+
+
+def _create_batch_record(batch_request_: dict, response: BatchResponse, latency: float, attempt: int) -> RequestRecord:
+    """Create the record of a single request in a json batch.
+    The latency is the latency of the whole batch and the sizes of the request and response aren't known.
+
+    Args:
+        batch_request_: The request described as a dictionary with a 'method', a 'url' and optionally a 'body'.
+        response: The response to the request.
+        latency: The latency of the batch in seconds.
+        attempt: The number of times the request has been retried.
+
+    Returns:
+        The record of the request.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0{batch_request_['url']}"
+    headers = {name.title(): value for name, value in response.headers.items()}
+
+    return RequestRecord(
+        method=batch_request_['method'],
+        endpoint_template=get_endpoint_template(endpoint),
+        mailbox=get_mailbox(endpoint),
+        status=response.status,
+        latency=latency,
+        request_bytes=None,
+        response_bytes=None,
+        attempt=attempt,
+        retry_after=headers.get("Retry-After"),
+        throttle_headers=get_throttle_headers(headers)
+    )
+
+
+def _create_batch_item(index: int, batch_request_: dict) -> dict:
+    """Create a request item in the format of a Graph json batch.
+
+    Args:
+        index: The index of the request used as the request id.
+        batch_request_: The request described as a dictionary with a 'method', a 'url' and optionally a 'body'.
+
+    Returns:
+        The request item.
+    """
+    item = {
+        "id": str(index),
+        "method": batch_request_['method'],
+        "url": batch_request_['url']
+    }
 
-    response = requests.put(endpoint, headers=headers, data=data, timeout=30)
-    response.raise_for_status()
+    if batch_request_.get('body') is not None:
+        item['body'] = batch_request_['body']
+        item['headers'] = {"Content-Type": "application/json"}
 
-    return response
+    return item
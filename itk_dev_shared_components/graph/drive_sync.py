@@ -0,0 +1,353 @@
+"""This module is responsible for syncing folders between SharePoint and the local file system using the Microsoft Graph API."""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import json
+import os
+
+from requests import HTTPError
+
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph.file import DriveItem, QuickXorHash, list_drive_items
+from itk_dev_shared_components.graph.site import download_file, upload_file
+
+
+MANIFEST_NAME = ".sync_manifest.json"
+
+
+@dataclass
+class FolderSyncResult:
+    """A dataclass representing the result of syncing a folder.
+    All paths are relative to the synced folder.
+    """
+    downloaded: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class FolderUploadResult:
+    """A dataclass representing the result of uploading a folder.
+    All paths are relative to the uploaded folder.
+    """
+    uploaded: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def sync_folder(graph_access: GraphAccess, site_id: str, remote_path: str, local_dir: str, *, max_workers: int = 4,
+                delete_removed: bool = False, manifest_path: str | None = None) -> FolderSyncResult:
+    """Sync a folder on a site and all its subfolders to a local folder.
+    Only files that are new or changed since the last sync are downloaded.
+    Files are compared by their eTag, or their last modified time if they have no eTag.
+
+    The state of the last sync is kept in a json manifest file in the local folder.
+    Files are downloaded to a temporary file first, so an interrupted sync never leaves half written files,
+    and running the sync again continues where it stopped.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        remote_path: The path to the folder in SharePoint. Use an empty string for the root of the drive.
+        local_dir: The path of the local folder.
+        max_workers: The number of files to download in parallel. Defaults to 4.
+        delete_removed: Whether to delete local files that have been removed from SharePoint since the last sync. Defaults to False.
+        manifest_path: The path of the manifest file. Defaults to a file named .sync_manifest.json in the local folder.
+
+    Returns:
+        The paths of the downloaded, unchanged and removed files and the errors of files that failed to download.
+    """
+    manifest_path = manifest_path or os.path.join(local_dir, MANIFEST_NAME)
+    manifest = _read_manifest(manifest_path)
+    result = FolderSyncResult()
+
+    os.makedirs(local_dir, exist_ok=True)
+    remote_items = _list_remote_files(graph_access, site_id, remote_path, local_dir)
+
+    to_download = {}
+    for path, item in remote_items.items():
+        if _is_changed(manifest.get(path), item) or not os.path.isfile(os.path.join(local_dir, path)):
+            to_download[path] = item
+        else:
+            result.unchanged.append(path)
+
+    try:
+        _download_files(graph_access, site_id, to_download, local_dir, max_workers, manifest, result)
+
+        for path in set(manifest) - set(remote_items):
+            del manifest[path]
+            result.removed.append(path)
+            local_path = os.path.join(local_dir, path)
+            if delete_removed and os.path.isfile(local_path):
+                os.remove(local_path)
+
+    finally:
+        _write_manifest(manifest_path, manifest)
+
+    return result
+
+
+def upload_folder(graph_access: GraphAccess, site_id: str, local_dir: str, remote_path: str, *, max_workers: int = 4,
+                  conflict: str = "replace") -> FolderUploadResult:
+    """Upload a local folder and all its subfolders to a folder on a site.
+    Files that already exist on the site with the same content are skipped.
+    The content is compared by size and by the QuickXorHash SharePoint has of the file.
+    Throttled requests are retried by the GraphClient, so keep max_workers low to stay within Graph's limits.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        local_dir: The path of the local folder.
+        remote_path: The path to the folder in SharePoint. The folder is created if it doesn't exist.
+        max_workers: The number of files to upload in parallel. Defaults to 4.
+        conflict: What to do with files that exist with a different content:
+            'replace' to overwrite them, 'skip' to keep them or 'rename' to upload the file with a new name.
+            Defaults to 'replace'.
+
+    Returns:
+        The paths of the uploaded and skipped files and the errors of files that failed to upload.
+
+    Raises:
+        ValueError: If conflict isn't one of the allowed values.
+    """
+    if conflict not in ("replace", "skip", "rename"):
+        raise ValueError("conflict must be 'replace', 'skip' or 'rename'.")
+
+    remote_path = remote_path.strip("/")
+    remote_items = _list_existing_remote_files(graph_access, site_id, remote_path)
+    result = FolderUploadResult()
+
+    # Graph doesn't have a skip behavior, so files created while uploading make the upload fail
+    conflict_behavior = "fail" if conflict == "skip" else conflict
+
+    to_upload = []
+    for path in _list_local_files(local_dir):
+        item = remote_items.get(path)
+        if item and (conflict == "skip" or _is_same_file(os.path.join(local_dir, path), item)):
+            result.skipped.append(path)
+        else:
+            to_upload.append(path)
+
+    _upload_files(graph_access, site_id, local_dir, remote_path, to_upload, max_workers, conflict_behavior, result)
+    return result
+
+
+def _upload_files(graph_access: GraphAccess, site_id: str, local_dir: str, remote_path: str, paths: list[str], max_workers: int,
+                  conflict_behavior: str, result: FolderUploadResult) -> None:
+    """Upload files in parallel and record them in the result.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        local_dir: The path of the local folder.
+        remote_path: The path to the folder in SharePoint.
+        paths: The paths of the files to upload relative to the folders.
+        max_workers: The number of files to upload in parallel.
+        conflict_behavior: The Graph conflict behavior to upload with.
+        result: The result to add uploaded and failed files to.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(upload_file, graph_access, site_id, f"{remote_path}/{path}" if remote_path else path,
+                            os.path.join(local_dir, path), conflict_behavior=conflict_behavior): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                result.failed[path] = repr(e)
+                continue
+
+            result.uploaded.append(path)
+
+
+def _list_local_files(local_dir: str) -> list[str]:
+    """List all files in a local folder and its subfolders.
+
+    Args:
+        local_dir: The path of the local folder.
+
+    Returns:
+        The paths of the files relative to the folder using / as separator.
+    """
+    paths = []
+    for dir_path, _, file_names in os.walk(local_dir):
+        relative_dir = os.path.relpath(dir_path, local_dir).replace(os.sep, "/")
+        for file_name in file_names:
+            paths.append(file_name if relative_dir == "." else f"{relative_dir}/{file_name}")
+    return paths
+
+
+def _list_existing_remote_files(graph_access: GraphAccess, site_id: str, remote_path: str) -> dict[str, DriveItem]:
+    """List all files in a remote folder if it exists.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        remote_path: The path to the folder in SharePoint.
+
+    Returns:
+        A dictionary of the files by their path relative to the remote folder.
+    """
+    files = {}
+    try:
+        for item in list_drive_items(graph_access, site_id, remote_path, recursive=True):
+            if not item.is_folder:
+                files[item.path[len(remote_path):].lstrip("/")] = item
+    except HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+
+    return files
+
+
+def _is_same_file(local_path: str, item: DriveItem) -> bool:
+    """Check if a local file has the same content as a file on SharePoint.
+    The sizes are compared first, and if they match the hashes are compared if SharePoint has one.
+
+    Args:
+        local_path: The path of the local file.
+        item: The DriveItem of the remote file.
+
+    Returns:
+        True if the files are the same.
+    """
+    if item.size != os.path.getsize(local_path):
+        return False
+    if item.quick_xor_hash is None:
+        return True
+    return QuickXorHash.from_file(local_path).b64digest() == item.quick_xor_hash
+
+
+def _list_remote_files(graph_access: GraphAccess, site_id: str, remote_path: str, local_dir: str) -> dict[str, DriveItem]:
+    """List all files in a remote folder and create the subfolders locally.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        remote_path: The path to the folder in SharePoint.
+        local_dir: The path of the local folder.
+
+    Returns:
+        A dictionary of the files by their path relative to the remote folder.
+    """
+    prefix_length = len(remote_path.strip("/"))
+    files = {}
+
+    for item in list_drive_items(graph_access, site_id, remote_path, recursive=True):
+        path = item.path[prefix_length:].lstrip("/")
+        if item.is_folder:
+            os.makedirs(os.path.join(local_dir, path), exist_ok=True)
+        else:
+            files[path] = item
+
+    return files
+
+
+def _download_files(graph_access: GraphAccess, site_id: str, items: dict[str, DriveItem], local_dir: str, max_workers: int,
+                    manifest: dict[str, dict], result: FolderSyncResult) -> None:
+    """Download files in parallel and record them in the manifest and result.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        items: The files to download by their relative path.
+        local_dir: The path of the local folder.
+        max_workers: The number of files to download in parallel.
+        manifest: The manifest to add downloaded files to.
+        result: The result to add downloaded and failed files to.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_download, graph_access, site_id, item, os.path.join(local_dir, path)): path
+            for path, item in items.items()
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                result.failed[path] = repr(e)
+                continue
+
+            manifest[path] = _create_manifest_entry(items[path])
+            result.downloaded.append(path)
+
+
+def _download(graph_access: GraphAccess, site_id: str, item: DriveItem, local_path: str) -> None:
+    """Download a file to a temporary file and move it into place when done.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        item: The DriveItem to download.
+        local_path: The path to download the file to.
+    """
+    temp_path = local_path + ".part"
+    try:
+        download_file(graph_access, site_id, item.id, temp_path)
+        os.replace(temp_path, local_path)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+
+def _is_changed(entry: dict | None, item: DriveItem) -> bool:
+    """Check if a file has changed since it was recorded in the manifest.
+
+    Args:
+        entry: The manifest entry of the file or None if the file isn't in the manifest.
+        item: The DriveItem of the file.
+
+    Returns:
+        True if the file is new or has changed.
+    """
+    if entry is None:
+        return True
+    if entry.get('e_tag') and item.e_tag:
+        return entry['e_tag'] != item.e_tag
+    return entry.get('last_modified') != item.last_modified
+
+
+def _create_manifest_entry(item: DriveItem) -> dict:
+    """Create the manifest entry of a downloaded file.
+
+    Args:
+        item: The DriveItem of the file.
+
+    Returns:
+        The manifest entry.
+    """
+    return {"id": item.id, "e_tag": item.e_tag, "last_modified": item.last_modified, "size": item.size}
+
+
+def _read_manifest(manifest_path: str) -> dict[str, dict]:
+    """Read a manifest file.
+
+    Args:
+        manifest_path: The path of the manifest file.
+
+    Returns:
+        The manifest entries by file path. Empty if the file doesn't exist.
+    """
+    if not os.path.isfile(manifest_path):
+        return {}
+
+    with open(manifest_path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _write_manifest(manifest_path: str, manifest: dict[str, dict]) -> None:
+    """Write a manifest file. The file is replaced atomically so it's never left half written.
+
+    Args:
+        manifest_path: The path of the manifest file.
+        manifest: The manifest entries by file path.
+    """
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
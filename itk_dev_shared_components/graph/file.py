@@ -1,22 +1,107 @@
 """This module is responsible for accessing files using the Microsoft Graph API."""
 
+import base64
+from collections import deque
 from dataclasses import dataclass, field
+from typing import Iterator
 
 from itk_dev_shared_components.graph.authentication import GraphAccess
-from itk_dev_shared_components.graph.common import get_request
+from itk_dev_shared_components.graph.common import get_request, get_paginated
+from itk_dev_shared_components.graph.metadata_cache import get_metadata_cache, drive_item_key
 
 
 @dataclass
+# pylint: disable-next=too-many-instance-attributes
 class DriveItem:
-    """A class representing a DriveItem."""
+    """A class representing a DriveItem.
+    path is the path from the root of the drive and is only known for items found by listing a folder.
+    """
 
     id: str = field(repr=False)
     name: str
     web_url: str
     last_modified: str
+    e_tag: str | None = field(default=None, repr=False)
+    size: int | None = None
+    is_folder: bool = False
+    path: str | None = None
+    quick_xor_hash: str | None = field(default=None, repr=False)
 
 
-def get_drive_item(graph_access: GraphAccess, site_id: str, drive_item_path: str) -> DriveItem:
+class QuickXorHash:
+    """The QuickXorHash algorithm used by SharePoint and OneDrive for Business to checksum files.
+    It has the same interface as the hash objects in hashlib.
+    See https://learn.microsoft.com/en-us/onedrive/developer/code-snippets/quickxorhash
+    """
+    name = "quickxor"
+    digest_size = 20
+
+    # The hash is a 160 bit register where byte number i is xored in at bit (i * 11) % 160.
+    # Since 11 and 160 are coprime, bytes 160 apart land on the same bit,
+    # so the data is first folded into 160 byte columns using big integer xor.
+    _BLOCK_BITS = 160 * 8
+
+    def __init__(self, data: bytes = b"") -> None:
+        self._columns = 0
+        self._length = 0
+        self.update(data)
+
+    def update(self, data: bytes) -> None:
+        """Add data to the hash."""
+        if not data:
+            return
+
+        # Align the data with the columns by shifting it by the current position
+        offset = self._length % 160
+        value = int.from_bytes(data, 'little') << (offset * 8)
+        blocks = (offset + len(data) + 159) // 160
+
+        while blocks > 1:
+            half = blocks // 2
+            value = (value & ((1 << (half * self._BLOCK_BITS)) - 1)) ^ (value >> (half * self._BLOCK_BITS))
+            blocks -= half
+
+        self._columns ^= value
+        self._length += len(data)
+
+    def digest(self) -> bytes:
+        """Get the hash as bytes."""
+        register = 0
+        columns = self._columns.to_bytes(160, 'little')
+        for i, byte in enumerate(columns):
+            if byte:
+                value = byte << ((i * 11) % 160)
+                register ^= (value & ((1 << 160) - 1)) | (value >> 160)
+
+        result = bytearray(register.to_bytes(20, 'little'))
+        for i, byte in enumerate(self._length.to_bytes(8, 'little')):
+            result[12 + i] ^= byte
+
+        return bytes(result)
+
+    def b64digest(self) -> str:
+        """Get the hash as base64 like Graph returns it."""
+        return base64.b64encode(self.digest()).decode()
+
+    @classmethod
+    def from_file(cls, path: str, chunk_size: int = 1024 * 1024) -> "QuickXorHash":
+        """Hash a file without loading it into memory as a whole.
+
+        Args:
+            path: The path of the file.
+            chunk_size: The number of bytes to read at a time. Defaults to 1 MiB.
+
+        Returns:
+            The hash of the file.
+        """
+        quick_xor_hash = cls()
+        with open(path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                quick_xor_hash.update(chunk)
+        return quick_xor_hash
+
+
+def get_drive_item(graph_access: GraphAccess, site_id: str, drive_item_path: str, *, use_cache: bool = False) -> DriveItem:
     """Given a site id and a drive_item_path, gets the corresponding DriveItem
 
     You need to authorize against Graph to get the GraphAccess before using this function
@@ -28,18 +113,63 @@ def get_drive_item(graph_access: GraphAccess, site_id: str, drive_item_path: str
         graph_access: The GraphAccess object used to authenticate.
         site_id: The id of the site in SharePoint.
         drive_item_path: The path to the DriveItem in SharePoint.
+        use_cache: Whether to use the cached DriveItem if there is one. Use this to resolve
+            the ids of paths that rarely change. The cached eTag and last modified time may be outdated
+            if the file has been changed by others. See the graph.metadata_cache module. Defaults to False.
 
     Returns:
         DriveItem: A DriveItem object.
     """
+    cache = get_metadata_cache()
+    key = drive_item_key(graph_access.tenant_key, site_id, drive_item_path)
 
-    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{drive_item_path}"
-    response = get_request(endpoint, graph_access)
-    raw_response = response.json()
+    raw_response = cache.get(key) if use_cache else None
+    if raw_response is None:
+        endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{drive_item_path}"
+        response = get_request(endpoint, graph_access)
+        raw_response = response.json()
+        cache.set(key, raw_response)
 
     return _unpack_drive_item_response(raw_response)
 
 
+def list_drive_items(graph_access: GraphAccess, site_id: str, drive_item_path: str, *, recursive: bool = False) -> Iterator[DriveItem]:
+    """List the items in a folder on a site. All pages of the listing are fetched lazily.
+    When listing recursively the items of a folder are listed before the items of its subfolders.
+
+    You need to authorize against Graph to get the GraphAccess before using this function
+    see the graph.authentication module.
+
+    See https://learn.microsoft.com/en-us/graph/api/driveitem-list-children for further documentation
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_path: The path to the folder in SharePoint. Use an empty string for the root of the drive.
+        recursive: Whether to list the items in all subfolders as well. Defaults to False.
+
+    Yields:
+        DriveItem: A DriveItem object with its path set.
+    """
+    folder_path = drive_item_path.strip("/")
+    if folder_path:
+        endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{folder_path}:/children"
+    else:
+        endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root/children"
+
+    folders = deque([(endpoint, folder_path)])
+    while folders:
+        endpoint, folder_path = folders.popleft()
+
+        for item_raw in get_paginated(endpoint, graph_access):
+            item = _unpack_drive_item_response(item_raw)
+            item.path = f"{folder_path}/{item.name}" if folder_path else item.name
+            yield item
+
+            if recursive and item.is_folder:
+                folders.append((f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item.id}/children", item.path))
+
+
 def _unpack_drive_item_response(drive_item_raw: dict[str, str]) -> DriveItem:
     """Unpack a json HTTP response and create a DriveItem object.
 
@@ -55,4 +185,8 @@ def _unpack_drive_item_response(drive_item_raw: dict[str, str]) -> DriveItem:
         name=drive_item_raw["name"],
         web_url=drive_item_raw["webUrl"],
         last_modified=drive_item_raw["lastModifiedDateTime"],
+        e_tag=drive_item_raw.get("eTag"),
+        size=drive_item_raw.get("size"),
+        is_folder="folder" in drive_item_raw,
+        quick_xor_hash=drive_item_raw.get("file", {}).get("hashes", {}).get("quickXorHash"),
     )
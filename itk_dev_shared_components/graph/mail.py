@@ -1,42 +1,93 @@
 """This module is responsible for accessing emails using the Microsoft Graph API."""
 
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 import io
+import itertools
+import os
+import re
+import threading
+import time
+from typing import BinaryIO, Iterable, Iterator
+import urllib.parse
 
-import requests
-from bs4 import BeautifulSoup
+from requests import HTTPError
 
 from itk_dev_shared_components.graph.authentication import GraphAccess
-from itk_dev_shared_components.graph.common import get_request
+from itk_dev_shared_components.graph.common import get_request, get_paginated, post_request, delete_request, batch_request, stream_download, BatchResponse
+from itk_dev_shared_components.misc.html_util import html_to_text
+
+
+# Placeholder for an email body that hasn't been fetched yet
+_NOT_LOADED = object()
+
+# The Graph message properties needed for each field of the Email class
+EMAIL_FIELDS = {
+    "received_time": "receivedDateTime",
+    "sender": "from",
+    "receivers": "toRecipients",
+    "subject": "subject",
+    "body": "body",
+    "body_type": "body",
+    "has_attachments": "hasAttachments"
+}
 
 
 @dataclass
 # pylint: disable-next=too-many-instance-attributes
 class Email:
-    """A class representing an email."""
+    """A class representing an email.
+    If the email was fetched without its body, the body is fetched from Graph
+    the first time it's accessed. body_type is None until then.
+    """
     user: str
     id: str = field(repr=False)
     received_time: str
     sender: str
     receivers: list[str]
     subject: str
-    body: str = field(repr=False)
+    # Not compared so == doesn't fetch a body that hasn't been loaded
+    body: str = field(repr=False, compare=False)
     body_type: str
     has_attachments: bool
+    _graph_access: GraphAccess | None = field(default=None, repr=False, compare=False)
+    # The html body and its text from the last call to get_text
+    _text_cache: tuple[str, str] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.body is _NOT_LOADED:
+            # Remove the attribute so the body is loaded by __getattr__ on first access
+            del self.body
+
+    def __getattr__(self, name: str):
+        # Only called when an attribute doesn't exist i.e. when the body hasn't been loaded
+        if name == 'body' and self.__dict__.get('_graph_access') is not None:
+            endpoint = f"https://graph.microsoft.com/v1.0/users/{self.user}/messages/{self.id}?$select=body"
+            body = get_request(endpoint, self._graph_access).json()['body']
+            self.body = body['content']
+            self.body_type = body['contentType']
+            return self.body
+
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
     def get_text(self) -> str:
         """Get the body as plain text.
         If the body is html it's converted to plaintext.
         If the body is text it's returned as is.
+        The converted text is cached until the body changes.
 
         Returns:
             str: The body as plain text.
         """
+        body = self.body
+
         if self.body_type == 'html':
-            soup = BeautifulSoup(self.body, "html.parser")
-            return soup.get_text().strip()
+            if self._text_cache is None or self._text_cache[0] is not body:
+                self._text_cache = (body, html_to_text(body))
+            return self._text_cache[1]
 
-        return self.body
+        return body
 
 
 @dataclass
@@ -51,31 +102,222 @@ class Attachment:
     size: int
 
 
-def get_emails_from_folder(user: str, folder_path: str, graph_access: GraphAccess, limit: int = 100) -> tuple[Email]:
+class FolderCache:
+    """A thread safe cache of the Graph ids of mail folders by user and folder path.
+    The cache can be shared by several GraphAccess objects, so entries are kept apart by their tenant_key.
+    Entries expire after ttl seconds.
+    """
+    def __init__(self, ttl: float = 3600) -> None:
+        self.ttl = ttl
+        self._folders: dict[tuple[str, str, str], tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_key: str, user: str, folder_path: str) -> str | None:
+        """Get the id of a folder.
+
+        Args:
+            tenant_key: The tenant_key of the GraphAccess the folder is fetched with.
+            user: The user who owns the folder.
+            folder_path: The absolute path of the folder.
+
+        Returns:
+            The id of the folder or None if the folder isn't cached or the entry has expired.
+        """
+        key = (tenant_key, user.lower(), folder_path)
+        with self._lock:
+            entry = self._folders.get(key)
+            if entry is None:
+                return None
+
+            folder_id, expiry = entry
+            if expiry < time.monotonic():
+                del self._folders[key]
+                return None
+
+            return folder_id
+
+    def set(self, tenant_key: str, user: str, folder_path: str, folder_id: str) -> None:
+        """Cache the id of a folder.
+
+        Args:
+            tenant_key: The tenant_key of the GraphAccess the folder is fetched with.
+            user: The user who owns the folder.
+            folder_path: The absolute path of the folder.
+            folder_id: The Graph id of the folder.
+        """
+        with self._lock:
+            self._folders[(tenant_key, user.lower(), folder_path)] = (folder_id, time.monotonic() + self.ttl)
+
+    def invalidate(self, tenant_key: str | None = None, user: str | None = None, folder_path: str | None = None) -> None:
+        """Remove entries from the cache.
+        If a folder path is given the folder and all its child folders are removed.
+
+        Args:
+            tenant_key: The tenant_key whose folders to remove. None to remove all tenants. Defaults to None.
+            user: The user whose folders to remove. None to remove all users. Defaults to None.
+            folder_path: The folder to remove. None to remove all folders of the user. Defaults to None.
+        """
+        with self._lock:
+            for key in list(self._folders):
+                cached_tenant_key, cached_user, cached_path = key
+                if tenant_key is not None and cached_tenant_key != tenant_key:
+                    continue
+                if user is not None and cached_user != user.lower():
+                    continue
+                if folder_path is not None and cached_path != folder_path and not cached_path.startswith(folder_path + "/"):
+                    continue
+                del self._folders[key]
+
+
+# The cache used by get_folder_id_from_path
+folder_cache = FolderCache()
+
+
+def get_emails_from_folder(user: str, folder_path: str, graph_access: GraphAccess, limit: int = 100, fields: Iterable[str] | None = None) -> tuple[Email]:
     """Get all emails from the specified user and folder.
     You need to authorize against Graph to get the GraphAccess before using this function
     see the graph.authentication module.
+    To go through a large number of emails use iter_emails instead.
 
     Args:
         user: The user who owns the folder.
         folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
         graph_access: The GraphAccess object used to authenticate.
-        limit: The maximum number of mails to fetch. Max 1000.
+        limit: The maximum number of mails to fetch.
+        fields: The fields of the Email objects to fetch. See iter_emails. Defaults to None.
 
     Returns:
         tuple[Email]: The emails from the given folder.
     """
-    if not 0 < limit <= 1000:
-        raise ValueError("Limit must be between 1 and 1000.")
+    if limit < 1:
+        raise ValueError("Limit must be at least 1.")
+
+    emails = iter_emails(user, folder_path, graph_access, page_size=min(limit, 1000), fields=fields)
+    return tuple(itertools.islice(emails, limit))
+
+
+def iter_emails(user: str, folder_path: str, graph_access: GraphAccess, *, page_size: int = 100,
+                filter: str | None = None, orderby: str | None = None, received_after: datetime | None = None,  # pylint: disable=redefined-builtin
+                unread_only: bool = False, has_attachments: bool | None = None, fields: Iterable[str] | None = None) -> Iterator[Email]:
+    """Iterate over all emails in the specified user and folder.
+    The emails are fetched lazily one page at a time by following Graph's pagination,
+    so there's no limit to the number of emails.
+
+    The filter arguments are combined and evaluated by Graph so only matching emails are transferred.
+    Note that Graph requires properties used in orderby to also be used in the filter in the same order.
+    See https://learn.microsoft.com/en-us/graph/api/user-list-messages for further documentation.
+
+    Use fields to only fetch some fields of the emails, e.g. ('sender', 'subject'), which can reduce the
+    amount of data transferred a lot. Fields that aren't fetched are None, except the body which
+    is fetched from Graph the first time it's accessed.
 
+    Args:
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+        graph_access: The GraphAccess object used to authenticate.
+        page_size: The number of emails to fetch per request. Max 1000. Defaults to 100.
+        filter: An OData filter expression e.g. "from/emailAddress/address eq 'test@test.dk'". Defaults to None.
+        orderby: An OData orderby expression e.g. 'receivedDateTime desc'. Defaults to None.
+        received_after: Only get emails received after this time. Naive datetimes are assumed to be local time. Defaults to None.
+        unread_only: Only get unread emails. Defaults to False.
+        has_attachments: Only get emails with (True) or without (False) attachments. Defaults to None.
+        fields: The fields of the Email objects to fetch. See EMAIL_FIELDS for possible values. None for all fields. Defaults to None.
+
+    Yields:
+        Email: The emails from the given folder.
+
+    Raises:
+        ValueError: If page_size isn't between 1 and 1000 or an unknown field is given.
+    """
+    if not 0 < page_size <= 1000:
+        raise ValueError("Page size must be between 1 and 1000.")
+
+    query_string = _create_message_query(page_size, filter, orderby, received_after, unread_only, has_attachments, fields)
     folder_id = get_folder_id_from_path(user, folder_path, graph_access)
+    endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders/{folder_id}/messages?{query_string}"
 
-    endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders/{folder_id}/messages?$top={limit}"
+    for email_raw in get_paginated(endpoint, graph_access):
+        yield unpack_email(user, email_raw, graph_access)
 
-    response = get_request(endpoint, graph_access)
-    emails_raw = response.json()['value']
 
-    return _unpack_email_response(user, emails_raw)
+def _create_message_query(page_size: int, filter_: str | None, orderby: str | None, received_after: datetime | None,
+                          unread_only: bool, has_attachments: bool | None, fields: Iterable[str] | None) -> str:
+    """Create the query string used to list messages.
+    See iter_emails for a description of the arguments.
+
+    Returns:
+        The query string without the leading '?'.
+    """
+    query = {"$top": page_size}
+
+    message_filter = _create_message_filter(filter_, received_after, unread_only, has_attachments)
+    if message_filter:
+        query["$filter"] = message_filter
+
+    if orderby:
+        query["$orderby"] = orderby
+
+    select = create_select(fields)
+    if select:
+        query["$select"] = select
+
+    return _create_query_string(query)
+
+
+def create_select(fields: Iterable[str] | None) -> str | None:
+    """Convert Email field names to a $select expression of Graph message properties.
+
+    Args:
+        fields: The fields of the Email class or None for all fields.
+
+    Returns:
+        The $select expression or None if all fields should be fetched.
+
+    Raises:
+        ValueError: If an unknown field is given.
+    """
+    if fields is None:
+        return None
+
+    fields = set(fields)
+    unknown_fields = fields - EMAIL_FIELDS.keys()
+    if unknown_fields:
+        raise ValueError(f"Unknown email fields: {unknown_fields}")
+
+    return ",".join(sorted({EMAIL_FIELDS[f] for f in fields}))
+
+
+def _create_message_filter(filter_: str | None, received_after: datetime | None, unread_only: bool, has_attachments: bool | None) -> str | None:
+    """Combine filter arguments to a single OData filter expression.
+    See iter_emails for a description of the arguments.
+
+    Returns:
+        The filter expression or None if no filters are given.
+    """
+    filters = []
+    if received_after:
+        filters.append(f"receivedDateTime gt {received_after.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}")
+    if unread_only:
+        filters.append("isRead eq false")
+    if has_attachments is not None:
+        filters.append(f"hasAttachments eq {str(has_attachments).lower()}")
+    if filter_:
+        filters.append(f"({filter_})")
+
+    return " and ".join(filters) or None
+
+
+def _create_query_string(query: dict) -> str:
+    """Create a URL query string from OData query options.
+    The values are URL encoded while the $ of the option names is kept.
+
+    Args:
+        query: A dictionary of query options and values e.g. {'$top': 10}.
+
+    Returns:
+        The query string without the leading '?'.
+    """
+    return "&".join(f"{key}={urllib.parse.quote(str(value))}" for key, value in query.items())
 
 
 def get_email_as_mime(email: Email, graph_access: GraphAccess) -> io.BytesIO:
@@ -94,15 +336,37 @@ def get_email_as_mime(email: Email, graph_access: GraphAccess) -> io.BytesIO:
     return io.BytesIO(data)
 
 
-def get_folder_id_from_path(user: str, folder_path: str, graph_access: GraphAccess) -> str:
+def download_email_as_mime(email: Email, graph_access: GraphAccess, destination: str | os.PathLike | BinaryIO, *, chunk_size: int = 1024 * 1024) -> int:
+    """Download an email in MIME format directly to a file or stream in chunks.
+    Unlike get_email_as_mime the email is never held in memory as a whole,
+    and the download is resumed if the connection drops.
+
+    Args:
+        email: The email to download.
+        graph_access: The GraphAccess object used to authenticate.
+        destination: A file path or a writable binary stream.
+        chunk_size: The number of bytes to read at a time. Defaults to 1 MiB.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0/users/{email.user}/messages/{email.id}/$value"
+    return stream_download(endpoint, graph_access, destination, chunk_size=chunk_size)
+
+
+def get_folder_id_from_path(user: str, folder_path: str, graph_access: GraphAccess, *, use_cache: bool = True) -> str:
     """Get the Graph id of a folder based on the path of the folder.
     You need to authorize against Graph to get the GraphAccess before using this function
     see the graph.authentication module.
 
+    Folder ids are cached in graph.mail.folder_cache so repeated lookups of the same path,
+    or paths under an already known folder, don't need to walk the folder tree from the top.
+
     Args:
         user: The user who owns the folder.
         folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
         graph_access: The GraphAccess object used to authenticate.
+        use_cache: Whether to use the folder cache. Defaults to True.
 
     Raises:
         ValueError: If a folder in the path can't be found.
@@ -110,25 +374,126 @@ def get_folder_id_from_path(user: str, folder_path: str, graph_access: GraphAcce
     Returns:
         str: The UUID of the folder in Graph.
     """
+    if not use_cache:
+        return _resolve_folder_path(user, folder_path, graph_access, None)
+
+    folder_id, depth = _find_cached_folder(graph_access.tenant_key, user, folder_path, folder_cache)
+
+    try:
+        return _resolve_folder_path(user, folder_path, graph_access, folder_cache, folder_id, depth)
+    except ValueError:
+        if depth == 0:
+            raise
+
+        # A cached folder might have been moved or deleted, so try again from the top
+        folder_cache.invalidate(graph_access.tenant_key, user)
+        return _resolve_folder_path(user, folder_path, graph_access, folder_cache)
+
+
+def prewarm_folder_cache(user: str, graph_access: GraphAccess) -> int:
+    """List the entire folder tree of a user and store the id of every folder in the folder cache.
+    After this get_folder_id_from_path doesn't need any requests for the user's folders.
+
+    Args:
+        user: The user whose folders to cache.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        int: The number of folders cached.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders?$top=100&$select=id,displayName,childFolderCount"
+    return _cache_folder_tree(user, endpoint, "", graph_access)
+
+
+def _cache_folder_tree(user: str, endpoint: str, parent_path: str, graph_access: GraphAccess) -> int:
+    """Recursively store the ids of all folders at the endpoint and their child folders in the folder cache.
+
+    Args:
+        user: The user who owns the folders.
+        endpoint: The Graph endpoint listing the folders.
+        parent_path: The path of the parent folder or an empty string for top level folders.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        int: The number of folders cached.
+    """
+    count = 0
+    for folder in get_paginated(endpoint, graph_access):
+        path = f"{parent_path}/{folder['displayName']}" if parent_path else folder['displayName']
+        folder_cache.set(graph_access.tenant_key, user, path, folder['id'])
+        count += 1
+
+        if folder.get('childFolderCount'):
+            child_endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders/{folder['id']}/childFolders?$top=100&$select=id,displayName,childFolderCount"
+            count += _cache_folder_tree(user, child_endpoint, path, graph_access)
+
+    return count
+
+
+def _find_cached_folder(tenant_key: str, user: str, folder_path: str, cache: FolderCache) -> tuple[str | None, int]:
+    """Find the deepest folder in a folder path that is in the cache.
+
+    Args:
+        tenant_key: The tenant_key of the GraphAccess the folder is fetched with.
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+        cache: The cache to look in.
+
+    Returns:
+        tuple[str | None, int]: The id of the deepest cached folder and its depth in the path or (None, 0).
+    """
     folders = folder_path.split("/")
-    main_folder = folders[0]
-    child_folders = folders[1:]
+    for i in range(len(folders), 0, -1):
+        folder_id = cache.get(tenant_key, user, "/".join(folders[:i]))
+        if folder_id:
+            return folder_id, i
 
-    folder_id = None
+    return None, 0
+
+
+# pylint: disable-next=too-many-arguments
+def _resolve_folder_path(user: str, folder_path: str, graph_access: GraphAccess, cache: FolderCache | None,
+                         folder_id: str | None = None, depth: int = 0) -> str:
+    """Find the Graph id of a folder by walking the folder tree.
+    The walk starts from the given folder or from the top if none is given.
+    If a cache is given all folders found are added to it.
+
+    Args:
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+        graph_access: The GraphAccess object used to authenticate.
+        cache: The cache to use or None.
+        folder_id: The id of a known folder in the path to start from. Defaults to None.
+        depth: The depth of the known folder in the path. Defaults to 0.
+
+    Raises:
+        ValueError: If a folder in the path can't be found.
+
+    Returns:
+        str: The UUID of the folder in Graph.
+    """
+    folders = folder_path.split("/")
+    main_folder = folders[0]
 
     # Get main folder
-    endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders"
-    response = get_request(endpoint, graph_access).json()
-    folder_id = _find_folder(response, main_folder)
     if folder_id is None:
-        raise ValueError(f"Top level folder '{main_folder}' was not found for user '{user}'.")
+        endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders"
+        folder_id = recursive_find_folder(endpoint, graph_access, main_folder)
+        if folder_id is None:
+            raise ValueError(f"Top level folder '{main_folder}' was not found for user '{user}'.")
+        depth = 1
+        if cache:
+            cache.set(graph_access.tenant_key, user, main_folder, folder_id)
 
     # Get child folders
-    for child_folder in child_folders:
+    for i in range(depth, len(folders)):
+        child_folder = folders[i]
         endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders/{folder_id}/childFolders"
         folder_id = recursive_find_folder(endpoint, graph_access, child_folder)
         if folder_id is None:
             raise ValueError(f"Child folder '{child_folder}' not found under '{main_folder}' for user '{user}'.")
+        if cache:
+            cache.set(graph_access.tenant_key, user, "/".join(folders[:i+1]), folder_id)
 
     return folder_id
 
@@ -191,6 +556,25 @@ def get_attachment_data(attachment: Attachment, graph_access: GraphAccess) -> io
     return io.BytesIO(data_bytes)
 
 
+def download_attachment(attachment: Attachment, graph_access: GraphAccess, destination: str | os.PathLike | BinaryIO, *, chunk_size: int = 1024 * 1024) -> int:
+    """Download an attachment directly to a file or stream in chunks.
+    Unlike get_attachment_data the attachment is never held in memory as a whole,
+    and the download is resumed if the connection drops.
+
+    Args:
+        attachment: The attachment to download.
+        graph_access: The GraphAccess object used to authenticate.
+        destination: A file path or a writable binary stream.
+        chunk_size: The number of bytes to read at a time. Defaults to 1 MiB.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    email = attachment.email
+    endpoint = f"https://graph.microsoft.com/v1.0/users/{email.user}/messages/{email.id}/attachments/{attachment.id}/$value"
+    return stream_download(endpoint, graph_access, destination, chunk_size=chunk_size)
+
+
 def move_email(email: Email, folder_path: str, graph_access: GraphAccess, *, well_known_folder: bool = False) -> None:
     """Move an email to another folder under the same user.
     If well_known_folder is true, the folder path is assumed to be a well defined folder.
@@ -210,23 +594,18 @@ def move_email(email: Email, folder_path: str, graph_access: GraphAccess, *, wel
 
     endpoint = f"https://graph.microsoft.com/v1.0/users/{email.user}/messages/{email.id}/move"
 
-    token = graph_access.get_access_token()
-    headers = {
-        'Authorization': f"Bearer {token}",
-        'Content-Type': "application/json"
-    }
-
-    body = {
-        'destinationId': folder_id
-    }
-
-    response = requests.post(
-        url=endpoint,
-        headers=headers,
-        json=body,
-        timeout=30
-    )
-    response.raise_for_status()
+    try:
+        response = post_request(endpoint, graph_access, {'destinationId': folder_id})
+    except HTTPError as e:
+        # The folder id might be stale if the folder has been deleted or recreated
+        if well_known_folder or e.response is None or e.response.status_code != 404:
+            raise
+
+        new_folder_id = _refresh_folder_id(email.user, folder_path, graph_access)
+        if new_folder_id == folder_id:
+            raise
+
+        response = post_request(endpoint, graph_access, {'destinationId': new_folder_id})
 
     new_id = response.json()['id']
     email.id = new_id
@@ -244,18 +623,254 @@ def delete_email(email: Email, graph_access: GraphAccess, *, permanent: bool = F
     """
     if permanent:
         endpoint = f"https://graph.microsoft.com/v1.0/users/{email.user}/messages/{email.id}"
+        delete_request(endpoint, graph_access)
+    else:
+        move_email(email, "deleteditems", graph_access, well_known_folder=True)
+
+
+def move_emails(emails: list[Email], folder_path: str, graph_access: GraphAccess, *, well_known_folder: bool = False) -> tuple[BatchResponse]:
+    """Move a number of emails to another folder under the same user.
+    The moves are sent using json batching with up to 20 moves per request.
+    The ids of the moved emails are updated on the Email objects.
+    If well_known_folder is true, the folder path is assumed to be a well defined folder.
+
+    Args:
+        emails: The emails to move. All emails must belong to the same user.
+        folder_path: The absolute path to the new folder. E.g. 'Inbox/Economy/May'
+        graph_access: The GraphAccess object used to authenticate.
+        well_known_folder: Whether the path is a 'well known folder'. Defaults to False.
+
+    Returns:
+        tuple[BatchResponse]: A response for each email in the same order as the emails.
+
+    Raises:
+        ValueError: If the emails belong to different users.
+    """
+    if not emails:
+        return ()
 
-        token = graph_access.get_access_token()
-        headers = {'Authorization': f"Bearer {token}"}
+    user = _get_common_user(emails)
 
-        response = requests.delete(
-            url=endpoint,
-            headers=headers,
-            timeout=30
-        )
-        response.raise_for_status()
+    if well_known_folder:
+        folder_id = folder_path
     else:
-        move_email(email, "deleteditems", graph_access, well_known_folder=True)
+        folder_id = get_folder_id_from_path(user, folder_path, graph_access)
+
+    responses = _batch_move(emails, folder_id, graph_access)
+
+    # The folder id might be stale if the folder has been deleted or recreated
+    not_found = [i for i, r in enumerate(responses) if r.status == 404]
+    if not_found and not well_known_folder:
+        new_folder_id = _refresh_folder_id(user, folder_path, graph_access)
+        if new_folder_id != folder_id:
+            retry_responses = _batch_move([emails[i] for i in not_found], new_folder_id, graph_access)
+            for i, response in zip(not_found, retry_responses):
+                responses[i] = response
+
+    return tuple(responses)
+
+
+def _batch_move(emails: list[Email], folder_id: str, graph_access: GraphAccess) -> list[BatchResponse]:
+    """Move emails to a folder using json batching and update the ids of the moved emails.
+
+    Args:
+        emails: The emails to move.
+        folder_id: The id of the destination folder.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        list[BatchResponse]: A response for each email in the same order as the emails.
+    """
+    requests_ = [
+        {
+            "method": "POST",
+            "url": f"/users/{email.user}/messages/{email.id}/move",
+            "body": {"destinationId": folder_id}
+        } for email in emails
+    ]
+    responses = batch_request(requests_, graph_access)
+
+    for email, response in zip(emails, responses):
+        if response.ok:
+            email.id = response.body['id']
+
+    return responses
+
+
+def _refresh_folder_id(user: str, folder_path: str, graph_access: GraphAccess) -> str:
+    """Remove a folder from the folder cache and look up its id again.
+
+    Args:
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        str: The UUID of the folder in Graph.
+    """
+    folder_cache.invalidate(graph_access.tenant_key, user, folder_path)
+    return get_folder_id_from_path(user, folder_path, graph_access)
+
+
+def delete_emails(emails: list[Email], graph_access: GraphAccess, *, permanent: bool = False) -> tuple[BatchResponse]:
+    """Delete a number of emails using json batching with up to 20 deletions per request.
+    If permanent is true the emails are completely removed from the user's mailbox.
+    If permanent is false the emails are instead moved to the Deleted Items folder.
+
+    Args:
+        emails: The emails to delete.
+        graph_access: The GraphAccess object used to authenticate.
+        permanent: Whether to permanently remove the emails or not. Defaults to False.
+
+    Returns:
+        tuple[BatchResponse]: A response for each email in the same order as the emails.
+    """
+    if not permanent:
+        return move_emails(emails, "deleteditems", graph_access, well_known_folder=True)
+
+    requests_ = [
+        {
+            "method": "DELETE",
+            "url": f"/users/{email.user}/messages/{email.id}"
+        } for email in emails
+    ]
+    return tuple(batch_request(requests_, graph_access))
+
+
+def list_attachments_bulk(emails: list[Email], graph_access: GraphAccess) -> tuple[tuple[Attachment]]:
+    """List the attachments of a number of emails using json batching.
+    This function only gets the id, name and size of the attachments.
+    Use get_attachment_data to get the actual data of an attachment.
+
+    Args:
+        emails: The emails which attachments to list.
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        tuple[tuple[Attachment]]: A tuple of attachments for each email in the same order as the emails.
+
+    Raises:
+        HTTPError: If the attachments of an email couldn't be listed.
+    """
+    requests_ = [
+        {
+            "method": "GET",
+            "url": f"/users/{email.user}/messages/{email.id}/attachments?$select=name,size,id"
+        } for email in emails
+    ]
+    responses = batch_request(requests_, graph_access)
+
+    result = []
+    for email, response in zip(emails, responses):
+        if not response.ok:
+            raise HTTPError(f"Attachments of email '{email.subject}' couldn't be listed: {response.error_message}")
+
+        result.append(tuple(Attachment(email, att['id'], att['name'], att['size']) for att in response.body['value']))
+
+    return tuple(result)
+
+
+def fetch_attachments(emails: Iterable[Email], destination_folder: str, graph_access: GraphAccess, *, max_workers: int = 4) -> Iterator[tuple[Attachment, str]]:
+    """Download the attachments of a number of emails to a folder concurrently.
+    Attachments are listed in batches of 20 emails and downloaded as soon as they're listed,
+    and each attachment is yielded as soon as its download is done, so processing can start
+    before all attachments are fetched. The number of concurrent requests to each mailbox
+    is limited by the GraphClient.
+
+    Emails where has_attachments is False are skipped. Files are named after the attachments
+    and a number is added to the name if a file with the same name already exists.
+
+    Args:
+        emails: The emails whose attachments to download.
+        destination_folder: The folder to save the attachments in.
+        graph_access: The GraphAccess object used to authenticate.
+        max_workers: The maximum number of concurrent requests. Defaults to 4.
+
+    Yields:
+        tuple[Attachment, str]: Each attachment and the path of the downloaded file.
+
+    Raises:
+        HTTPError: If an attachment couldn't be listed or downloaded.
+    """
+    emails = [email for email in emails if email.has_attachments is not False]
+    used_paths = set()
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        listings = {executor.submit(list_attachments_bulk, emails[i:i+20], graph_access) for i in range(0, len(emails), 20)}
+        pending = set(listings)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in listings:
+                    yield future.result()
+                    continue
+
+                for attachments in future.result():
+                    for attachment in attachments:
+                        path = _get_unique_path(destination_folder, attachment.name, used_paths)
+                        pending.add(executor.submit(_download_attachment_to_path, attachment, graph_access, path))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _download_attachment_to_path(attachment: Attachment, graph_access: GraphAccess, path: str) -> tuple[Attachment, str]:
+    """Download an attachment to a file path.
+
+    Args:
+        attachment: The attachment to download.
+        graph_access: The GraphAccess object used to authenticate.
+        path: The path to save the attachment at.
+
+    Returns:
+        tuple[Attachment, str]: The attachment and the path.
+    """
+    download_attachment(attachment, graph_access, path)
+    return attachment, path
+
+
+def _get_unique_path(folder: str, file_name: str, used_paths: set[str]) -> str:
+    """Get a path in a folder for a file name that isn't in use.
+    Characters that aren't allowed in file names are replaced with underscores.
+
+    Args:
+        folder: The folder of the file.
+        file_name: The desired file name.
+        used_paths: Paths already assigned to other files. The new path is added to the set.
+
+    Returns:
+        str: A path that doesn't exist and isn't in used_paths.
+    """
+    file_name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "_", file_name).strip() or "attachment"
+    name, ext = os.path.splitext(file_name)
+
+    path = os.path.join(folder, file_name)
+    i = 1
+    while path in used_paths or os.path.exists(path):
+        path = os.path.join(folder, f"{name} ({i}){ext}")
+        i += 1
+
+    used_paths.add(path)
+    return path
+
+
+def _get_common_user(emails: list[Email]) -> str:
+    """Get the user that owns all the given emails.
+
+    Args:
+        emails: The emails to check.
+
+    Returns:
+        str: The user that owns the emails.
+
+    Raises:
+        ValueError: If the emails belong to different users.
+    """
+    users = {email.user.lower() for email in emails}
+    if len(users) > 1:
+        raise ValueError(f"All emails must belong to the same user. Found: {users}")
+    return emails[0].user
 
 
 def _find_folder(response: dict, target_folder: str) -> str:
@@ -274,40 +889,42 @@ def _find_folder(response: dict, target_folder: str) -> str:
     return None
 
 
-def _unpack_email_response(user: str, emails_raw: list[dict[str, str]]) -> tuple[Email]:
-    """Unpack a json HTTP response and create a list of Email objects.
+def unpack_email(user: str, email: dict, graph_access: GraphAccess | None = None) -> Email:
+    """Create an Email object from the json dictionary of a single email.
+    Properties missing from the dictionary are set to None. If the body is missing
+    and a GraphAccess is given, the body is loaded on first access.
 
     Args:
-        user: The user who owns the email folder.
-        json: The json dictionary created by response.json().
+        user: The user who owns the email.
+        email: The json dictionary describing the email.
+        graph_access: The GraphAccess object used to load the body later. Defaults to None.
 
     Returns:
-        tuple[Email]: A tuple of Email objects.
+        Email: The Email object.
     """
-    emails = []
-
-    for email in emails_raw:
-        mail_id = email['id']
-        received_time = email['receivedDateTime']
-        sender = email['from']['emailAddress']['address']
-        receivers = [r['emailAddress']['address'] for r in email['toRecipients']]
-        subject = email['subject']
+    mail_id = email['id']
+    received_time = email.get('receivedDateTime')
+    sender = email['from']['emailAddress']['address'] if 'from' in email else None
+    receivers = [r['emailAddress']['address'] for r in email['toRecipients']] if 'toRecipients' in email else None
+    subject = email.get('subject')
+    has_attachments = email.get('hasAttachments')
+
+    if 'body' in email:
         body = email['body']['content']
         body_type = email['body']['contentType']
-        has_attachments = email['hasAttachments']
-
-        emails.append(
-            Email(
-                user,
-                mail_id,
-                received_time,
-                sender,
-                receivers,
-                subject,
-                body,
-                body_type,
-                has_attachments
-            )
-        )
-
-    return tuple(emails)
+    else:
+        body = _NOT_LOADED if graph_access else None
+        body_type = None
+
+    return Email(
+        user,
+        mail_id,
+        received_time,
+        sender,
+        receivers,
+        subject,
+        body,
+        body_type,
+        has_attachments,
+        graph_access
+    )
@@ -0,0 +1,227 @@
+"""This module is responsible for using a mail folder as a work queue shared by several workers.
+A worker claims an email by moving it to its own processing folder. Moving an email is atomic in Graph,
+so only one worker can succeed and no email is processed twice.
+"""
+
+from dataclasses import dataclass, field
+import itertools
+import random
+import threading
+from typing import Callable, Iterable
+
+from requests import HTTPError
+
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph.common import post_request
+from itk_dev_shared_components.graph import mail
+from itk_dev_shared_components.graph.mail import Email
+
+
+@dataclass
+class QueueResult:
+    """A dataclass representing the result of processing emails from a MailQueue."""
+    done: list[Email] = field(default_factory=list)
+    failed: list[tuple[Email, Exception]] = field(default_factory=list)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class MailQueue:
+    """A work queue of the emails in a mail folder.
+
+    Each worker creates a MailQueue with a unique worker id, e.g. the name of the machine.
+    Claimed emails are moved to the worker's processing folder, and when they've been processed
+    they're moved to the done or failed folder. Missing folders are created on first use.
+
+    If a worker stops while processing, its claimed emails stay in its processing folder
+    until it calls recover.
+    """
+    def __init__(self, user: str, folder_path: str, graph_access: GraphAccess, worker_id: str, *,
+                 processing_folder: str | None = None, done_folder: str | None = None, failed_folder: str | None = None,
+                 fields: Iterable[str] | None = None) -> None:
+        """Create a new MailQueue.
+
+        Args:
+            user: The user who owns the folders.
+            folder_path: The absolute path of the queue folder e.g. 'Inbox/Queue'
+            graph_access: The GraphAccess object used to authenticate.
+            worker_id: The unique id of this worker.
+            processing_folder: The path of this worker's processing folder. Defaults to '<folder_path>/Processing/<worker_id>'.
+            done_folder: The path of the folder of processed emails. Defaults to '<folder_path>/Done'.
+            failed_folder: The path of the folder of emails that failed. Defaults to '<folder_path>/Failed'.
+            fields: The fields of the Email objects to fetch. See mail.iter_emails. Defaults to None.
+        """
+        self.user = user
+        self.folder_path = folder_path
+        self.graph_access = graph_access
+        self.worker_id = worker_id
+        self.processing_folder = processing_folder or f"{folder_path}/Processing/{worker_id}"
+        self.done_folder = done_folder or f"{folder_path}/Done"
+        self.failed_folder = failed_folder or f"{folder_path}/Failed"
+        self.fields = fields
+
+        self._folder_ids: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, limit: int = 1) -> list[Email]:
+        """Claim up to a number of emails from the queue by moving them to the processing folder.
+        Emails another worker claims first are skipped.
+
+        The oldest emails are claimed first, but the order is shuffled within
+        a window of candidates so workers don't all race for the same emails.
+
+        Args:
+            limit: The maximum number of emails to claim. Defaults to 1.
+
+        Returns:
+            The claimed emails with their ids updated. Empty if the queue is empty.
+
+        Raises:
+            ValueError: If limit is less than 1.
+        """
+        if limit < 1:
+            raise ValueError("Limit must be at least 1.")
+
+        processing_id = self._get_folder_id(self.processing_folder)
+        emails = mail.iter_emails(self.user, self.folder_path, self.graph_access, page_size=min(limit * 4, 1000),
+                                  orderby="receivedDateTime", fields=self.fields)
+        candidates = list(itertools.islice(emails, limit * 4))
+        random.shuffle(candidates)
+
+        claimed = []
+        for email in candidates:
+            if self._try_move(email, processing_id):
+                claimed.append(email)
+                if len(claimed) == limit:
+                    break
+
+        return claimed
+
+    def complete(self, email: Email) -> None:
+        """Move a claimed email to the done folder.
+
+        Args:
+            email: The email to move.
+        """
+        mail.move_email(email, self._get_folder_id(self.done_folder), self.graph_access, well_known_folder=True)
+
+    def fail(self, email: Email) -> None:
+        """Move a claimed email to the failed folder.
+
+        Args:
+            email: The email to move.
+        """
+        mail.move_email(email, self._get_folder_id(self.failed_folder), self.graph_access, well_known_folder=True)
+
+    def recover(self) -> int:
+        """Move all emails in this worker's processing folder back to the queue,
+        e.g. after the worker was stopped while processing.
+
+        Returns:
+            The number of emails moved back.
+        """
+        self._get_folder_id(self.processing_folder)
+        emails = list(mail.iter_emails(self.user, self.processing_folder, self.graph_access, fields=("subject",)))
+        if emails:
+            mail.move_emails(emails, self._get_folder_id(self.folder_path), self.graph_access, well_known_folder=True)
+        return len(emails)
+
+    def process(self, handler: Callable[[Email], None], *, limit: int | None = None, batch_size: int = 10) -> QueueResult:
+        """Claim and process emails until the queue is empty or the limit is reached.
+        Emails are moved to the done folder if the handler returns
+        and to the failed folder if it raises an exception.
+
+        Args:
+            handler: A function that processes a single email.
+            limit: The maximum number of emails to process. None for no limit. Defaults to None.
+            batch_size: The number of emails to claim at a time. Defaults to 10.
+
+        Returns:
+            QueueResult: The emails that were processed and those that failed with their exception.
+        """
+        result = QueueResult()
+
+        while limit is None or len(result.done) + len(result.failed) < limit:
+            count = batch_size if limit is None else min(batch_size, limit - len(result.done) - len(result.failed))
+            emails = self.claim(count)
+            if not emails:
+                break
+
+            for email in emails:
+                try:
+                    handler(email)
+                except Exception as exc:  # pylint: disable=broad-exception-caught
+                    self.fail(email)
+                    result.failed.append((email, exc))
+                else:
+                    self.complete(email)
+                    result.done.append(email)
+
+        return result
+
+    def _try_move(self, email: Email, folder_id: str) -> bool:
+        """Move an email to a folder unless another worker has already moved it.
+
+        Args:
+            email: The email to move.
+            folder_id: The id of the folder.
+
+        Returns:
+            True if the email was moved, False if it's no longer in the queue.
+        """
+        try:
+            mail.move_email(email, folder_id, self.graph_access, well_known_folder=True)
+        except HTTPError as e:
+            # The email has already been moved by another worker
+            if e.response is not None and e.response.status_code == 404:
+                return False
+            raise
+        return True
+
+    def _get_folder_id(self, folder_path: str) -> str:
+        """Get the id of a folder, creating the folder if it doesn't exist.
+
+        Args:
+            folder_path: The absolute path of the folder.
+
+        Returns:
+            The id of the folder.
+        """
+        with self._lock:
+            if folder_path not in self._folder_ids:
+                self._folder_ids[folder_path] = _get_or_create_folder(self.user, folder_path, self.graph_access)
+            return self._folder_ids[folder_path]
+
+
+def _get_or_create_folder(user: str, folder_path: str, graph_access: GraphAccess) -> str:
+    """Get the id of a mail folder, creating it and any missing parent folders if it doesn't exist.
+
+    Args:
+        user: The user who owns the folder.
+        folder_path: The absolute path of the folder e.g. 'Inbox/Queue/Done'
+        graph_access: The GraphAccess object used to authenticate.
+
+    Returns:
+        The id of the folder.
+    """
+    try:
+        return mail.get_folder_id_from_path(user, folder_path, graph_access)
+    except ValueError:
+        pass
+
+    parent_path, _, name = folder_path.rpartition("/")
+    if parent_path:
+        parent_id = _get_or_create_folder(user, parent_path, graph_access)
+        endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders/{parent_id}/childFolders"
+    else:
+        endpoint = f"https://graph.microsoft.com/v1.0/users/{user}/mailFolders"
+
+    try:
+        folder_id = post_request(endpoint, graph_access, {"displayName": name}).json()['id']
+    except HTTPError as e:
+        # Another worker created the folder at the same time
+        if e.response is None or e.response.status_code != 409:
+            raise
+        return mail.get_folder_id_from_path(user, folder_path, graph_access, use_cache=False)
+
+    mail.folder_cache.set(graph_access.tenant_key, user, folder_path, folder_id)
+    return folder_id
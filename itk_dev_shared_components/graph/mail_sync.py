@@ -0,0 +1,197 @@
+"""This module is responsible for incrementally syncing mail folders using Graph delta queries.
+See https://learn.microsoft.com/en-us/graph/delta-query-messages for further documentation.
+"""
+
+from dataclasses import dataclass
+import sqlite3
+from typing import Iterable, Iterator
+
+from requests import HTTPError
+
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph.common import get_client
+from itk_dev_shared_components.graph.mail import Email, get_folder_id_from_path, create_select, unpack_email
+
+
+@dataclass
+class SyncResult:
+    """A dataclass representing the changes in a mail folder since the last sync."""
+    new: tuple[Email]
+    changed: tuple[Email]
+    removed: tuple[str]
+
+
+class MailboxSync:
+    """Keeps track of the emails in a mail folder between runs.
+    Each call to sync only returns emails that are new, changed or removed since the last call.
+    The state is stored in a SQLite database file so it persists between runs,
+    and one file can hold the state of many folders.
+
+    The first sync of a folder returns all emails in the folder as new.
+    """
+    def __init__(self, user: str, folder_path: str, graph_access: GraphAccess, state_path: str,
+                 *, fields: Iterable[str] | None = None, page_size: int = 100) -> None:
+        """Create a new MailboxSync.
+
+        Args:
+            user: The user who owns the folder.
+            folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+            graph_access: The GraphAccess object used to authenticate.
+            state_path: The path of the SQLite database file used to store the state.
+            fields: The fields of the Email objects to fetch. See mail.iter_emails. Defaults to None.
+            page_size: The maximum number of emails to fetch per request. Defaults to 100.
+        """
+        self.user = user
+        self.folder_path = folder_path
+        self.graph_access = graph_access
+        self.state_path = state_path
+        self.page_size = page_size
+        self._select = create_select(fields)
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS delta_links (user TEXT, folder_path TEXT, delta_link TEXT, PRIMARY KEY (user, folder_path))")
+            connection.execute("CREATE TABLE IF NOT EXISTS messages (user TEXT, folder_path TEXT, message_id TEXT, PRIMARY KEY (user, folder_path, message_id))")
+        connection.close()
+
+    def sync(self) -> SyncResult:
+        """Get the changes in the folder since the last sync and store the new state.
+        If Graph has expired the stored state a full sync is made.
+
+        Returns:
+            SyncResult: The new, changed and removed emails.
+        """
+        new, changed, removed = [], [], []
+        for page in self.iter_sync():
+            new.extend(page.new)
+            changed.extend(page.changed)
+            removed.extend(page.removed)
+
+        return SyncResult(new=tuple(new), changed=tuple(changed), removed=tuple(removed))
+
+    def iter_sync(self) -> Iterator[SyncResult]:
+        """Get the changes in the folder since the last sync one page at a time,
+        so a large folder is never held in memory as a whole.
+        The state of a page is stored when the next page is asked for. If the iteration is stopped,
+        the next sync continues with the last page that wasn't handled, so each change is returned at least once.
+        If Graph has expired the stored state a full sync is made.
+
+        Yields:
+            SyncResult: The new, changed and removed emails of a page of changes.
+        """
+        connection = self._connect()
+        try:
+            link = self._get_delta_link(connection)
+
+            while True:
+                try:
+                    page = self._fetch_page(link)
+                except HTTPError as e:
+                    # Graph returns 410 Gone when the delta link has expired
+                    if link is None or e.response is None or e.response.status_code != 410:
+                        raise
+                    self._clear_state(connection)
+                    connection.commit()
+                    link = None
+                    continue
+
+                # The next link is stored until the last page, so a stopped sync can continue from it
+                link = page.get('@odata.nextLink') or page['@odata.deltaLink']
+                yield self._apply_changes(connection, page['value'], link)
+                connection.commit()
+
+                if '@odata.nextLink' not in page:
+                    return
+        finally:
+            connection.close()
+
+    def reset(self) -> None:
+        """Remove the stored state of the folder so the next sync is a full sync."""
+        connection = self._connect()
+        try:
+            self._clear_state(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the state database.
+
+        Returns:
+            The database connection.
+        """
+        return sqlite3.connect(self.state_path)
+
+    def _get_delta_link(self, connection: sqlite3.Connection) -> str | None:
+        """Get the stored delta link of the folder.
+
+        Args:
+            connection: The database connection.
+
+        Returns:
+            The delta link, or the next link of a stopped sync, or None if the folder hasn't been synced before.
+        """
+        row = connection.execute("SELECT delta_link FROM delta_links WHERE user = ? AND folder_path = ?", (self.user.lower(), self.folder_path)).fetchone()
+        return row[0] if row else None
+
+    def _clear_state(self, connection: sqlite3.Connection) -> None:
+        """Remove the stored delta link and known message ids of the folder.
+
+        Args:
+            connection: The database connection.
+        """
+        key = (self.user.lower(), self.folder_path)
+        connection.execute("DELETE FROM delta_links WHERE user = ? AND folder_path = ?", key)
+        connection.execute("DELETE FROM messages WHERE user = ? AND folder_path = ?", key)
+
+    def _fetch_page(self, link: str | None) -> dict:
+        """Fetch a page of changes from Graph.
+
+        Args:
+            link: The next link or delta link to fetch or None to start a full sync.
+
+        Returns:
+            The json dictionary of the page.
+        """
+        if link:
+            endpoint = link
+        else:
+            folder_id = get_folder_id_from_path(self.user, self.folder_path, self.graph_access)
+            endpoint = f"https://graph.microsoft.com/v1.0/users/{self.user}/mailFolders/{folder_id}/messages/delta"
+            if self._select:
+                endpoint += f"?$select={self._select}"
+
+        headers = {"Prefer": f"odata.maxpagesize={self.page_size}"}
+        return get_client(self.graph_access).request("GET", endpoint, headers=headers).json()
+
+    def _apply_changes(self, connection: sqlite3.Connection, items: list[dict], delta_link: str) -> SyncResult:
+        """Sort the changed messages into new, changed and removed emails
+        and store the new state in the database.
+
+        Args:
+            connection: The database connection.
+            items: The changed messages as json dictionaries.
+            delta_link: The link to continue the sync from.
+
+        Returns:
+            SyncResult: The new, changed and removed emails.
+        """
+        user, folder_path = self.user.lower(), self.folder_path
+        new, changed, removed = [], [], []
+
+        for item in items:
+            message_id = item['id']
+            known = connection.execute("SELECT 1 FROM messages WHERE user = ? AND folder_path = ? AND message_id = ?", (user, folder_path, message_id)).fetchone()
+
+            if '@removed' in item:
+                if known:
+                    connection.execute("DELETE FROM messages WHERE user = ? AND folder_path = ? AND message_id = ?", (user, folder_path, message_id))
+                    removed.append(message_id)
+            elif known:
+                changed.append(unpack_email(self.user, item, self.graph_access))
+            else:
+                connection.execute("INSERT INTO messages VALUES (?, ?, ?)", (user, folder_path, message_id))
+                new.append(unpack_email(self.user, item, self.graph_access))
+
+        connection.execute("INSERT OR REPLACE INTO delta_links VALUES (?, ?, ?)", (user, folder_path, delta_link))
+
+        return SyncResult(new=tuple(new), changed=tuple(changed), removed=tuple(removed))
@@ -0,0 +1,188 @@
+"""This module contains a cache of site and drive item metadata, so paths that rarely change
+don't have to be resolved against Graph on every run.
+The cache is shared by all GraphAccess objects, so the keys include the tenant and client id of the access.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class MetadataCache:
+    """A thread safe cache of json metadata from Graph by key.
+    Entries expire after ttl seconds.
+
+    If a path is given the entries are also stored in a SQLite database file,
+    so they survive between runs. Entries are then read from memory first
+    and only read from the file the first time they're used in a run.
+    """
+    def __init__(self, ttl: float = 3600, path: str | None = None) -> None:
+        """Create a new MetadataCache.
+
+        Args:
+            ttl: The number of seconds entries are valid. Defaults to 3600.
+            path: The path of a SQLite database file to store the entries in. Defaults to None.
+        """
+        self.ttl = ttl
+        self.path = path
+        # Expiry times are wall clock times so they can be stored in the file
+        self._entries: dict[str, tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+
+        if path:
+            with self._connect() as connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT, expiry REAL)")
+            connection.close()
+
+    def get(self, key: str) -> dict | None:
+        """Get an entry.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The cached json dictionary or None if the entry isn't cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None and self.path:
+            entry = self._read(key)
+            if entry:
+                with self._lock:
+                    self._entries[key] = entry
+
+        if entry is None:
+            return None
+
+        value, expiry = entry
+        if expiry < time.time():
+            self.invalidate(key)
+            return None
+
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        """Cache an entry.
+
+        Args:
+            key: The key of the entry.
+            value: The json dictionary to cache.
+        """
+        entry = (value, time.time() + self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+
+        if self.path:
+            connection = self._connect()
+            try:
+                connection.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)", (key, json.dumps(value), entry[1]))
+                connection.commit()
+            finally:
+                connection.close()
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Remove entries from the cache.
+
+        Args:
+            key: The key of the entry to remove. None to remove all entries. Defaults to None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+        if self.path:
+            connection = self._connect()
+            try:
+                if key is None:
+                    connection.execute("DELETE FROM metadata")
+                else:
+                    connection.execute("DELETE FROM metadata WHERE key = ?", (key,))
+                connection.commit()
+            finally:
+                connection.close()
+
+    def _read(self, key: str) -> tuple[dict, float] | None:
+        """Read an entry from the database file.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The json dictionary and expiry time of the entry or None if it isn't in the file.
+        """
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT value, expiry FROM metadata WHERE key = ?", (key,)).fetchone()
+        finally:
+            connection.close()
+
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database file.
+
+        Returns:
+            The database connection.
+        """
+        return sqlite3.connect(self.path)
+
+
+_metadata_cache = MetadataCache()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Get the cache used by site.get_site and file.get_drive_item.
+
+    Returns:
+        The MetadataCache.
+    """
+    return _metadata_cache
+
+
+def configure_metadata_cache(ttl: float = 3600, path: str | None = None) -> MetadataCache:
+    """Replace the cache used by site.get_site and file.get_drive_item
+    with a new cache with the given settings. See MetadataCache.
+
+    Args:
+        ttl: The number of seconds entries are valid. Defaults to 3600.
+        path: The path of a SQLite database file to store the entries in. Defaults to None.
+
+    Returns:
+        The new MetadataCache.
+    """
+    global _metadata_cache  # pylint: disable=global-statement
+    _metadata_cache = MetadataCache(ttl, path)
+    return _metadata_cache
+
+
+def site_key(tenant_key: str, site_path: str) -> str:
+    """Get the cache key of a site.
+
+    Args:
+        tenant_key: The tenant_key of the GraphAccess the site is fetched with.
+        site_path: The path of the site.
+
+    Returns:
+        The cache key.
+    """
+    return f"site:{tenant_key}:{site_path.lower()}"
+
+
+def drive_item_key(tenant_key: str, site_id: str, drive_item_path: str) -> str:
+    """Get the cache key of a drive item.
+
+    Args:
+        tenant_key: The tenant_key of the GraphAccess the drive item is fetched with.
+        site_id: The id of the site.
+        drive_item_path: The path of the drive item.
+
+    Returns:
+        The cache key.
+    """
+    return f"drive_item:{tenant_key}:{site_id}:{drive_item_path.strip('/').lower()}"
@@ -1,9 +1,25 @@
 """This module is responsible for accessing sites using the Microsoft Graph API."""
 
 from dataclasses import dataclass, field
+import base64
+import hashlib
+import io
+import os
+from typing import BinaryIO, Callable
+
+import requests
 
 from itk_dev_shared_components.graph.authentication import GraphAccess
-from itk_dev_shared_components.graph.common import get_request, put_request
+from itk_dev_shared_components.graph.common import GraphClient, get_client, get_request, put_request, post_request, stream_download
+from itk_dev_shared_components.graph.file import DriveItem, QuickXorHash, get_drive_item, _unpack_drive_item_response
+from itk_dev_shared_components.graph.metadata_cache import get_metadata_cache, site_key, drive_item_key
+
+
+# Files larger than this are uploaded in chunks using an upload session
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+
+# The size of upload session chunks must be a multiple of this
+UPLOAD_CHUNK_MULTIPLE = 320 * 1024
 
 
 @dataclass
@@ -19,7 +35,18 @@ class Site:
     last_modified: str
 
 
-def get_site(graph_access: GraphAccess, site_path: str) -> Site:
+@dataclass
+class UploadSession:
+    """A class representing a resumable upload session.
+    Store the upload url to resume the upload later, e.g. after the process has crashed.
+    The session expires if no data has been uploaded for a while.
+    """
+
+    upload_url: str = field(repr=False)
+    expiration: str
+
+
+def get_site(graph_access: GraphAccess, site_path: str, *, use_cache: bool = True) -> Site:
     """Retrieve properties and relationships for a site resource.
     A site resource represents a team site in SharePoint.
 
@@ -29,17 +56,26 @@ def get_site(graph_access: GraphAccess, site_path: str) -> Site:
     See https://learn.microsoft.com/en-us/graph/api/site-get?view=graph-rest-1.0
     for a list of possible site_paths to pass as argument.
 
+    Sites are cached by path, see the graph.metadata_cache module.
+
     Args:
         graph_access: The GraphAccess object used to authenticate.
         site_path: The path to the team site in SharePoint.
+        use_cache: Whether to use the cached site if there is one. Defaults to True.
 
     returns:
         A Site object
     """
-    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_path}"
-    response = get_request(endpoint, graph_access)
+    cache = get_metadata_cache()
+    key = site_key(graph_access.tenant_key, site_path)
+
+    site_raw = cache.get(key) if use_cache else None
+    if site_raw is None:
+        endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_path}"
+        site_raw = get_request(endpoint, graph_access).json()
+        cache.set(key, site_raw)
 
-    return _unpack_site_response(response.json())
+    return _unpack_site_response(site_raw)
 
 
 def download_file_contents(graph_access: GraphAccess, site_id: str, drive_item_id: str) -> bytes:
@@ -50,6 +86,8 @@ def download_file_contents(graph_access: GraphAccess, site_id: str, drive_item_i
 
     See https://learn.microsoft.com/en-us/graph/api/driveitem-get-content for further documentation
 
+    The whole file is loaded into memory. Use download_file for large files.
+
     Args:
         graph_access: The GraphAccess object used to authenticate.
         site_id: The id of the site in SharePoint.
@@ -63,6 +101,114 @@ def download_file_contents(graph_access: GraphAccess, site_id: str, drive_item_i
     return response.content
 
 
+def download_file(graph_access: GraphAccess, site_id: str, drive_item_id: str, destination: str | os.PathLike | BinaryIO, *,
+                  chunk_size: int = 1024 * 1024, max_resumes: int = 5, verify_checksum: bool = False) -> int:
+    """Download a file from a site directly to a file or stream in chunks,
+    so the file is never held in memory as a whole.
+    If the connection drops, the download is resumed using a HTTP Range request.
+
+    You need to authorize against Graph to get the GraphAccess before using this function
+    see the graph.authentication module.
+
+    See https://learn.microsoft.com/en-us/graph/api/driveitem-get-content for further documentation
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_id: The id of the DriveItem in SharePoint.
+        destination: A file path or a writable binary stream.
+        chunk_size: The number of bytes to read at a time. Defaults to 1 MiB.
+        max_resumes: The maximum number of times to resume after a dropped connection. Defaults to 5.
+        verify_checksum: Whether to check the downloaded data against the hash SharePoint has of the file. Defaults to False.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        HTTPError: Any errors raised while performing the requests.
+        ConnectionError: If the connection dropped more than max_resumes times.
+        ValueError: If verify_checksum is True and the file has no hash or the downloaded data doesn't match it.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{drive_item_id}/content"
+
+    if not verify_checksum:
+        return stream_download(endpoint, graph_access, destination, chunk_size=chunk_size, max_resumes=max_resumes)
+
+    hash_factory, expected_digest = _get_file_hash(graph_access, site_id, drive_item_id)
+
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, 'wb') as file:
+            writer = _HashingWriter(file, hash_factory)
+            written = stream_download(endpoint, graph_access, writer, chunk_size=chunk_size, max_resumes=max_resumes)
+    else:
+        writer = _HashingWriter(destination, hash_factory)
+        written = stream_download(endpoint, graph_access, writer, chunk_size=chunk_size, max_resumes=max_resumes)
+
+    if writer.hash.digest() != expected_digest:
+        raise ValueError(f"The downloaded file doesn't match its {writer.hash.name} checksum.")
+
+    return written
+
+
+def _get_file_hash(graph_access: GraphAccess, site_id: str, drive_item_id: str) -> tuple[Callable, bytes]:
+    """Get the strongest hash Graph has of a file.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_id: The id of the DriveItem in SharePoint.
+
+    Returns:
+        A function creating a new hash object and the expected digest.
+
+    Raises:
+        ValueError: If Graph has no hash of the file.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{drive_item_id}?$select=file"
+    hashes = get_request(endpoint, graph_access).json().get('file', {}).get('hashes', {})
+
+    if hashes.get('sha256Hash'):
+        return hashlib.sha256, bytes.fromhex(hashes['sha256Hash'])
+    if hashes.get('sha1Hash'):
+        return hashlib.sha1, bytes.fromhex(hashes['sha1Hash'])
+    if hashes.get('quickXorHash'):
+        return QuickXorHash, base64.b64decode(hashes['quickXorHash'])
+
+    raise ValueError("Graph has no hash of the file.")
+
+
+class _HashingWriter:
+    """A wrapper of a binary stream that hashes the data written to it.
+    The hash is reset when the stream is seeked, which stream_download does when a download starts over.
+    """
+    def __init__(self, file: BinaryIO, hash_factory: Callable) -> None:
+        self._file = file
+        self._hash_factory = hash_factory
+        self.hash = hash_factory()
+
+    def write(self, data: bytes) -> int:
+        """Hash and write data to the stream."""
+        self.hash.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Seek the stream and reset the hash."""
+        self.hash = self._hash_factory()
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        """Get the position of the stream."""
+        return self._file.tell()
+
+    def seekable(self) -> bool:
+        """Whether the stream is seekable."""
+        return self._file.seekable()
+
+    def truncate(self, size: int | None = None) -> int:
+        """Truncate the stream."""
+        return self._file.truncate(size)
+
+
 def upload_file_contents(graph_access: GraphAccess, site_id: str, drive_item_path: str, file_contents: bytes):
     """Given a site_id, a drive_item_path, and file_contents as bytes, uploads a single file to a site
 
@@ -71,6 +217,8 @@ def upload_file_contents(graph_access: GraphAccess, site_id: str, drive_item_pat
 
     See https://learn.microsoft.com/en-us/graph/api/driveitem-put-content for further documentation
 
+    Files larger than 4 MB are uploaded in chunks using an upload session. See upload_file.
+
     Args:
         graph_access: The GraphAccess object used to authenticate.
         site_id: The id of the site in SharePoint.
@@ -78,9 +226,186 @@ def upload_file_contents(graph_access: GraphAccess, site_id: str, drive_item_pat
         file_contents: A bytes object containing the file's contents.
 
     """
+    upload_file(graph_access, site_id, drive_item_path, io.BytesIO(file_contents))
+
+
+def upload_file(graph_access: GraphAccess, site_id: str, drive_item_path: str, source: str | os.PathLike | BinaryIO, *,
+                conflict_behavior: str = "replace", chunk_size: int = 10 * 1024 * 1024,
+                progress: Callable[[int, int], None] | None = None, upload_session: UploadSession | None = None,
+                max_resumes: int = 5) -> DriveItem:
+    """Upload a file or stream to a site without loading it into memory as a whole.
+    Files up to 4 MB are uploaded in a single request. Larger files are uploaded in chunks
+    using an upload session, which also works for files larger than 250 MB.
+    If the connection drops during a chunked upload, the upload is resumed from the last received byte.
 
-    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{drive_item_path}:/content"
-    put_request(endpoint, graph_access, file_contents)
+    To resume an upload after the process has stopped, create the session using create_upload_session,
+    store its upload url and pass the session again together with the same file.
+
+    You need to authorize against Graph to get the GraphAccess before using this function
+    see the graph.authentication module.
+
+    See https://learn.microsoft.com/en-us/graph/api/driveitem-createuploadsession for further documentation
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_path: The path to upload the file to.
+        source: A file path or a readable and seekable binary stream. A stream is uploaded from its current position.
+        conflict_behavior: What to do if the file already exists: 'replace', 'rename' or 'fail'. Defaults to 'replace'.
+        chunk_size: The number of bytes to upload per request. Must be a multiple of 320 KiB. Defaults to 10 MiB.
+        progress: A function called with the number of bytes uploaded and the total number of bytes after each chunk. Defaults to None.
+        upload_session: An existing upload session to resume. Defaults to None.
+        max_resumes: The maximum number of times to resume after a dropped connection. Defaults to 5.
+
+    Returns:
+        The uploaded DriveItem.
+
+    Raises:
+        ValueError: If chunk_size isn't a multiple of 320 KiB.
+        HTTPError: Any errors raised while performing the requests.
+        ConnectionError: If the connection dropped more than max_resumes times.
+    """
+    if chunk_size <= 0 or chunk_size % UPLOAD_CHUNK_MULTIPLE:
+        raise ValueError("chunk_size must be a multiple of 320 KiB.")
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            drive_item = _upload_stream(graph_access, site_id, drive_item_path, file, conflict_behavior, chunk_size, progress, upload_session, max_resumes)
+    else:
+        drive_item = _upload_stream(graph_access, site_id, drive_item_path, source, conflict_behavior, chunk_size, progress, upload_session, max_resumes)
+
+    # The cached eTag of the file is outdated after the upload
+    get_metadata_cache().invalidate(drive_item_key(graph_access.tenant_key, site_id, drive_item_path))
+    return drive_item
+
+
+def create_upload_session(graph_access: GraphAccess, site_id: str, drive_item_path: str, *, conflict_behavior: str = "replace") -> UploadSession:
+    """Create an upload session to upload a large file in chunks. See upload_file.
+
+    Args:
+        graph_access: The GraphAccess object used to authenticate.
+        site_id: The id of the site in SharePoint.
+        drive_item_path: The path to upload the file to.
+        conflict_behavior: What to do if the file already exists: 'replace', 'rename' or 'fail'. Defaults to 'replace'.
+
+    Returns:
+        The new UploadSession.
+    """
+    endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{drive_item_path}:/createUploadSession"
+    body = {"item": {"@microsoft.graph.conflictBehavior": conflict_behavior}}
+    response = post_request(endpoint, graph_access, body).json()
+    return UploadSession(upload_url=response['uploadUrl'], expiration=response['expirationDateTime'])
+
+
+def _upload_stream(graph_access: GraphAccess, site_id: str, drive_item_path: str, file: BinaryIO, conflict_behavior: str,
+                   chunk_size: int, progress: Callable[[int, int], None] | None, upload_session: UploadSession | None,
+                   max_resumes: int) -> DriveItem:
+    """Upload an open file using a single request or an upload session depending on its size.
+    See upload_file for a description of the arguments.
+
+    Returns:
+        The uploaded DriveItem.
+    """
+    start = file.tell()
+    total = file.seek(0, os.SEEK_END) - start
+    file.seek(start)
+
+    if total == 0 or (upload_session is None and total <= SIMPLE_UPLOAD_LIMIT):
+        endpoint = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{drive_item_path}:/content?@microsoft.graph.conflictBehavior={conflict_behavior}"
+        response = put_request(endpoint, graph_access, file.read())
+        if progress:
+            progress(total, total)
+        return _unpack_drive_item_response(response.json())
+
+    if upload_session is None:
+        upload_session = create_upload_session(graph_access, site_id, drive_item_path, conflict_behavior=conflict_behavior)
+        offset = 0
+    else:
+        offset = _get_next_upload_offset(get_client(graph_access), upload_session)
+
+    drive_item_raw = _upload_chunks(graph_access, upload_session, file, start, offset, total, chunk_size, progress, max_resumes)
+    if drive_item_raw is None:
+        # The last chunk was received, but its response was lost
+        return get_drive_item(graph_access, site_id, drive_item_path)
+
+    return _unpack_drive_item_response(drive_item_raw)
+
+
+def _upload_chunks(graph_access: GraphAccess, upload_session: UploadSession, file: BinaryIO, start: int, offset: int, total: int,
+                   chunk_size: int, progress: Callable[[int, int], None] | None, max_resumes: int) -> dict | None:
+    """Upload an open file in chunks to an upload session.
+    See upload_file for a description of the other arguments.
+
+    Args:
+        start: The position in the file where the upload data starts.
+        offset: The number of bytes the session has already received.
+        total: The total number of bytes to upload.
+
+    Returns:
+        The json dictionary of the uploaded DriveItem
+        or None if all bytes were received without getting the final response.
+    """
+    client = get_client(graph_access)
+    resumes = 0
+
+    while offset < total:
+        file.seek(start + offset)
+        data = file.read(min(chunk_size, total - offset))
+        headers = {"Content-Range": f"bytes {offset}-{offset + len(data) - 1}/{total}"}
+
+        try:
+            response = client.request("PUT", upload_session.upload_url, headers=headers, data=data, authenticate=False)
+        except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.HTTPError) as e:
+            # Only resume on dropped connections, server errors and ranges the server already has
+            if isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code < 500 and e.response.status_code != 416:
+                raise
+            resumes += 1
+            if resumes > max_resumes:
+                raise
+            offset = _get_next_upload_offset(client, upload_session)
+            continue
+
+        if response.status_code in (200, 201):
+            if progress:
+                progress(total, total)
+            return response.json()
+
+        offset = _parse_next_expected_range(response.json(), offset + len(data))
+        if progress:
+            progress(offset, total)
+
+    return None
+
+
+def _get_next_upload_offset(client: GraphClient, upload_session: UploadSession) -> int:
+    """Ask an upload session which byte it expects next.
+
+    Args:
+        client: The GraphClient to send the request with.
+        upload_session: The upload session.
+
+    Returns:
+        The offset of the next byte to upload.
+    """
+    response = client.request("GET", upload_session.upload_url, authenticate=False)
+    return _parse_next_expected_range(response.json(), None)
+
+
+def _parse_next_expected_range(response: dict, default: int | None) -> int:
+    """Get the start of the first range an upload session expects.
+
+    Args:
+        response: The json response of the upload session.
+        default: The value to return if the response has no expected ranges.
+
+    Returns:
+        The offset of the next byte to upload. If no more bytes are expected the default is returned,
+        or a very large number if the default is None.
+    """
+    ranges = response.get('nextExpectedRanges')
+    if not ranges:
+        return default if default is not None else 2 ** 63
+    return int(ranges[0].split('-')[0])
 
 
 def _unpack_site_response(site_raw: dict[str, str]) -> Site:
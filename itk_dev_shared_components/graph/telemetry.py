@@ -0,0 +1,186 @@
+"""This module contains types and sinks used to record the requests sent to Graph,
+so it's possible to see which operations and mailboxes are being throttled.
+
+Give a sink to the GraphClient of a GraphAccess object using common.configure_client:
+
+    stats = RequestStats()
+    configure_client(graph_access, metrics_sink=stats)
+    ...
+    print(stats.report())
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+import re
+import threading
+from typing import Callable
+from urllib.parse import urlsplit
+
+
+# Collections in Graph urls where the next segment is an id or a name
+_ID_COLLECTIONS = frozenset((
+    'users', 'messages', 'mailfolders', 'childfolders', 'attachments', 'events', 'contacts',
+    'sites', 'drives', 'items', 'lists', 'groups'
+))
+# Path based addressing of drive items e.g. root:/folder/file.txt:
+_DRIVE_PATH_PATTERN = re.compile(r"root:[^:]*:?")
+
+THROTTLE_HEADER_PREFIX = "x-ms-throttle-"
+
+
+@dataclass
+# pylint: disable-next=too-many-instance-attributes
+class RequestRecord:
+    """A dataclass representing a single request sent to Graph.
+    Each retry of a throttled request is recorded separately.
+    """
+    method: str
+    endpoint_template: str
+    mailbox: str | None
+    status: int | None
+    latency: float
+    request_bytes: int | None
+    response_bytes: int | None
+    attempt: int = 0
+    retry_after: str | None = None
+    throttle_headers: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def throttled(self) -> bool:
+        """Whether Graph asked the client to back off."""
+        return self.status in (429, 503, 504)
+
+
+MetricsSink = Callable[[RequestRecord], None]
+
+
+def get_endpoint_template(endpoint: str) -> str:
+    """Get the template of a Graph endpoint by replacing ids, names and paths with placeholders,
+    e.g. '/v1.0/users/{id}/messages/{id}/move'. The query string is removed.
+
+    Args:
+        endpoint: The URL of the Graph endpoint.
+
+    Returns:
+        The endpoint template.
+    """
+    path = _DRIVE_PATH_PATTERN.sub("root:{path}:", urlsplit(endpoint).path)
+    segments = path.split('/')
+
+    for i in range(1, len(segments)):
+        if segments[i] and segments[i - 1].lower() in _ID_COLLECTIONS:
+            segments[i] = "{id}"
+
+    return '/'.join(segments)
+
+
+def get_throttle_headers(headers: dict) -> dict[str, str]:
+    """Get the throttling headers of a response i.e. the x-ms-throttle-* headers.
+
+    Args:
+        headers: The headers of the response.
+
+    Returns:
+        The throttling headers with lowercase names.
+    """
+    return {name.lower(): value for name, value in headers.items() if name.lower().startswith(THROTTLE_HEADER_PREFIX)}
+
+
+@dataclass
+class _OperationStats:
+    """Aggregated numbers of one operation in a RequestStats object."""
+    count: int = 0
+    errors: int = 0
+    throttled: int = 0
+    latencies: list[float] = field(default_factory=list)
+    bytes: int = 0
+
+
+class RequestStats:
+    """A thread safe metrics sink that keeps all records of a run
+    and can summarize them per operation and mailbox.
+    """
+    def __init__(self) -> None:
+        self.records: list[RequestRecord] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record: RequestRecord) -> None:
+        """Add a record.
+
+        Args:
+            record: The record of the request.
+        """
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self) -> None:
+        """Remove all records."""
+        with self._lock:
+            self.records.clear()
+
+    def summary(self) -> dict[str, dict]:
+        """Summarize the records per operation, i.e. method and endpoint template.
+
+        Returns:
+            A dictionary from operation to a dictionary with the number of requests, errors
+            and throttled requests, the mean, 95th percentile and max latency in seconds
+            and the total number of bytes sent and received.
+        """
+        operations: dict[str, _OperationStats] = defaultdict(_OperationStats)
+        with self._lock:
+            records = list(self.records)
+
+        for record in records:
+            stats = operations[f"{record.method} {record.endpoint_template}"]
+            stats.count += 1
+            stats.errors += record.status is None or (record.status >= 400 and not record.throttled)
+            stats.throttled += record.throttled
+            stats.latencies.append(record.latency)
+            stats.bytes += (record.request_bytes or 0) + (record.response_bytes or 0)
+
+        summary = {}
+        for operation, stats in sorted(operations.items(), key=lambda item: -sum(item[1].latencies)):
+            latencies = sorted(stats.latencies)
+            summary[operation] = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "throttled": stats.throttled,
+                "mean_latency": sum(latencies) / len(latencies),
+                "p95_latency": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+                "max_latency": latencies[-1],
+                "bytes": stats.bytes
+            }
+        return summary
+
+    def throttled_mailboxes(self) -> dict[str, int]:
+        """Count the throttled requests per mailbox.
+
+        Returns:
+            A dictionary from mailbox to the number of throttled requests, most throttled first.
+        """
+        counts: dict[str, int] = defaultdict(int)
+        with self._lock:
+            for record in self.records:
+                if record.throttled:
+                    counts[record.mailbox or "(none)"] += 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    def report(self) -> str:
+        """Create a human readable report of the run.
+
+        Returns:
+            The report as a multiline string.
+        """
+        lines = [f"{'Operation':<60} {'Count':>6} {'Errors':>6} {'Throttled':>9} {'Mean s':>8} {'P95 s':>8} {'Max s':>8} {'KiB':>10}"]
+        for operation, stats in self.summary().items():
+            lines.append(f"{operation[:60]:<60} {stats['count']:>6} {stats['errors']:>6} {stats['throttled']:>9} "
+                         f"{stats['mean_latency']:>8.3f} {stats['p95_latency']:>8.3f} {stats['max_latency']:>8.3f} {stats['bytes'] / 1024:>10.1f}")
+
+        mailboxes = self.throttled_mailboxes()
+        if mailboxes:
+            lines.append("")
+            lines.append("Throttled mailboxes:")
+            for mailbox, count in mailboxes.items():
+                lines.append(f"  {mailbox}: {count}")
+
+        return '\n'.join(lines)
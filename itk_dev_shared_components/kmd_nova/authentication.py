@@ -1,6 +1,7 @@
 """This module contains functionality to authenticate against the KMD Nova api."""
 
 from datetime import datetime, timedelta
+import threading
 import urllib
 
 import requests
@@ -12,6 +13,7 @@ class NovaAccess:
     def __init__(self, client_id: str, client_secret: str, domain: str = "https://cap-novaapi.kmd.dk") -> None:
         self.client_id = client_id
         self.client_secret = client_secret
+        self._token_lock = threading.Lock()
         self._bearer_token, self.token_expiry_date = self._get_new_token()
         self.domain = domain
 
@@ -53,7 +55,8 @@ class NovaAccess:
             Bearer token
          """
 
-        if self.token_expiry_date + timedelta(seconds=30) < datetime.now():
-            self._bearer_token, self.token_expiry_date = self._get_new_token()
+        with self._token_lock:
+            if self.token_expiry_date + timedelta(seconds=30) < datetime.now():
+                self._bearer_token, self.token_expiry_date = self._get_new_token()
 
-        return self._bearer_token
+            return self._bearer_token
@@ -0,0 +1,162 @@
+"""This module has functions to do bulk operations against the KMD Nova api,
+like importing a large number of cases concurrently."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from itk_dev_shared_components.kmd_nova.authentication import NovaAccess
+from itk_dev_shared_components.kmd_nova.nova_objects import NovaCase
+from itk_dev_shared_components.kmd_nova.nova_registry import NovaRegistry
+from itk_dev_shared_components.kmd_nova import nova_cases
+
+
+@dataclass(slots=True, kw_only=True)
+class CaseImportResult:
+    """A dataclass representing the result of importing a single case."""
+    case_uuid: str
+    title: str
+    success: bool
+    error: Optional[str] = None
+
+
+@dataclass(slots=True, kw_only=True)
+class CaseImportReport:
+    """A dataclass representing the result of a bulk case import."""
+    results: list[CaseImportResult] = field(default_factory=list)
+    skipped: int = 0
+
+    @property
+    def succeeded(self) -> list[CaseImportResult]:
+        """The results of the cases that were imported."""
+        return [r for r in self.results if r.success]
+
+    @property
+    def failed(self) -> list[CaseImportResult]:
+        """The results of the cases that failed to import."""
+        return [r for r in self.results if not r.success]
+
+
+# pylint: disable-next=too-few-public-methods
+class RateLimiter:
+    """A thread safe rate limiter that spaces out calls evenly
+    so no more than a given number of calls are made per second.
+    """
+    def __init__(self, calls_per_second: float) -> None:
+        if calls_per_second <= 0:
+            raise ValueError("calls_per_second must be greater than 0.")
+
+        self._interval = 1 / calls_per_second
+        self._next_time = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+# pylint: disable-next=too-many-arguments,too-many-locals
+def import_cases(cases: Iterable[NovaCase], nova_access: NovaAccess, max_workers: int = 4,
+                 checkpoint_path: Optional[str] = None, calls_per_second: float = 10,
+                 registry: Optional[NovaRegistry] = None) -> CaseImportReport:
+    """Import many cases to KMD Nova concurrently using nova_cases.add_case.
+    The cases are consumed lazily, so the input can be a generator streaming from a file or database.
+
+    If a checkpoint path is given, the uuid of each successfully imported case is appended to the file.
+    Cases whose uuid is already in the checkpoint file are skipped, so a crashed run can be
+    started again with the same input and checkpoint file and resume where it stopped.
+    For this to work the cases must have the same uuids between runs.
+
+    If a registry is given the caseworker and departments of each case are resolved with
+    NovaRegistry.resolve_case before the case is imported, so the cases only need their identifiers.
+
+    Args:
+        cases: The cases to import. Each case must have a uuid.
+        nova_access: The NovaAccess object used to authenticate.
+        max_workers: The number of cases to import in parallel. Defaults to 4.
+        checkpoint_path: The path of a file to store progress in. Defaults to None.
+        calls_per_second: The maximum number of calls to Nova per second. Defaults to 10.
+        registry: A registry to resolve caseworkers and departments with. Defaults to None.
+
+    Returns:
+        A report with a result for each case that was attempted and the number of skipped cases.
+
+    Raises:
+        ValueError: If max_workers is less than 1.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    done_uuids = _read_checkpoint(checkpoint_path)
+    rate_limiter = RateLimiter(calls_per_second)
+    report = CaseImportReport()
+
+    checkpoint_file = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None  # pylint: disable=consider-using-with
+
+    def import_case(case: NovaCase) -> None:
+        if registry:
+            case = registry.resolve_case(case)
+        rate_limiter.wait()
+        nova_cases.add_case(case, nova_access)
+
+    def collect(future: Future, case: NovaCase) -> None:
+        try:
+            future.result()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            report.results.append(CaseImportResult(case_uuid=case.uuid, title=case.title, success=False, error=repr(e)))
+            return
+
+        report.results.append(CaseImportResult(case_uuid=case.uuid, title=case.title, success=True))
+        if checkpoint_file:
+            checkpoint_file.write(case.uuid + "\n")
+            checkpoint_file.flush()
+
+    # Keep a bounded number of cases in flight so the input stream isn't read all at once
+    in_flight: dict[Future, NovaCase] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for case in cases:
+                if case.uuid in done_uuids:
+                    report.skipped += 1
+                    continue
+
+                if len(in_flight) >= max_workers * 2:
+                    for future in wait(in_flight, return_when=FIRST_COMPLETED).done:
+                        collect(future, in_flight.pop(future))
+
+                in_flight[executor.submit(import_case, case)] = case
+    finally:
+        # The executor has waited for all cases in flight. They're collected even if reading
+        # the input failed, so the imported cases are in the checkpoint file before the error is raised.
+        for future, case in in_flight.items():
+            collect(future, case)
+
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    return report
+
+
+def _read_checkpoint(checkpoint_path: Optional[str]) -> set[str]:
+    """Read the uuids of already imported cases from a checkpoint file.
+
+    Args:
+        checkpoint_path: The path of the checkpoint file.
+
+    Returns:
+        A set of case uuids. Empty if the file doesn't exist.
+    """
+    if not checkpoint_path or not os.path.isfile(checkpoint_path):
+        return set()
+
+    with open(checkpoint_path, encoding='utf-8') as file:
+        return {line.strip() for line in file if line.strip()}
@@ -9,7 +9,7 @@ import requests
 
 from itk_dev_shared_components.kmd_nova.authentication import NovaAccess
 from itk_dev_shared_components.kmd_nova.nova_objects import NovaCase, CaseParty, Department
-from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, extract_caseworker
+from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, extract_caseworker, caseworker_fields, department_identity
 
 
 def get_case(case_uuid: str, nova_access: NovaAccess) -> NovaCase:
@@ -305,20 +305,8 @@ def add_case(case: NovaCase, nova_access: NovaAccess):
                 "participantRole": party.role
             } for party in case.case_parties
         ],
-        "securityUnit": {
-            "losIdentity": {
-                "administrativeUnitId": case.security_unit.id,
-                "fullName": case.security_unit.name,
-                "userKey": case.security_unit.user_key
-            }
-        },
-        "responsibleDepartment": {
-            "losIdentity": {
-                "administrativeUnitId": case.responsible_department.id,
-                "fullName": case.responsible_department.name,
-                "userKey": case.responsible_department.user_key
-            }
-        },
+        "securityUnit": department_identity(case.security_unit),
+        "responsibleDepartment": department_identity(case.responsible_department),
         "SensitivityCtrlBy": "Bruger",
         "SecurityUnitCtrlBy": "Bruger",
         "ResponsibleDepartmentCtrlBy": "Bruger",
@@ -329,21 +317,7 @@ def add_case(case: NovaCase, nova_access: NovaAccess):
         "AvailabilityCtrlBy": "Regler"
     }
 
-    if case.caseworker:
-        if case.caseworker.type == 'user':
-            payload['caseworker'] = {
-                "kspIdentity": {
-                    "racfId": case.caseworker.ident,
-                    "fullName": case.caseworker.name
-                }
-            }
-        elif case.caseworker.type == 'group':
-            payload['caseworker'] = {
-                "losIdentity": {
-                    "administrativeUnitId": case.caseworker.ident,
-                    "fullName": case.caseworker.name
-                }
-            }
+    payload.update(caseworker_fields(case.caseworker))
 
     headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {nova_access.get_bearer_token()}"}
 
@@ -11,7 +11,7 @@ import requests
 
 from itk_dev_shared_components.kmd_nova.authentication import NovaAccess
 from itk_dev_shared_components.kmd_nova.nova_objects import Document
-from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, extract_caseworker
+from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, extract_caseworker, caseworker_fields
 
 
 def get_documents(case_uuid: str, nova_access: NovaAccess) -> list[Document]:
@@ -186,21 +186,7 @@ def attach_document_to_case(case_uuid: str, document: Document, nova_access: Nov
         "accessToDocuments": True
     }
 
-    if document.caseworker:
-        if document.caseworker.type == 'user':
-            payload['caseworker'] = {
-                "kspIdentity": {
-                    "racfId": document.caseworker.ident,
-                    "fullName": document.caseworker.name
-                }
-            }
-        elif document.caseworker.type == 'group':
-            payload['caseworker'] = {
-                "losIdentity": {
-                    "administrativeUnitId": document.caseworker.ident,
-                    "fullName": document.caseworker.name
-                }
-            }
+    payload.update(caseworker_fields(document.caseworker))
 
     headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {nova_access.get_bearer_token()}"}
     response = requests.post(url, params=params, headers=headers, json=payload, timeout=60)
@@ -0,0 +1,168 @@
+"""This module contains a registry to reuse caseworkers and departments
+across many calls to the KMD Nova api."""
+
+import dataclasses
+import threading
+from typing import Callable, Optional
+
+from itk_dev_shared_components.kmd_nova.nova_objects import Caseworker, Department, NovaCase
+from itk_dev_shared_components.kmd_nova.util import caseworker_identity, caseworker_task_reference, department_identity
+
+
+class NovaRegistry:
+    """A thread safe registry of caseworkers and departments.
+    Objects are looked up by their Nova identifiers, and missing objects
+    can be resolved by optional loader functions whose results are memoized.
+
+    Caseworkers can be looked up by racfId or novaUserId (users)
+    and by administrativeUnitId or novaUnitId (groups).
+    Departments are looked up by administrativeUnitId.
+
+    Pass a registry to nova_bulk.import_cases to resolve the caseworker and departments
+    of each case, so the loaders are only called once for each caseworker and department.
+    """
+    def __init__(self, caseworker_loader: Optional[Callable[[str], Optional[Caseworker]]] = None,
+                 department_loader: Optional[Callable[[int], Optional[Department]]] = None) -> None:
+        """Create a new registry.
+
+        Args:
+            caseworker_loader: A function that returns the caseworker with the given ident or uuid. Defaults to None.
+            department_loader: A function that returns the department with the given administrativeUnitId. Defaults to None.
+        """
+        self._caseworker_loader = caseworker_loader
+        self._department_loader = department_loader
+        self._caseworkers: dict[str, Caseworker] = {}
+        self._departments: dict[int, Department] = {}
+        self._lock = threading.Lock()
+
+    def add_caseworker(self, caseworker: Caseworker) -> None:
+        """Add a caseworker to the registry.
+
+        Args:
+            caseworker: The caseworker to add.
+        """
+        with self._lock:
+            if caseworker.ident:
+                self._caseworkers[str(caseworker.ident)] = caseworker
+            if caseworker.uuid:
+                self._caseworkers[caseworker.uuid] = caseworker
+
+    def add_department(self, department: Department) -> None:
+        """Add a department to the registry.
+
+        Args:
+            department: The department to add.
+        """
+        with self._lock:
+            self._departments[int(department.id)] = department
+
+    def get_caseworker(self, key: str) -> Caseworker:
+        """Get a caseworker by its racfId, novaUserId, administrativeUnitId or novaUnitId.
+        If the caseworker isn't in the registry the caseworker loader is used.
+
+        Args:
+            key: The identifier of the caseworker.
+
+        Returns:
+            The caseworker with the given identifier.
+
+        Raises:
+            KeyError: If the caseworker couldn't be found.
+        """
+        key = str(key)
+        with self._lock:
+            caseworker = self._caseworkers.get(key)
+
+        if caseworker is None and self._caseworker_loader:
+            caseworker = self._caseworker_loader(key)
+            if caseworker:
+                self.add_caseworker(caseworker)
+
+        if caseworker is None:
+            raise KeyError(f"Caseworker not found: {key}")
+
+        return caseworker
+
+    def get_department(self, administrative_unit_id: int) -> Department:
+        """Get a department by its administrativeUnitId.
+        If the department isn't in the registry the department loader is used.
+
+        Args:
+            administrative_unit_id: The administrativeUnitId of the department.
+
+        Returns:
+            The department with the given id.
+
+        Raises:
+            KeyError: If the department couldn't be found.
+        """
+        administrative_unit_id = int(administrative_unit_id)
+        with self._lock:
+            department = self._departments.get(administrative_unit_id)
+
+        if department is None and self._department_loader:
+            department = self._department_loader(administrative_unit_id)
+            if department:
+                self.add_department(department)
+
+        if department is None:
+            raise KeyError(f"Department not found: {administrative_unit_id}")
+
+        return department
+
+    def resolve_case(self, case: NovaCase) -> NovaCase:
+        """Get a copy of a case where the caseworker and departments are replaced by
+        the registered objects with the same identifiers. The case itself isn't modified.
+
+        Args:
+            case: The case to resolve. Its caseworker needs a racfId, novaUserId, administrativeUnitId or novaUnitId
+                and its departments an administrativeUnitId.
+
+        Returns:
+            The resolved copy of the case.
+
+        Raises:
+            KeyError: If the caseworker or a department couldn't be found.
+        """
+        changes = {
+            "security_unit": self.get_department(case.security_unit.id),
+            "responsible_department": self.get_department(case.responsible_department.id)
+        }
+        if case.caseworker:
+            changes["caseworker"] = self.get_caseworker(case.caseworker.ident or case.caseworker.uuid)
+
+        return dataclasses.replace(case, **changes)
+
+    def caseworker_identity(self, key: str) -> dict | None:
+        """Get the identity dictionary of a caseworker used in write requests.
+
+        Args:
+            key: The identifier of the caseworker.
+
+        Returns:
+            A dictionary with either a kspIdentity or a losIdentity
+            or None if the caseworker type is unknown.
+        """
+        return caseworker_identity(self.get_caseworker(key))
+
+    def caseworker_task_reference(self, key: str) -> dict:
+        """Get the fields used to reference a caseworker on a task.
+
+        Args:
+            key: The identifier of the caseworker.
+
+        Returns:
+            A dictionary with either a caseworkerPersonId or a caseworkerGroupId.
+        """
+        return caseworker_task_reference(self.get_caseworker(key))
+
+    def department_identity(self, administrative_unit_id: int) -> dict:
+        """Get the identity dictionary of a department used in write requests.
+
+        Args:
+            administrative_unit_id: The administrativeUnitId of the department.
+
+        Returns:
+            A dictionary with a losIdentity.
+        """
+        return department_identity(self.get_department(administrative_unit_id))
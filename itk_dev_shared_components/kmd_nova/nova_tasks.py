@@ -7,7 +7,7 @@ import requests
 
 from itk_dev_shared_components.kmd_nova.authentication import NovaAccess
 from itk_dev_shared_components.kmd_nova.nova_objects import Task, Caseworker
-from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, datetime_to_iso_string
+from itk_dev_shared_components.kmd_nova.util import datetime_from_iso_string, datetime_to_iso_string, caseworker_task_reference
 
 
 def attach_task_to_case(case_uuid: str, task: Task, nova_access: NovaAccess) -> None:
@@ -42,10 +42,7 @@ def attach_task_to_case(case_uuid: str, task: Task, nova_access: NovaAccess) ->
         "taskTypeName": "Aktivitet"
     }
 
-    if task.caseworker.type == 'user':
-        payload["caseworkerPersonId"] = task.caseworker.uuid
-    elif task.caseworker.type == 'group':
-        payload["caseworkerGroupId"] = task.caseworker.uuid
+    payload.update(caseworker_task_reference(task.caseworker))
 
     headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {nova_access.get_bearer_token()}"}
     response = requests.post(url, params=params, headers=headers, json=payload, timeout=60)
@@ -163,10 +160,7 @@ def update_task(task: Task, case_uuid: str, nova_access: NovaAccess):
         "taskType": "Aktivitet"
     }
 
-    if task.caseworker.type == 'user':
-        payload["caseworkerPersonId"] = task.caseworker.uuid
-    elif task.caseworker.type == 'group':
-        payload["caseworkerGroupId"] = task.caseworker.uuid
+    payload.update(caseworker_task_reference(task.caseworker))
 
     headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {nova_access.get_bearer_token()}"}
     response = requests.put(url, params=params, headers=headers, json=payload, timeout=60)
@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Optional
 
-from itk_dev_shared_components.kmd_nova.nova_objects import Caseworker
+from itk_dev_shared_components.kmd_nova.nova_objects import Caseworker, Department
 
 
 def datetime_from_iso_string(date_string: Optional[str]) -> Optional[datetime]:
@@ -70,3 +70,87 @@ def extract_caseworker(response_dict: dict) -> Caseworker | None:
         pass
 
     return None
+
+
+def caseworker_identity(caseworker: Caseworker) -> dict | None:
+    """Get the identity dictionary used to describe a caseworker in write requests.
+    Users are described by a kspIdentity and groups by a losIdentity.
+    A new dictionary is built on each call, so it can be modified by the caller.
+
+    Args:
+        caseworker: The caseworker to describe.
+
+    Returns:
+        A dictionary with either a kspIdentity or a losIdentity
+        or None if the caseworker type is unknown.
+    """
+    if caseworker.type == 'user':
+        return {
+            "kspIdentity": {
+                "racfId": caseworker.ident,
+                "fullName": caseworker.name
+            }
+        }
+
+    if caseworker.type == 'group':
+        return {
+            "losIdentity": {
+                "administrativeUnitId": caseworker.ident,
+                "fullName": caseworker.name
+            }
+        }
+
+    return None
+
+
+def caseworker_fields(caseworker: Caseworker | None) -> dict:
+    """Get the fields used to set the caseworker of a case or document in write requests.
+
+    Args:
+        caseworker: The caseworker to set or None.
+
+    Returns:
+        A dictionary with the identity of the caseworker in the 'caseworker' field.
+        The dictionary is empty if there is no caseworker or its type is unknown.
+    """
+    identity = caseworker_identity(caseworker) if caseworker else None
+    return {"caseworker": identity} if identity else {}
+
+
+def caseworker_task_reference(caseworker: Caseworker) -> dict:
+    """Get the fields used to reference a caseworker on a task.
+    A new dictionary is built on each call, so it can be modified by the caller.
+
+    Args:
+        caseworker: The caseworker to reference.
+
+    Returns:
+        A dictionary with either a caseworkerPersonId or a caseworkerGroupId.
+        The dictionary is empty if the caseworker type is unknown.
+    """
+    if caseworker.type == 'user':
+        return {"caseworkerPersonId": caseworker.uuid}
+
+    if caseworker.type == 'group':
+        return {"caseworkerGroupId": caseworker.uuid}
+
+    return {}
+
+
+def department_identity(department: Department) -> dict:
+    """Get the identity dictionary used to describe a department in write requests.
+    A new dictionary is built on each call, so it can be modified by the caller.
+
+    Args:
+        department: The department to describe.
+
+    Returns:
+        A dictionary with a losIdentity.
+    """
+    return {
+        "losIdentity": {
+            "administrativeUnitId": department.id,
+            "fullName": department.name,
+            "userKey": department.user_key
+        }
+    }
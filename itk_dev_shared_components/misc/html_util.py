@@ -0,0 +1,332 @@
+"""This module contains helper functions to do with handling html."""
+
+from collections import Counter
+from html.parser import HTMLParser
+import re
+
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+
+# The tag rules of BeautifulSoup's html.parser tree builder
+_VOID_TAGS = frozenset((
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img',
+    'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'
+))
+_PRESERVE_WHITESPACE_TAGS = frozenset(('pre', 'textarea'))
+_NON_TEXT_TAGS = frozenset(('rt', 'rp', 'style', 'script', 'template'))
+_ASCII_SPACES = ' \n\t\x0c\r'
+
+# Tags whose content isn't parsed as html
+_RAW_TEXT_TAGS = frozenset(('script', 'style'))
+# Tags whose content is parsed differently between Python versions
+_SPECIAL_TEXT_TAGS = frozenset(('textarea', 'title', 'xmp', 'iframe', 'noembed', 'noframes', 'noscript', 'plaintext'))
+
+# The markup the fast tokenizer understands. Anything else is left to HTMLParser.
+_MARKUP_PATTERN = re.compile(r"""
+    <(?:
+        (?P<start>[a-zA-Z][a-zA-Z0-9:_.-]*)
+            (?:\s+[^\s"'<>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'<>=`]+))?)*
+            \s*(?P<self_closing>/?)>
+        |/(?P<end>[a-zA-Z][a-zA-Z0-9:_.-]*)\s*>
+        |!--(?![->])(?:(?!--).)*-->
+        |![dD][oO][cC][tT][yY][pP][eE][^<>]*>
+        |!\[(?:if|else|endif)\b[^<>\]]*\]>
+        |\?[^<>]*>
+        |(?P<less_than>)(?=\s)
+    )
+""", re.VERBOSE | re.DOTALL)
+_REFERENCE_PATTERN = re.compile(r"&(?:#(?P<charref>[0-9]+|[xX][0-9a-fA-F]+);|(?P<entityref>[a-zA-Z][a-zA-Z0-9]*);|(?P<ampersand>)(?=\s|$))")
+_DECIMAL_PATTERN = re.compile(r'([0-9]+)(.*)', re.DOTALL)
+_HEX_PATTERN = re.compile(r'([0-9a-fA-F]+)(.*)', re.DOTALL)
+
+
+def html_to_text(html: str) -> str:
+    """Extract the text of an html document.
+    The result is the same as BeautifulSoup(html, "html.parser").get_text().strip(),
+    but the text is collected while tokenizing instead of building a document tree first,
+    which is several times faster on large documents.
+
+    Args:
+        html: The html document.
+
+    Returns:
+        The text of the document with leading and trailing whitespace removed.
+    """
+    parser = _TextExtractor()
+    if not _tokenize(html, parser):
+        # The document has markup only HTMLParser knows how to handle
+        parser = _TextExtractor()
+        parser.feed(html)
+        parser.close()
+
+    return ''.join(parser.text).strip()
+
+
+def _tokenize(html: str, parser: "_TextExtractor") -> bool:
+    """Feed a document to the parser's handlers using a fast regex tokenizer.
+    This gives the same events as HTMLParser, but only supports well formed markup.
+
+    Args:
+        html: The html document.
+        parser: The parser to feed.
+
+    Returns:
+        True if the whole document was tokenized, False if it contained unsupported markup.
+    """
+    position = 0
+    length = len(html)
+
+    while position < length:
+        index = html.find('<', position)
+        if index == -1:
+            index = length
+
+        if index > position and not _handle_text(html[position:index], parser):
+            return False
+        if index == length:
+            break
+
+        match = _MARKUP_PATTERN.match(html, index)
+        if not match:
+            return False
+        position = match.end()
+
+        if match['start']:
+            position = _handle_start_tag(html, match, parser)
+            if position == -1:
+                return False
+        elif match['end']:
+            parser.handle_endtag(match['end'].lower())
+        elif match['less_than'] is not None:
+            parser.handle_data('<')
+        else:
+            # Comments, declarations and processing instructions only end the current string
+            parser.handle_comment(None)
+
+    parser.close_data()
+    return True
+
+
+def _handle_start_tag(html: str, match: re.Match, parser: "_TextExtractor") -> int:
+    """Feed a start tag to the parser. The content of raw text tags is fed as well.
+
+    Args:
+        html: The html document.
+        match: The match of the start tag.
+        parser: The parser to feed.
+
+    Returns:
+        The position in the document after the tag and its handled content,
+        or -1 if the content isn't supported.
+    """
+    tag = match['start'].lower()
+    position = match.end()
+
+    if match['self_closing']:
+        parser.handle_startendtag(tag, [])
+        return position
+
+    parser.handle_starttag(tag, [])
+    if tag not in _RAW_TEXT_TAGS and tag not in _SPECIAL_TEXT_TAGS:
+        return position
+
+    return _handle_text_tag_content(html, tag, position, parser)
+
+
+def _handle_text_tag_content(html: str, tag: str, position: int, parser: "_TextExtractor") -> int:
+    """Feed the content of a raw text tag like script or a special text tag like title to the parser.
+
+    Args:
+        html: The html document.
+        tag: The name of the tag.
+        position: The position in the document after the start tag.
+        parser: The parser to feed.
+
+    Returns:
+        The position of the end tag, or -1 if the content isn't supported.
+    """
+    if tag in _RAW_TEXT_TAGS:
+        # The content ends at the first end tag, which must be the exact end tag.
+        # Newer Python versions parse comments inside scripts, so those aren't supported.
+        end = html.find('</', position)
+        content = html[position:end]
+        supported = tag != 'script' or '<!--' not in content
+    else:
+        # The content must be plain text followed by the exact end tag
+        end = html.find('<', position)
+        content = html[position:end]
+        supported = '&' not in content
+
+    if end == -1 or not supported or html[end:end + len(tag) + 3].lower() != f"</{tag}>":
+        return -1
+
+    if content:
+        parser.handle_data(content)
+    return end
+
+
+def _handle_text(text: str, parser: "_TextExtractor") -> bool:
+    """Feed a piece of text between tags to the parser, resolving character references.
+
+    Args:
+        text: The text.
+        parser: The parser to feed.
+
+    Returns:
+        True if the text was handled, False if it contained unsupported references.
+    """
+    if '&' not in text:
+        if text:
+            parser.handle_data(text)
+        return True
+
+    position = 0
+    for match in _REFERENCE_PATTERN.finditer(text):
+        data = text[position:match.start()]
+        if '&' in data:
+            return False
+        if data:
+            parser.handle_data(data)
+        position = match.end()
+
+        if match['charref']:
+            parser.handle_charref(match['charref'])
+        elif match['entityref']:
+            parser.handle_entityref(match['entityref'])
+        else:
+            parser.handle_data('&')
+
+    data = text[position:]
+    if '&' in data:
+        return False
+    if data:
+        parser.handle_data(data)
+    return True
+
+
+# pylint: disable-next=abstract-method
+class _TextExtractor(HTMLParser):
+    """An HTMLParser that only keeps the text of a document.
+    Strings are split, whitespace collapsed and non-text tags skipped
+    exactly like BeautifulSoup does it, so the output is identical.
+    """
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.text: list[str] = []
+        self._data: list[str] = []
+        self._stack: list[str] = []
+        self._open_tags: Counter = Counter()
+        # The stack depths of open tags that preserve whitespace or hide their text
+        self._preserve_depths: list[int] = []
+        self._non_text_depths: list[int] = []
+        self._closed_void_tags: Counter = Counter()
+
+    def handle_starttag(self, tag, attrs):
+        self._push(tag)
+        if tag in _VOID_TAGS:
+            self._pop_to(tag)
+            self._closed_void_tags[tag] += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._push(tag)
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if self._closed_void_tags[tag]:
+            # The end tag of a void element that has already been closed e.g. <br></br>
+            self._closed_void_tags[tag] -= 1
+        else:
+            self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_charref(self, name):
+        number_pattern = _DECIMAL_PATTERN
+        base = 10
+        if name[:1] in ('x', 'X'):
+            name = name[1:]
+            number_pattern = _HEX_PATTERN
+            base = 16
+
+        match = number_pattern.match(name)
+        if match:
+            self._data.append(UnicodeDammit.numeric_character_reference(int(match.group(1), base))[0])
+            name = match.group(2)
+        self._data.append(name)
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self._data.append(character if character is not None else f"&{name}")
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            # CDATA is text even inside non-text tags
+            self._data.append(data[6:])
+            self._flush(force=True)
+
+    def close(self):
+        super().close()
+        self.close_data()
+
+    def close_data(self) -> None:
+        """End the last string of the document."""
+        self._flush()
+
+    def _flush(self, force: bool = False) -> None:
+        """End the current string and keep it if it's part of the text.
+
+        Args:
+            force: Keep the string even inside a non-text tag.
+        """
+        if not self._data:
+            return
+
+        data = ''.join(self._data)
+        self._data.clear()
+
+        if not self._preserve_depths and not data.strip(_ASCII_SPACES):
+            data = '\n' if '\n' in data else ' '
+
+        if force or not self._non_text_depths:
+            self.text.append(data)
+
+    def _push(self, tag: str) -> None:
+        """Open a tag."""
+        self._flush()
+        depth = len(self._stack)
+        self._stack.append(tag)
+        self._open_tags[tag] += 1
+
+        if tag in _PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depths.append(depth)
+        if tag in _NON_TEXT_TAGS:
+            self._non_text_depths.append(depth)
+
+    def _pop_to(self, tag: str) -> None:
+        """Close the most recently opened tag with the given name and all tags opened after it.
+        Does nothing if no such tag is open.
+        """
+        self._flush()
+        while self._open_tags[tag]:
+            name = self._stack.pop()
+            depth = len(self._stack)
+            self._open_tags[name] -= 1
+
+            if self._preserve_depths and self._preserve_depths[-1] == depth:
+                self._preserve_depths.pop()
+            if self._non_text_depths and self._non_text_depths[-1] == depth:
+                self._non_text_depths.pop()
+
+            if name == tag:
+                break
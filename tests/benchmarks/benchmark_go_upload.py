@@ -0,0 +1,67 @@
+"""Benchmark encoding the json body of a GetOrganized document upload.
+
+Compares encoding the whole payload with json.dumps to reading the streamed go_api.DocumentBody
+in the blocks requests sends it in. The streamed body leaves out the spaces after commas,
+so it's also smaller:
+    python -m tests.benchmarks.benchmark_go_upload --sizes 1 10 50
+
+Tracing the peak memory makes both a few times slower, so use --no-memory for accurate timings.
+"""
+
+import argparse
+import json
+import os
+
+from itk_dev_shared_components.getorganized.go_api import DocumentBody
+from tests.benchmarks.benchmark_util import measure
+
+
+PAYLOAD = {
+    "CaseId": "EMN-2024-000001",
+    "ListName": "Dokumenter",
+    "FolderPath": None,
+    "FileName": "benchmark.pdf",
+    "Metadata": "<z:row xmlns:z='#RowsetSchema' ows_Dato='01-01-2024'/>",
+    "Overwrite": True
+}
+
+# The block size requests uses to send file like bodies
+BLOCK_SIZE = 8192
+
+
+def encode_list(file: bytes) -> int:
+    """Encode the body the old way with the bytes as a list in memory."""
+    return len(json.dumps({**PAYLOAD, "Bytes": list(file)}).encode())
+
+
+def encode_stream(file: bytes) -> int:
+    """Encode the body by reading a DocumentBody in blocks."""
+    body = DocumentBody(PAYLOAD, file)
+    size = 0
+    while block := body.read(BLOCK_SIZE):
+        size += len(block)
+    return size
+
+
+def main() -> None:
+    """Run the benchmarks and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="The file sizes in MiB to benchmark with.")
+    parser.add_argument("--no-memory", action="store_true", help="Don't trace the peak memory.")
+    args = parser.parse_args()
+
+    print(f"{'Method':<8} {'File MiB':>9} {'Body MiB':>9} {'Seconds':>9} {'MiB/s':>8} {'Peak MiB':>9}")
+    for size in args.sizes:
+        file = os.urandom(int(size * 1024 * 1024))
+        if json.loads(DocumentBody(PAYLOAD, file).read()) != {**PAYLOAD, "Bytes": list(file)}:
+            raise RuntimeError("The streamed body differs from the payload.")
+
+        for method, function in (("list", encode_list), ("stream", encode_stream)):
+            with measure(not args.no_memory) as measurement:
+                body_size = function(file)
+            print(f"{method:<8} {size:>9.1f} {body_size / 1024 / 1024:>9.1f} {measurement.seconds:>9.2f} "
+                  f"{size / measurement.seconds:>8.1f} {measurement.peak_text:>9}")
+
+
+if __name__ == "__main__":
+    main()
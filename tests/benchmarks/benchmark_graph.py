@@ -0,0 +1,114 @@
+"""Benchmark listing, downloading and moving emails against the local fake Graph server.
+
+The server runs in a separate process, so the measured time and memory only belong to the client:
+    python -m tests.benchmarks.benchmark_graph --scales 1000 10000 100000 --latency 0.01
+
+Every 100th email has a 64 KiB attachment, so downloading fetches the attachments of 1 % of the emails.
+Tracing the peak memory makes the client a few times slower, so use --no-memory for accurate timings.
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+
+from itk_dev_shared_components.graph import mail
+from tests.benchmarks.benchmark_util import measure
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer, connect
+
+
+USER = "benchmark@test.dk"
+FOLDER = "Inbox/Benchmark"
+DONE_FOLDER = "Inbox/Benchmark done"
+
+
+def serve(connection, scale: int, latency: float, throttle_every: int | None) -> None:
+    """Run a fake Graph server with a mailbox of the given size until told to stop.
+    This is run in a separate process.
+
+    Args:
+        connection: A pipe to send the url of the server on and receive the stop message from.
+        scale: The number of emails in the mailbox.
+        latency: The latency of the server in seconds.
+        throttle_every: Throttle every nth request or None.
+    """
+    server = FakeGraphServer(latency=latency, throttle_every=throttle_every)
+    server.graph.add_emails(USER, FOLDER, scale, attachment_every=100)
+    server.graph.add_folder(USER, DONE_FOLDER)
+
+    with server:
+        connection.send(server.url)
+        connection.recv()
+        connection.send((server.request_count, server.throttled_count))
+
+
+def run_operations(graph_access: FakeGraphAccess, scale: int, max_workers: int, trace_memory: bool) -> list:
+    """Run the benchmarked operations against the mailbox.
+
+    Returns:
+        A list of tuples of operation, scale, number of items and Measurement.
+    """
+    results = []
+
+    with measure(trace_memory) as measurement:
+        emails = list(mail.iter_emails(USER, FOLDER, graph_access, page_size=1000, fields=("subject", "sender", "received_time", "has_attachments")))
+    results.append(("list", scale, len(emails), measurement))
+
+    with tempfile.TemporaryDirectory() as temp_dir, measure(trace_memory) as measurement:
+        emails_with_attachments = [email for email in emails if email.has_attachments]
+        downloaded = sum(1 for _ in mail.fetch_attachments(emails_with_attachments, temp_dir, graph_access, max_workers=max_workers))
+    results.append(("download attachments", scale, downloaded, measurement))
+
+    with measure(trace_memory) as measurement:
+        responses = mail.move_emails(emails, DONE_FOLDER, graph_access)
+    results.append(("move", scale, sum(response.ok for response in responses), measurement))
+
+    return results
+
+
+def run_scale(scale: int, latency: float, throttle_every: int | None, max_workers: int, trace_memory: bool) -> list:
+    """Run the benchmarks against a mailbox with the given number of emails on a server in another process.
+
+    Returns:
+        A list of tuples of operation, scale, number of items and Measurement.
+    """
+    parent_connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(child_connection, scale, latency, throttle_every), daemon=True)
+    process.start()
+
+    try:
+        graph_access = FakeGraphAccess()
+        connect(graph_access, parent_connection.recv(), pool_size=max_workers)
+        results = run_operations(graph_access, scale, max_workers, trace_memory)
+
+        parent_connection.send("stop")
+        request_count, throttled_count = parent_connection.recv()
+        print(f"{scale} emails: {request_count} requests, {throttled_count} throttled")
+    finally:
+        process.terminate()
+        process.join()
+
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks and print a report."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="The numbers of emails to benchmark with.")
+    parser.add_argument("--latency", type=float, default=0, help="The latency of the server in seconds.")
+    parser.add_argument("--throttle-every", type=int, default=None, help="Throttle every nth request.")
+    parser.add_argument("--max-workers", type=int, default=4, help="The number of concurrent downloads.")
+    parser.add_argument("--no-memory", action="store_true", help="Don't trace the peak memory.")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        results += run_scale(scale, args.latency, args.throttle_every, args.max_workers, not args.no_memory)
+
+    print()
+    print(f"{'Operation':<22} {'Emails':>8} {'Items':>8} {'Seconds':>9} {'Items/s':>10} {'Peak MiB':>9}")
+    for operation, scale, items, measurement in results:
+        print(f"{operation:<22} {scale:>8} {items:>8} {measurement.seconds:>9.2f} {items / measurement.seconds:>10.0f} {measurement.peak_text:>9}")
+
+
+if __name__ == "__main__":
+    main()
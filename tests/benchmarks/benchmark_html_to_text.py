@@ -0,0 +1,62 @@
+"""Benchmark misc.html_util.html_to_text against BeautifulSoup.
+
+Run with a folder of html files, e.g. email bodies saved from real mailboxes:
+    python -m tests.benchmarks.benchmark_html_to_text path/to/folder
+
+Without a folder the sample mails from the tests are used.
+"""
+
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from itk_dev_shared_components.misc.html_util import html_to_text
+from tests.test_misc.test_html_util import OUTLOOK_MAIL, NEWSLETTER_MAIL, MALFORMED_MAIL
+
+
+def load_corpus(folder: str | None) -> list[str]:
+    """Load the html files in a folder or create a corpus from the sample mails.
+
+    Args:
+        folder: The folder to load .html and .htm files from or None.
+
+    Returns:
+        A list of html documents.
+    """
+    if folder is None:
+        # Simulate long newsletters by repeating each sample
+        return [html * 50 for html in (OUTLOOK_MAIL, NEWSLETTER_MAIL, MALFORMED_MAIL)]
+
+    corpus = []
+    for file_name in sorted(os.listdir(folder)):
+        if file_name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(folder, file_name), encoding='utf-8', errors='replace') as file:
+                corpus.append(file.read())
+    return corpus
+
+
+def beautifulsoup_text(html: str) -> str:
+    """The text extraction used by Email.get_text before html_util."""
+    return BeautifulSoup(html, "html.parser").get_text().strip()
+
+
+def main(folder: str | None = None, repeat: int = 5) -> None:
+    """Check that both methods give the same text and print the time of each."""
+    corpus = load_corpus(folder)
+    total_size = sum(len(html) for html in corpus)
+    print(f"{len(corpus)} documents, {total_size / 1_000_000:.1f} M characters")
+
+    mismatches = [i for i, html in enumerate(corpus) if html_to_text(html) != beautifulsoup_text(html)]
+    print(f"Documents with different text: {len(mismatches)} {mismatches[:10]}")
+
+    old_time = min(timeit.repeat(lambda: [beautifulsoup_text(html) for html in corpus], number=1, repeat=repeat))
+    new_time = min(timeit.repeat(lambda: [html_to_text(html) for html in corpus], number=1, repeat=repeat))
+    print(f"BeautifulSoup: {old_time:.3f} s")
+    print(f"html_to_text:  {new_time:.3f} s")
+    print(f"Speedup:       {old_time / new_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
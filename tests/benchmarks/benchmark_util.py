@@ -0,0 +1,45 @@
+"""Helpers shared by the benchmarks to measure and report time and memory."""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import time
+import tracemalloc
+from typing import Iterator
+
+
+@dataclass
+class Measurement:
+    """The time and peak memory of a measured block of code.
+    The values are set when the block is done.
+    """
+    seconds: float = 0
+    peak_bytes: int | None = None
+
+    @property
+    def peak_text(self) -> str:
+        """The peak memory in MiB for a report or '-' if it wasn't traced."""
+        return f"{self.peak_bytes / 1024 / 1024:.1f}" if self.peak_bytes is not None else "-"
+
+
+@contextmanager
+def measure(trace_memory: bool) -> Iterator[Measurement]:
+    """Measure the time and optionally the peak memory of the code in the with block.
+    Tracing the memory makes the code a few times slower.
+
+    Args:
+        trace_memory: Whether to trace the peak memory.
+
+    Yields:
+        The Measurement which is filled in when the block is done.
+    """
+    measurement = Measurement()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        measurement.seconds = time.perf_counter() - start
+        if trace_memory:
+            _, measurement.peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
@@ -0,0 +1,87 @@
+"""A base for the local HTTP servers standing in for external apis in the tests and benchmarks.
+
+A subclass of FakeHTTPServer holds the state of the fake api and sets handler_class
+to a subclass of FakeHTTPHandler, which reads the state through server_state:
+
+    class FakeServer(FakeHTTPServer):
+        handler_class = FakeHandler
+
+    with FakeServer() as server:
+        requests.get(server.url)
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeHTTPHandler(BaseHTTPRequestHandler):
+    """A request handler passing every request on to _handle."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, so Nagle's algorithm would delay every response
+    disable_nagle_algorithm = True
+    server_state: "FakeHTTPServer"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handle a GET request."""
+        self._handle()
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle a POST request."""
+        self._handle()
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """Handle a PUT request."""
+        self._handle()
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """Handle a DELETE request."""
+        self._handle()
+
+    def _handle(self):
+        """Read the request and write the response."""
+        raise NotImplementedError
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Silence logging."""
+
+
+class FakeHTTPServer:
+    """A local HTTP server running in a background thread."""
+    handler_class: type[FakeHTTPHandler]
+
+    def __init__(self) -> None:
+        """Create a new FakeHTTPServer. The server isn't started until start is called."""
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        """The base url of the running server."""
+        return f"http://localhost:{self._server.server_port}"
+
+    def start(self):
+        """Start serving in a background thread.
+
+        Returns:
+            The server itself.
+        """
+        class Handler(self.handler_class):  # pylint: disable=too-few-public-methods
+            """A request handler bound to this server."""
+            server_state = self
+
+        self._server = ThreadingHTTPServer(("localhost", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,273 @@
+"""A local stand-in for the parts of the GetOrganized api used by getorganized.go_api,
+so the module can be tested and benchmarked without a real GO installation.
+
+The server authenticates connections with NTLM like IIS does. A connection that has completed
+the handshake stays authenticated, so requests on reused connections aren't challenged again.
+The number of connections, handshakes and attempts to complete a handshake are counted
+to show how well connections are reused:
+
+    with FakeGOServer() as server:
+        session = go_api.create_session(server.username, server.password)
+        case_id = go_api.create_case(session, server.url, "Title", "Category", "Department", "00.00.00", "EMN")
+        print(server.handshake_count)
+
+Only the behaviour the package relies on is emulated.
+"""
+
+import base64
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import spnego
+from spnego.exceptions import SpnegoError
+
+from tests.fake_http_server import FakeHTTPHandler, FakeHTTPServer
+
+
+_TITLE_PATTERN = re.compile(r'ows_Title="([^"]*)"')
+
+# The message type of an NTLM message is stored at this offset
+_NTLM_TYPE_OFFSET = 8
+_NTLM_NEGOTIATE = 1
+
+
+class _FakeGOHandler(FakeHTTPHandler):
+    """A request handler authenticating a connection with NTLM
+    and passing its requests on to a FakeGOServer.
+    """
+    server_state: "FakeGOServer"
+
+    def setup(self):
+        """Set up a new connection."""
+        super().setup()
+        self.server_state.count("connection_count")
+        self.authenticated = False
+        self.ntlm_context = None
+
+    def _handle(self):
+        """Read the request, authenticate the connection and pass the request to the server."""
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        authorization = self.headers.get("Authorization") or ""
+
+        if authorization.startswith("NTLM "):
+            token = base64.b64decode(authorization[5:])
+            if token[_NTLM_TYPE_OFFSET] == _NTLM_NEGOTIATE:
+                self.authenticated = False
+                self.ntlm_context = spnego.server(protocol="ntlm")
+                challenge = base64.b64encode(self.ntlm_context.step(token)).decode()
+                self._respond(401, None, {"WWW-Authenticate": f"NTLM {challenge}"})
+                return
+
+            self.server_state.count("authenticate_count")
+            try:
+                self.ntlm_context.step(token)
+            except (AttributeError, ValueError, SpnegoError):
+                # The handshake was started on another connection
+                self.ntlm_context = None
+                self._respond(401, "Access denied", {"WWW-Authenticate": "NTLM"})
+                return
+            self.authenticated = True
+            self.server_state.count("handshake_count")
+
+        if not self.authenticated:
+            self._respond(401, "Unauthorized", {"WWW-Authenticate": "NTLM"})
+            return
+
+        status, response_body = self.server_state.handle(self.command, self.path, body)
+        self._respond(status, response_body)
+
+    def _respond(self, status: int, body: dict | str | None, headers: dict | None = None):
+        """Write a response with a json body."""
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeGOServer(FakeHTTPServer):
+    """A local HTTP server emulating GetOrganized cases and documents.
+
+    Latency is added to every authenticated request and with fail_every set every nth
+    authenticated request is answered with HTTP 503, like an overloaded GO server.
+    """
+    handler_class = _FakeGOHandler
+
+    def __init__(self, *, username: str = "TEST\\user", password: str = "password", latency: float = 0,
+                 fail_every: int | None = None) -> None:
+        """Create a new FakeGOServer. The server isn't started until start is called.
+
+        Args:
+            username: The username in 'domain\\username' format accepted by the server. Defaults to 'TEST\\user'.
+            password: The password accepted by the server. Defaults to 'password'.
+            latency: The number of seconds to wait before answering each authenticated request. Defaults to 0.
+            fail_every: Fail every nth authenticated request. None to never fail. Defaults to None.
+        """
+        super().__init__()
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.fail_every = fail_every
+
+        self.cases: dict[str, dict] = {}
+        self.documents: dict[int, dict] = {}
+
+        self.connection_count = 0
+        self.handshake_count = 0
+        self.authenticate_count = 0
+        self.request_count = 0
+        self.failed_count = 0
+
+        self._case_ids = itertools.count(1)
+        self._document_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._user_file: str | None = None
+        self._old_user_file: str | None = None
+
+    def start(self) -> "FakeGOServer":
+        """Start serving in a background thread.
+        The credentials are written to a temporary file pointed to by the NTLM_USER_FILE
+        environment variable, which is how spnego looks up NTLM users, until the server is stopped.
+
+        Returns:
+            The server itself.
+        """
+        domain, _, user = self.username.rpartition("\\")
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+            file.write(f"{domain}:{user}:{self.password}\n")
+        self._user_file = file.name
+        self._old_user_file = os.environ.get("NTLM_USER_FILE")
+        os.environ["NTLM_USER_FILE"] = self._user_file
+        return super().start()
+
+    def stop(self) -> None:
+        """Stop the server."""
+        super().stop()
+
+        if self._user_file:
+            os.remove(self._user_file)
+            self._user_file = None
+            if self._old_user_file is None:
+                os.environ.pop("NTLM_USER_FILE", None)
+            else:
+                os.environ["NTLM_USER_FILE"] = self._old_user_file
+
+    def add_case(self, title: str, case_type: str = "EMN") -> str:
+        """Add a case.
+
+        Args:
+            title: The title of the case.
+            case_type: The case type prefix. Defaults to 'EMN'.
+
+        Returns:
+            The id of the case.
+        """
+        with self._lock:
+            case_id = f"{case_type}-2024-{next(self._case_ids):06d}"
+            self.cases[case_id] = {"title": title, "case_type": case_type}
+        return case_id
+
+    def get_case_documents(self, case_id: str) -> dict[str, bytes]:
+        """Get the documents of a case.
+
+        Args:
+            case_id: The id of the case.
+
+        Returns:
+            A dictionary from file name to the bytes of the document.
+        """
+        with self._lock:
+            return {document["file_name"]: document["data"] for document in self.documents.values() if document["case_id"] == case_id}
+
+    def count(self, counter: str) -> int:
+        """Add one to a counter.
+
+        Args:
+            counter: The name of the counter attribute.
+
+        Returns:
+            The new value of the counter.
+        """
+        with self._lock:
+            value = getattr(self, counter) + 1
+            setattr(self, counter, value)
+            return value
+
+    # pylint: disable-next=too-many-return-statements
+    def handle(self, method: str, path: str, body: bytes) -> tuple[int, dict | str | None]:
+        """Handle an authenticated request.
+
+        Args:
+            method: The HTTP method.
+            path: The path of the request.
+            body: The body of the request.
+
+        Returns:
+            The status and the json body of the response.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        request_number = self.count("request_count")
+        if self.fail_every and request_number % self.fail_every == 0:
+            self.count("failed_count")
+            return 503, "Service Unavailable"
+
+        route = (method, path.split("?")[0])
+        if route == ("POST", "/_goapi/Cases/"):
+            payload = json.loads(body)
+            title = _TITLE_PATTERN.search(payload["MetadataXml"]).group(1)
+            return 200, {"CaseID": self.add_case(title, payload["CaseTypePrefix"])}
+
+        if route == ("POST", "/_goapi/Cases/FindByCaseProperties"):
+            payload = json.loads(body)
+            title = payload["FieldProperties"][0]["Value"]
+            with self._lock:
+                cases = [{"CaseID": case_id} for case_id, case in self.cases.items()
+                         if title in case["title"] and case["case_type"] in payload["CaseTypePrefixes"]]
+            return 200, {"CasesInfo": cases}
+
+        if method == "GET" and path.startswith("/_goapi/Cases/Metadata/"):
+            case_id = path.rsplit("/", 1)[1]
+            with self._lock:
+                case = self.cases.get(case_id)
+            if case is None:
+                return 404, "Case not found"
+            return 200, {"Metadata": f'<z:row xmlns:z="#RowsetSchema" ows_Title="{case["title"]}" ows_CaseID="{case_id}" />'}
+
+        if route == ("POST", "/_goapi/Documents/AddToCase"):
+            return self._add_document(json.loads(body))
+
+        if route == ("DELETE", "/_goapi/Documents/ByDocumentId/"):
+            with self._lock:
+                document = self.documents.pop(json.loads(body)["DocId"], None)
+            return (200, None) if document else (404, "Document not found")
+
+        return 404, "Not found"
+
+    def _add_document(self, payload: dict) -> tuple[int, dict | str]:
+        """Add a document to a case, replacing an existing document with the same name if Overwrite is set."""
+        with self._lock:
+            if payload["CaseId"] not in self.cases:
+                return 404, "Case not found"
+
+            for document_id, document in self.documents.items():
+                if document["case_id"] == payload["CaseId"] and document["file_name"] == payload["FileName"]:
+                    if not payload["Overwrite"]:
+                        return 409, "File already exists"
+                    document["data"] = bytes(payload["Bytes"])
+                    return 200, {"DocId": document_id}
+
+            document_id = next(self._document_ids)
+            self.documents[document_id] = {"case_id": payload["CaseId"], "file_name": payload["FileName"], "data": bytes(payload["Bytes"])}
+        return 200, {"DocId": document_id}
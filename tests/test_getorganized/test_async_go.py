@@ -0,0 +1,91 @@
+"""Tests relating to the getorganized.async_go module."""
+
+import unittest
+import asyncio
+import json
+
+from requests import HTTPError
+
+from itk_dev_shared_components.getorganized.go_client import GOClient
+from itk_dev_shared_components.getorganized.async_go import AsyncGOClient
+from tests.test_getorganized.fake_go_server import FakeGOServer
+
+
+class AsyncGOTest(unittest.TestCase):
+    """Test the AsyncGOClient against a fake GetOrganized server."""
+    def setUp(self):
+        self.server = FakeGOServer(latency=0.01).start()
+        self.addCleanup(self.server.stop)
+        self.client = GOClient(self.server.url, self.server.username, self.server.password, pool_size=4)
+        self.addCleanup(self.client.close)
+
+    def test_methods(self):
+        """Test creating, finding and reading a case and uploading and deleting a document."""
+        async def main():
+            async with AsyncGOClient(self.client) as client:
+                case_id = await client.create_case("Testsag", "Category", "Department", "00.00.00", "EMN")
+                found = await client.find_case("Test", "EMN")
+                metadata = await client.get_case_metadata(case_id)
+                response = await client.upload_document(file=b"Test data", case_id=case_id, filename="test.txt", case_type="EMN")
+                documents = self.server.get_case_documents(case_id)
+                await client.delete_document(json.loads(response)["DocId"])
+            return case_id, found, metadata, documents
+
+        case_id, found, metadata, documents = asyncio.run(main())
+        self.assertEqual(found, [case_id])
+        self.assertIn('ows_Title="Testsag"', metadata)
+        self.assertEqual(documents, {"test.txt": b"Test data"})
+        self.assertEqual(self.server.get_case_documents(case_id), {})
+
+    def test_bounded_concurrency(self):
+        """Test that many calls overlap on the connections of the client's pool."""
+        case_id = self.server.add_case("Testsag")
+
+        async def main():
+            async with AsyncGOClient(self.client) as client:
+                return await asyncio.gather(*(client.find_case("Test", "EMN") for _ in range(100)))
+
+        results = asyncio.run(main())
+        self.assertEqual(results, [[case_id]] * 100)
+        self.assertLessEqual(self.server.connection_count, 4)
+
+    def test_concurrent_uploads(self):
+        """Test uploading many documents at a time and that a failing upload doesn't stop the others."""
+        case_id = self.server.add_case("Testsag")
+
+        async def main():
+            async with AsyncGOClient(self.client) as client:
+                uploads = [client.upload_document(file=f"File {i}".encode(), case_id=case_id, filename=f"file{i}.txt", case_type="EMN")
+                           for i in range(20)]
+                uploads.append(client.upload_document(file=b"Missing", case_id="EMN-0000-000000", filename="missing.txt", case_type="EMN"))
+                return await asyncio.gather(*uploads, return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertEqual(len({json.loads(result)["DocId"] for result in results[:20]}), 20)
+        self.assertIsInstance(results[20], HTTPError)
+        self.assertEqual(results[20].response.status_code, 404)
+
+        files = self.server.get_case_documents(case_id)
+        self.assertEqual(files, {f"file{i}.txt": f"File {i}".encode() for i in range(20)})
+        self.assertLessEqual(self.server.connection_count, 4)
+
+    def test_upload_errors(self):
+        """Test that an error from the server is raised by the awaited upload."""
+        self.server.fail_every = 1
+
+        async def main():
+            async with AsyncGOClient(self.client) as client:
+                await client.upload_document(file=b"Test", case_id=self.server.add_case("Testsag"), filename="test.txt", case_type="EMN")
+
+        with self.assertRaises(HTTPError) as context:
+            asyncio.run(main())
+        self.assertEqual(context.exception.response.status_code, 503)
+
+    def test_wrong_usage(self):
+        """Test that a concurrency below 1 is rejected."""
+        with self.assertRaises(ValueError):
+            AsyncGOClient(self.client, max_concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
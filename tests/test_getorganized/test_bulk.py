@@ -0,0 +1,70 @@
+"""Tests relating to the getorganized.go_bulk module."""
+
+import unittest
+import io
+import os
+import tempfile
+
+from itk_dev_shared_components.getorganized.go_client import GOClient
+from itk_dev_shared_components.getorganized.go_bulk import DocumentUpload, upload_documents
+from tests.test_getorganized.fake_go_server import FakeGOServer
+
+
+class GOBulkTest(unittest.TestCase):
+    """Test bulk uploads against a fake GetOrganized server."""
+    def setUp(self):
+        self.server = FakeGOServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = GOClient(self.server.url, self.server.username, self.server.password, pool_size=4)
+        self.addCleanup(self.client.close)
+        self.case_id = self.server.add_case("Testsag")
+
+    def test_upload_documents(self):
+        """Test uploading paths, bytes and streams while the server fails every third request."""
+        self.server.fail_every = 3
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            documents = []
+            for i in range(10):
+                path = os.path.join(temp_dir, f"file{i}.txt")
+                with open(path, 'wb') as file:
+                    file.write(f"File {i}".encode())
+                documents.append(DocumentUpload(case_id=self.case_id, filename=f"file{i}.txt", file=path, case_type="EMN"))
+
+            documents.append(DocumentUpload(case_id=self.case_id, filename="bytes.txt", file=b"Bytes", case_type="EMN"))
+            documents.append(DocumentUpload(case_id=self.case_id, filename="stream.txt", file=io.BytesIO(b"Stream"), case_type="EMN"))
+
+            # Concurrent uploads can make the same document hit the failing requests several times in a row
+            report = upload_documents(iter(documents), self.client, max_workers=4, max_retries=10, retry_delay=0)
+
+        self.assertEqual(len(report.succeeded), 12, report.failed)
+        self.assertGreater(self.server.failed_count, 0)
+        self.assertTrue(any(result.attempts > 1 for result in report.results))
+
+        files = self.server.get_case_documents(self.case_id)
+        self.assertEqual(files["file7.txt"], b"File 7")
+        self.assertEqual(files["bytes.txt"], b"Bytes")
+        self.assertEqual(files["stream.txt"], b"Stream")
+
+    def test_upload_failure(self):
+        """Test that a document failing with a permanent error isn't retried and doesn't stop the others."""
+        documents = [
+            DocumentUpload(case_id="EMN-0000-000000", filename="missing.txt", file=b"Test", case_type="EMN"),
+            DocumentUpload(case_id=self.case_id, filename="test.txt", file=b"Test", case_type="EMN")
+        ]
+
+        report = upload_documents(documents, self.client, retry_delay=0)
+        self.assertEqual(len(report.succeeded), 1)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.failed[0].document.filename, "missing.txt")
+        self.assertEqual(report.failed[0].attempts, 1)
+        self.assertIn("404", report.failed[0].error)
+
+    def test_wrong_usage(self):
+        """Test that max_workers below 1 is rejected."""
+        with self.assertRaises(ValueError):
+            upload_documents([], self.client, max_workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
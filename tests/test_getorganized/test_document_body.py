@@ -0,0 +1,66 @@
+"""Tests relating to the json body of document uploads in the GetOrganized module."""
+
+import unittest
+import io
+import json
+import os
+
+from itk_dev_shared_components.getorganized.go_api import DocumentBody
+
+
+PAYLOAD = {
+    "CaseId": "EMN-2024-000001",
+    "ListName": "Dokumenter",
+    "FolderPath": None,
+    "FileName": "Æblegrød.txt",
+    "Metadata": "<z:row xmlns:z='#RowsetSchema' ows_Dato='01-01-2024'/>",
+    "Overwrite": True
+}
+
+
+class DocumentBodyTest(unittest.TestCase):
+    """Test the streamed json body of document uploads."""
+    def test_body(self):
+        """Test that the body is the same json as the payload with the bytes as a list."""
+        for data in (b"", b"\x00", b"Test", bytes(range(256)), os.urandom(100_000)):
+            body = DocumentBody(PAYLOAD, data, chunk_size=1000)
+            text = body.read()
+            self.assertEqual(len(text), len(body))
+            self.assertEqual(json.loads(text), {**PAYLOAD, "Bytes": list(data)})
+
+    def test_file(self):
+        """Test that a file object is read from its current position."""
+        data = os.urandom(10_000)
+        file = io.BytesIO(b"skip" + data)
+        file.seek(4)
+
+        body = DocumentBody(PAYLOAD, file, chunk_size=1000)
+        self.assertEqual(body.read(), DocumentBody(PAYLOAD, bytearray(data)).read())
+
+    def test_seek(self):
+        """Test that the body can be rewound and read again like requests_ntlm does."""
+        body = DocumentBody(PAYLOAD, os.urandom(10_000), chunk_size=1000)
+        text = body.read()
+
+        body.seek(-len(body), os.SEEK_CUR)
+        self.assertEqual(body.tell(), 0)
+        self.assertEqual(body.read(), text)
+
+        body.seek(100)
+        self.assertEqual(body.read(50), text[100:150])
+
+        with self.assertRaises(ValueError):
+            body.seek(-1)
+
+    def test_read_after_end(self):
+        """Test that reading after the end of the body returns nothing until it's rewound."""
+        body = DocumentBody(PAYLOAD, b"Test")
+        text = body.read()
+        self.assertEqual(body.read(), b"")
+
+        body.seek(0)
+        self.assertEqual(body.read(), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
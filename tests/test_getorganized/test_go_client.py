@@ -0,0 +1,98 @@
+"""Tests relating to the getorganized.go_client module."""
+
+import unittest
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import HTTPError, Session
+from requests_ntlm import HttpNtlmAuth
+
+from itk_dev_shared_components.getorganized import go_api
+from itk_dev_shared_components.getorganized.go_client import GOClient
+from tests.test_getorganized.fake_go_server import FakeGOServer
+
+
+class GOClientTest(unittest.TestCase):
+    """Test the GOClient against a fake GetOrganized server."""
+    def setUp(self):
+        self.server = FakeGOServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_methods(self):
+        """Test creating, finding and reading a case and uploading and deleting a document."""
+        with GOClient(self.server.url, self.server.username, self.server.password) as client:
+            case_id = client.create_case("Testsag", "Category", "Department", "00.00.00", "EMN")
+            self.assertEqual(client.find_case("Test", "EMN"), [case_id])
+            self.assertEqual(client.find_case("Test", "GEO"), [])
+            self.assertIn('ows_Title="Testsag"', client.get_case_metadata(case_id))
+
+            response = client.upload_document(file=b"Test data", case_id=case_id, filename="test.txt", case_type="EMN")
+            self.assertEqual(self.server.get_case_documents(case_id), {"test.txt": b"Test data"})
+
+            client.delete_document(json.loads(response)["DocId"])
+            self.assertEqual(self.server.get_case_documents(case_id), {})
+
+        self.assertEqual(self.server.handshake_count, 1)
+
+    def test_upload_handshake(self):
+        """Test uploading as the first request on new connections, so the body is sent in every leg of the handshake."""
+        case_id = self.server.add_case("Testsag")
+
+        with GOClient(self.server.url, self.server.username, self.server.password) as client:
+            with ThreadPoolExecutor(4) as executor:
+                list(executor.map(lambda i: client.upload_document(file=bytes([i]) * 1000, case_id=case_id, filename=f"{i}.txt", case_type="EMN"), range(4)))
+
+        self.assertEqual(self.server.get_case_documents(case_id), {f"{i}.txt": bytes([i]) * 1000 for i in range(4)})
+
+    def test_session_upload_handshake(self):
+        """Test uploading with a session from go_api.create_session as the first request on a new connection."""
+        case_id = self.server.add_case("Testsag")
+
+        session = go_api.create_session(self.server.username, self.server.password)
+        go_api.upload_document(apiurl=self.server.url, file=b"Test data", case_id=case_id, filename="test.txt", session=session, case_type="EMN")
+
+        self.assertEqual(self.server.get_case_documents(case_id), {"test.txt": b"Test data"})
+        self.assertEqual(self.server.handshake_count, 1)
+
+    def test_plain_session_upload_handshake(self):
+        """Test uploading with a session that only has HttpNtlmAuth as the first request on a new connection."""
+        case_id = self.server.add_case("Testsag")
+
+        with Session() as session:
+            session.auth = HttpNtlmAuth(self.server.username, self.server.password)
+            go_api.upload_document(apiurl=self.server.url, file=io.BytesIO(b"Test data"), case_id=case_id, filename="test.txt",
+                                   session=session, case_type="EMN")
+
+        self.assertEqual(self.server.get_case_documents(case_id), {"test.txt": b"Test data"})
+        self.assertEqual(self.server.handshake_count, 1)
+
+    def test_wrong_password(self):
+        """Test that a handshake failing because of a wrong password isn't retried."""
+        case_id = self.server.add_case("Testsag")
+
+        with GOClient(self.server.url, self.server.username, "wrong password") as client:
+            with self.assertRaises(HTTPError) as context:
+                client.upload_document(file=b"Test data", case_id=case_id, filename="test.txt", case_type="EMN")
+
+        self.assertEqual(context.exception.response.status_code, 401)
+        self.assertEqual(self.server.authenticate_count, 1)
+        self.assertEqual(self.server.handshake_count, 0)
+        self.assertEqual(self.server.get_case_documents(case_id), {})
+
+    def test_connection_reuse(self):
+        """Test that many threads sharing a client reuse the authenticated connections of the pool."""
+        self.server.add_case("Testsag")
+
+        with GOClient(self.server.url, self.server.username, self.server.password, pool_size=4) as client:
+            with ThreadPoolExecutor(16) as executor:
+                results = list(executor.map(lambda _: client.find_case("Test", "EMN"), range(400)))
+
+        self.assertEqual(len(results), 400)
+        self.assertLessEqual(self.server.connection_count, 4)
+        # A handshake can be interrupted by another thread and redone
+        self.assertLessEqual(self.server.handshake_count, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
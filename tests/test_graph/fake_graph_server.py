@@ -0,0 +1,912 @@
+"""A local stand-in for the parts of the Graph api used by graph.mail, graph.site and graph.file,
+so the graph modules can be tested and benchmarked without a real tenant.
+
+FakeGraph holds mailboxes and sites in memory and FakeGraphServer serves it over HTTP
+with configurable latency and throttling. Use FakeGraphServer.connect to send the requests
+of a GraphAccess object to the server instead of graph.microsoft.com. FakeGraphAccess
+is a GraphAccess object that doesn't need a tenant:
+
+    with FakeGraphServer() as server:
+        server.graph.add_email("test@test.dk", "Inbox", subject="Hello")
+        graph_access = FakeGraphAccess()
+        server.connect(graph_access)
+        mail.get_emails_from_folder("test@test.dk", "Inbox", graph_access)
+
+Only the behaviour the package relies on is emulated. Filters support the expressions
+created by mail.iter_emails and requests in batches are only throttled if FakeGraph.batch_throttle_every is set.
+"""
+
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import itertools
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from itk_dev_shared_components.graph import common
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from itk_dev_shared_components.graph.file import QuickXorHash
+from tests.fake_http_server import FakeHTTPHandler, FakeHTTPServer
+
+
+GRAPH_URL = "https://graph.microsoft.com/"
+
+# The folders every mailbox is created with and their well known names
+_DEFAULT_FOLDERS = {"inbox": "Inbox", "deleteditems": "Deleted Items", "sentitems": "Sent Items", "drafts": "Drafts"}
+
+_FILTER_PATTERN = re.compile(r"\(?(\w+) (eq|ne|gt|ge|lt|le) ([^ )]+)\)?")
+
+
+# pylint: disable-next=too-few-public-methods
+class FakeGraphAccess(GraphAccess):
+    """A GraphAccess object that returns a fixed token instead of authenticating with MSAL."""
+    def __init__(self, tenant: str = "test"):
+        super().__init__(None, [])
+        self.tenant = tenant
+
+    @property
+    def tenant_key(self) -> str:
+        return f"{self.tenant}:fake"
+
+    def get_access_token(self):
+        return "token"
+
+
+class FakeGraphError(Exception):
+    """An error response from the fake Graph api."""
+    def __init__(self, status: int, code: str, message: str = "") -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+    def to_response(self) -> tuple[int, dict, dict]:
+        """Get the error as a response in Graph's error format."""
+        return self.status, {}, {"error": {"code": self.code, "message": self.message}}
+
+
+@dataclass
+class _Folder:
+    id: str
+    display_name: str
+    parent_id: str | None
+    well_known_name: str | None = None
+    message_ids: dict[str, None] = field(default_factory=dict)
+
+
+@dataclass
+class _Attachment:
+    id: str
+    name: str
+    data: bytes
+
+
+@dataclass
+class _Message:
+    id: str
+    folder_id: str
+    properties: dict
+    attachments: list[_Attachment]
+
+
+@dataclass
+class _Mailbox:
+    folders: dict[str, _Folder] = field(default_factory=dict)
+    messages: dict[str, _Message] = field(default_factory=dict)
+
+
+@dataclass
+class _DriveItem:
+    id: str
+    path: str
+    data: bytes | None
+    last_modified: str
+    version: int = 1
+
+    @property
+    def name(self) -> str:
+        """The name of the item."""
+        return self.path.rpartition("/")[2]
+
+
+@dataclass
+class _Drive:
+    site: dict
+    items: dict[str, _DriveItem] = field(default_factory=dict)
+    ids: dict[str, _DriveItem] = field(default_factory=dict)
+
+
+@dataclass
+class _UploadSession:
+    id: str
+    site_id: str
+    path: str
+    conflict_behavior: str
+    data: bytearray = field(default_factory=bytearray)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeGraph:
+    """The in-memory state of the fake Graph api and the logic of its endpoints.
+    All methods are thread safe.
+
+    Set batch_throttle_every to throttle every nth request inside json batches.
+    """
+    def __init__(self) -> None:
+        self.mailboxes: dict[str, _Mailbox] = {}
+        self.drives: dict[str, _Drive] = {}
+        self.upload_sessions: dict[str, _UploadSession] = {}
+        self.batch_throttle_every: int | None = None
+        self._batch_item_count = 0
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._routes = [
+            ("POST", r"/v1.0/\$batch", self._batch),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/mailFolders", self._list_folders),
+            ("POST", r"/v1.0/users/(?P<user>[^/]+)/mailFolders", self._create_folder),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/mailFolders/(?P<folder>[^/]+)/childFolders", self._list_folders),
+            ("POST", r"/v1.0/users/(?P<user>[^/]+)/mailFolders/(?P<folder>[^/]+)/childFolders", self._create_folder),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/mailFolders/(?P<folder>[^/]+)/messages", self._list_messages),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)", self._get_message),
+            ("DELETE", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)", self._delete_message),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)/\$value", self._get_message_mime),
+            ("POST", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)/move", self._move_message),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)/attachments", self._list_attachments),
+            ("GET", r"/v1.0/users/(?P<user>[^/]+)/messages/(?P<message>[^/]+)/attachments/(?P<attachment>[^/]+)/\$value", self._get_attachment_data),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/root/children", self._list_children),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/root:/(?P<path>.+?):/children", self._list_children),
+            ("PUT", r"/v1.0/sites/(?P<site>[^/:]+)/drive/root:/(?P<path>.+?):/content", self._put_content),
+            ("POST", r"/v1.0/sites/(?P<site>[^/:]+)/drive/root:/(?P<path>.+?):/createUploadSession", self._create_upload_session),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/root:/(?P<path>[^:]+)", self._get_drive_item),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/items/(?P<item>[^/]+)", self._get_drive_item),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/items/(?P<item>[^/]+)/children", self._list_children),
+            ("GET", r"/v1.0/sites/(?P<site>[^/:]+)/drive/items/(?P<item>[^/]+)/content", self._get_content),
+            ("GET", r"/v1.0/sites/(?P<site>.+)", self._get_site),
+            ("GET", r"/upload/(?P<session>[^/]+)", self._get_upload_session),
+            ("PUT", r"/upload/(?P<session>[^/]+)", self._upload_chunk),
+        ]
+        self._routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in self._routes]
+
+    # Setup
+
+    def add_mailbox(self, user: str) -> None:
+        """Create a mailbox with the default folders if it doesn't exist.
+
+        Args:
+            user: The email address of the user.
+        """
+        with self._lock:
+            if user.lower() in self.mailboxes:
+                return
+            mailbox = _Mailbox()
+            for well_known_name, display_name in _DEFAULT_FOLDERS.items():
+                folder_id = self._new_id("AQMk")
+                mailbox.folders[folder_id] = _Folder(folder_id, display_name, None, well_known_name)
+            self.mailboxes[user.lower()] = mailbox
+
+    def add_folder(self, user: str, folder_path: str) -> str:
+        """Create a mail folder and any missing parent folders.
+
+        Args:
+            user: The email address of the user.
+            folder_path: The absolute path of the folder e.g. 'Inbox/Economy/May'
+
+        Returns:
+            The id of the folder.
+        """
+        with self._lock:
+            self.add_mailbox(user)
+            mailbox = self.mailboxes[user.lower()]
+            parent_id = None
+            for name in folder_path.split("/"):
+                folder = self._find_child_folder(mailbox, parent_id, name)
+                if folder is None:
+                    folder = _Folder(self._new_id("AQMk"), name, parent_id)
+                    mailbox.folders[folder.id] = folder
+                parent_id = folder.id
+            return parent_id
+
+    def add_email(self, user: str, folder_path: str, *, subject: str = "Test subject", body: str = "<p>Test</p>",
+                  sender: str = "sender@test.dk", received_time: datetime | None = None, is_read: bool = False,
+                  attachments: dict[str, bytes] | None = None) -> str:
+        """Create an email in a mail folder. The folder is created if it doesn't exist.
+
+        Args:
+            user: The email address of the user.
+            folder_path: The absolute path of the folder.
+            subject: The subject of the email.
+            body: The html body of the email.
+            sender: The email address of the sender.
+            received_time: The time the email was received. Defaults to now.
+            is_read: Whether the email has been read.
+            attachments: The attachments of the email by file name. Defaults to None.
+
+        Returns:
+            The id of the email.
+        """
+        received_time = received_time or datetime.now(timezone.utc)
+        with self._lock:
+            folder_id = self.add_folder(user, folder_path)
+            mailbox = self.mailboxes[user.lower()]
+            message_id = self._new_id("AAMk")
+            properties = {
+                "receivedDateTime": received_time.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "from": {"emailAddress": {"name": sender, "address": sender}},
+                "toRecipients": [{"emailAddress": {"name": user, "address": user}}],
+                "subject": subject,
+                "body": {"contentType": "html", "content": body},
+                "hasAttachments": bool(attachments),
+                "isRead": is_read
+            }
+            attachment_list = [_Attachment(self._new_id("AAMkAtt"), name, data) for name, data in (attachments or {}).items()]
+            mailbox.messages[message_id] = _Message(message_id, folder_id, properties, attachment_list)
+            mailbox.folders[folder_id].message_ids[message_id] = None
+            return message_id
+
+    def add_emails(self, user: str, folder_path: str, count: int, *, attachment_every: int = 0, attachment_size: int = 64 * 1024) -> None:
+        """Create a number of numbered test emails in a mail folder.
+
+        Args:
+            user: The email address of the user.
+            folder_path: The absolute path of the folder.
+            count: The number of emails to create.
+            attachment_every: Give every nth email an attachment. 0 for no attachments. Defaults to 0.
+            attachment_size: The size of the attachments in bytes. Defaults to 64 KiB.
+        """
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        attachment_data = bytes(range(256)) * (attachment_size // 256) + bytes(attachment_size % 256)
+        for i in range(count):
+            attachments = {f"attachment{i}.pdf": attachment_data} if attachment_every and i % attachment_every == 0 else None
+            self.add_email(user, folder_path, subject=f"Email {i}", body=f"<p>Email number {i}</p>",
+                           received_time=start + timedelta(seconds=i), attachments=attachments)
+
+    def get_folder_emails(self, user: str, folder_path: str) -> list[dict]:
+        """Get the emails in a mail folder.
+
+        Args:
+            user: The email address of the user.
+            folder_path: The absolute path of the folder.
+
+        Returns:
+            The emails as Graph message json dictionaries.
+        """
+        with self._lock:
+            mailbox = self.mailboxes[user.lower()]
+            folder = mailbox.folders[self.add_folder(user, folder_path)]
+            return [self._message_json(mailbox.messages[message_id], None) for message_id in folder.message_ids]
+
+    def add_site(self, site_path: str, name: str = "Test site") -> str:
+        """Create a site with an empty drive.
+
+        Args:
+            site_path: The path of the site e.g. 'test.sharepoint.com:/sites/Test'
+            name: The name of the site.
+
+        Returns:
+            The id of the site.
+        """
+        with self._lock:
+            site_id = f"test.sharepoint.com,{self._new_id('')},{self._new_id('')}"
+            now = _now()
+            self.drives[site_id] = _Drive(site={
+                "id": site_id,
+                "name": name,
+                "displayName": name,
+                "description": "",
+                "webUrl": f"https://{site_path.replace(':', '')}",
+                "createdDateTime": now,
+                "lastModifiedDateTime": now,
+                "sitePath": site_path
+            })
+            return site_id
+
+    def add_file(self, site_id: str, path: str, data: bytes) -> str:
+        """Create or replace a file on a site. Missing folders are created.
+
+        Args:
+            site_id: The id of the site.
+            path: The path of the file from the root of the drive.
+            data: The contents of the file.
+
+        Returns:
+            The id of the file.
+        """
+        with self._lock:
+            return self._put_file(site_id, path.strip("/"), data).id
+
+    def delete_file(self, site_id: str, path: str) -> None:
+        """Delete a file on a site.
+
+        Args:
+            site_id: The id of the site.
+            path: The path of the file from the root of the drive.
+        """
+        with self._lock:
+            drive = self.drives[site_id]
+            item = drive.items.pop(path.strip("/").lower())
+            del drive.ids[item.id]
+
+    def get_file(self, site_id: str, path: str) -> bytes | None:
+        """Get the contents of a file on a site.
+
+        Args:
+            site_id: The id of the site.
+            path: The path of the file from the root of the drive.
+
+        Returns:
+            The contents of the file or None if it doesn't exist.
+        """
+        with self._lock:
+            item = self.drives[site_id].items.get(path.strip("/").lower())
+            return item.data if item else None
+
+    # Request handling
+
+    def handle(self, method: str, url: str, headers: dict, body: bytes, base_url: str) -> tuple[int, dict, dict | bytes | None]:
+        """Handle a request to the fake Graph api.
+
+        Args:
+            method: The HTTP method.
+            url: The path and query string of the request.
+            headers: The headers of the request.
+            body: The body of the request.
+            base_url: The url of the server used in upload urls.
+
+        Returns:
+            The status, headers and body of the response. The body is a json object, bytes or None.
+        """
+        parts = urlsplit(url)
+        path = unquote(parts.path)
+        query = dict(parse_qsl(parts.query))
+
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                request = _Request(method, path, query, headers, body, base_url, match.groupdict())
+                try:
+                    with self._lock:
+                        return handler(request)
+                except FakeGraphError as e:
+                    return e.to_response()
+
+        return FakeGraphError(400, "BadRequest", f"Unsupported request: {method} {path}").to_response()
+
+    def _batch(self, request: "_Request") -> tuple:
+        responses = []
+        for item in json.loads(request.body)['requests']:
+            self._batch_item_count += 1
+            if self.batch_throttle_every and self._batch_item_count % self.batch_throttle_every == 0:
+                headers = {"Retry-After": "0", "x-ms-throttle-reason": "MailboxConcurrency"}
+                responses.append({"id": item['id'], "status": 429, "headers": headers, "body": {"error": {"code": "TooManyRequests", "message": "Too many requests."}}})
+                continue
+
+            body = json.dumps(item['body']).encode() if 'body' in item else b""
+            status, headers, response_body = self.handle(item['method'], "/v1.0" + item['url'], item.get('headers', {}), body, request.base_url)
+            if isinstance(response_body, bytes):
+                response_body = base64.b64encode(response_body).decode()
+            responses.append({"id": item['id'], "status": status, "headers": headers, "body": response_body})
+        return 200, {}, {"responses": responses}
+
+    # Mail
+
+    def _list_folders(self, request: "_Request") -> tuple:
+        mailbox = self._get_mailbox(request)
+        parent_id = self._get_folder(mailbox, request.params['folder']).id if 'folder' in request.params else None
+        folders = [
+            {
+                "id": folder.id,
+                "displayName": folder.display_name,
+                "parentFolderId": folder.parent_id,
+                "childFolderCount": sum(1 for f in mailbox.folders.values() if f.parent_id == folder.id),
+                "totalItemCount": len(folder.message_ids)
+            }
+            for folder in mailbox.folders.values() if folder.parent_id == parent_id
+        ]
+        return 200, {}, _page(folders, request, default_page_size=10)
+
+    def _create_folder(self, request: "_Request") -> tuple:
+        mailbox = self._get_mailbox(request)
+        parent_id = self._get_folder(mailbox, request.params['folder']).id if 'folder' in request.params else None
+        name = request.json()['displayName']
+        if self._find_child_folder(mailbox, parent_id, name):
+            raise FakeGraphError(409, "ErrorFolderExists", "A folder with the specified name already exists.")
+
+        folder = _Folder(self._new_id("AQMk"), name, parent_id)
+        mailbox.folders[folder.id] = folder
+        return 201, {}, {"id": folder.id, "displayName": name, "parentFolderId": parent_id, "childFolderCount": 0}
+
+    def _list_messages(self, request: "_Request") -> tuple:
+        mailbox = self._get_mailbox(request)
+        folder = self._get_folder(mailbox, request.params['folder'])
+        messages = [mailbox.messages[message_id] for message_id in folder.message_ids]
+
+        if "$filter" in request.query:
+            messages = [m for m in messages if _matches_filter(m.properties, request.query["$filter"])]
+
+        orderby = request.query.get("$orderby", "receivedDateTime desc").split()
+        messages.sort(key=lambda m: m.properties.get(orderby[0]), reverse=orderby[-1].lower() == "desc")
+
+        select = request.query.get("$select")
+        page = _page(messages, request, default_page_size=10)
+        page['value'] = [self._message_json(m, select) for m in page['value']]
+        return 200, {}, page
+
+    def _get_message(self, request: "_Request") -> tuple:
+        message = self._get_message_object(request)
+        return 200, {}, self._message_json(message, request.query.get("$select"))
+
+    def _delete_message(self, request: "_Request") -> tuple:
+        mailbox = self._get_mailbox(request)
+        message = self._get_message_object(request)
+        del mailbox.messages[message.id]
+        del mailbox.folders[message.folder_id].message_ids[message.id]
+        return 204, {}, None
+
+    def _get_message_mime(self, request: "_Request") -> tuple:
+        message = self._get_message_object(request)
+        properties = message.properties
+        mime = (f"From: {properties['from']['emailAddress']['address']}\r\n"
+                f"Subject: {properties['subject']}\r\n"
+                f"Content-Type: text/html; charset=utf-8\r\n\r\n"
+                f"{properties['body']['content']}\r\n")
+        return _send_bytes(mime.encode(), request)
+
+    def _move_message(self, request: "_Request") -> tuple:
+        mailbox = self._get_mailbox(request)
+        message = self._get_message_object(request)
+        destination = self._get_folder(mailbox, request.json()['destinationId'])
+
+        # Graph gives moved messages a new id
+        del mailbox.messages[message.id]
+        del mailbox.folders[message.folder_id].message_ids[message.id]
+        message.id = self._new_id("AAMk")
+        message.folder_id = destination.id
+        mailbox.messages[message.id] = message
+        destination.message_ids[message.id] = None
+
+        return 201, {}, self._message_json(message, None)
+
+    def _list_attachments(self, request: "_Request") -> tuple:
+        message = self._get_message_object(request)
+        attachments = [{"id": a.id, "name": a.name, "size": len(a.data)} for a in message.attachments]
+        return 200, {}, {"value": attachments}
+
+    def _get_attachment_data(self, request: "_Request") -> tuple:
+        message = self._get_message_object(request)
+        for attachment in message.attachments:
+            if attachment.id == request.params['attachment']:
+                return _send_bytes(attachment.data, request)
+        raise FakeGraphError(404, "ErrorItemNotFound", "The attachment wasn't found.")
+
+    def _get_mailbox(self, request: "_Request") -> _Mailbox:
+        mailbox = self.mailboxes.get(request.params['user'].lower())
+        if mailbox is None:
+            raise FakeGraphError(404, "ErrorInvalidUser", f"The requested user '{request.params['user']}' is invalid.")
+        return mailbox
+
+    def _get_folder(self, mailbox: _Mailbox, folder_id: str) -> _Folder:
+        folder = mailbox.folders.get(folder_id)
+        if folder is None:
+            folder = next((f for f in mailbox.folders.values() if f.well_known_name == folder_id.lower()), None)
+        if folder is None:
+            raise FakeGraphError(404, "ErrorItemNotFound", "The specified folder could not be found in the store.")
+        return folder
+
+    def _get_message_object(self, request: "_Request") -> _Message:
+        message = self._get_mailbox(request).messages.get(request.params['message'])
+        if message is None:
+            raise FakeGraphError(404, "ErrorItemNotFound", "The specified object was not found in the store.")
+        return message
+
+    @staticmethod
+    def _find_child_folder(mailbox: _Mailbox, parent_id: str | None, name: str) -> _Folder | None:
+        return next((f for f in mailbox.folders.values() if f.parent_id == parent_id and f.display_name == name), None)
+
+    @staticmethod
+    def _message_json(message: _Message, select: str | None) -> dict:
+        properties = message.properties
+        if select:
+            properties = {key: value for key, value in properties.items() if key in select.split(",")}
+        return {"id": message.id, **properties}
+
+    # Sites and drives
+
+    def _get_site(self, request: "_Request") -> tuple:
+        site_ref = request.params['site']
+        for site_id, drive in self.drives.items():
+            if site_ref in (site_id, drive.site['sitePath']):
+                return 200, {}, {key: value for key, value in drive.site.items() if key != "sitePath"}
+        raise FakeGraphError(404, "itemNotFound", "Requested site could not be found")
+
+    def _get_drive_item(self, request: "_Request") -> tuple:
+        drive, item = self._get_item_object(request)
+        select = request.query.get("$select")
+        item_json = self._drive_item_json(drive, item)
+        if select:
+            item_json = {key: value for key, value in item_json.items() if key == "id" or key in select.split(",")}
+        return 200, {}, item_json
+
+    def _list_children(self, request: "_Request") -> tuple:
+        drive = self._get_drive(request)
+        if 'path' in request.params or 'item' in request.params:
+            _, folder = self._get_item_object(request)
+            folder_path = folder.path
+        else:
+            folder_path = ""
+
+        children = [item for item in drive.items.values() if item.path.rpartition("/")[0].lower() == folder_path.lower()]
+        page = _page(children, request, default_page_size=200)
+        page['value'] = [self._drive_item_json(drive, item) for item in page['value']]
+        return 200, {}, page
+
+    def _get_content(self, request: "_Request") -> tuple:
+        _, item = self._get_item_object(request)
+        if item.data is None:
+            raise FakeGraphError(400, "notSupported", "Folders have no content.")
+        return _send_bytes(item.data, request)
+
+    def _put_content(self, request: "_Request") -> tuple:
+        conflict_behavior = request.query.get("@microsoft.graph.conflictBehavior", "replace")
+        path = self._resolve_conflict(request.params['site'], request.params['path'], conflict_behavior)
+        existed = path.lower() in self._get_drive(request).items
+        item = self._put_file(request.params['site'], path, request.body)
+        return 200 if existed else 201, {}, self._drive_item_json(self._get_drive(request), item)
+
+    def _create_upload_session(self, request: "_Request") -> tuple:
+        self._get_drive(request)
+        conflict_behavior = request.json().get("item", {}).get("@microsoft.graph.conflictBehavior", "replace")
+        session = _UploadSession(self._new_id("session"), request.params['site'], request.params['path'], conflict_behavior)
+        self.upload_sessions[session.id] = session
+        return 200, {}, {"uploadUrl": f"{request.base_url}/upload/{session.id}", "expirationDateTime": _now(hours=1)}
+
+    def _get_upload_session(self, request: "_Request") -> tuple:
+        session = self._get_upload_session_object(request)
+        return 200, {}, {"expirationDateTime": _now(hours=1), "nextExpectedRanges": [f"{len(session.data)}-"]}
+
+    def _upload_chunk(self, request: "_Request") -> tuple:
+        session = self._get_upload_session_object(request)
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", request.headers.get("Content-Range", ""))
+        if match is None:
+            raise FakeGraphError(400, "invalidRequest", "Missing or invalid Content-Range header.")
+
+        start, end, total = (int(value) for value in match.groups())
+        if start != len(session.data) or end - start + 1 != len(request.body):
+            raise FakeGraphError(416, "invalidRange", f"Expected the range to start at {len(session.data)}.")
+
+        session.data += request.body
+        if len(session.data) < total:
+            return 202, {}, {"expirationDateTime": _now(hours=1), "nextExpectedRanges": [f"{len(session.data)}-"]}
+
+        del self.upload_sessions[session.id]
+        path = self._resolve_conflict(session.site_id, session.path, session.conflict_behavior)
+        item = self._put_file(session.site_id, path, bytes(session.data))
+        return 201, {}, self._drive_item_json(self.drives[session.site_id], item)
+
+    def _get_upload_session_object(self, request: "_Request") -> _UploadSession:
+        if "Authorization" in request.headers:
+            raise FakeGraphError(401, "unauthenticated", "Upload urls must not be sent with an access token.")
+        session = self.upload_sessions.get(request.params['session'])
+        if session is None:
+            raise FakeGraphError(404, "itemNotFound", "The upload session wasn't found.")
+        return session
+
+    def _get_drive(self, request: "_Request") -> _Drive:
+        drive = self.drives.get(request.params['site'])
+        if drive is None:
+            raise FakeGraphError(404, "itemNotFound", "Requested site could not be found")
+        return drive
+
+    def _get_item_object(self, request: "_Request") -> tuple[_Drive, _DriveItem]:
+        drive = self._get_drive(request)
+        if 'item' in request.params:
+            item = drive.ids.get(request.params['item'])
+        else:
+            item = drive.items.get(request.params['path'].strip("/").lower())
+        if item is None:
+            raise FakeGraphError(404, "itemNotFound", "The resource could not be found.")
+        return drive, item
+
+    def _resolve_conflict(self, site_id: str, path: str, conflict_behavior: str) -> str:
+        """Get the path a file should be written to, given what to do if it exists."""
+        items = self.drives[site_id].items
+        path = path.strip("/")
+        if path.lower() not in items or conflict_behavior == "replace":
+            return path
+        if conflict_behavior == "fail":
+            raise FakeGraphError(409, "nameAlreadyExists", "The specified item name already exists.")
+
+        stem, dot, extension = path.rpartition(".") if "." in path.rpartition("/")[2] else (path, "", "")
+        for i in itertools.count(1):
+            new_path = f"{stem} {i}{dot}{extension}"
+            if new_path.lower() not in items:
+                return new_path
+        return path
+
+    def _put_file(self, site_id: str, path: str, data: bytes) -> _DriveItem:
+        """Create or replace a file and create its missing parent folders."""
+        drive = self.drives[site_id]
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            folder_path = "/".join(parts[:i])
+            if folder_path.lower() not in drive.items:
+                folder = _DriveItem(self._new_id("01"), folder_path, None, _now())
+                drive.items[folder_path.lower()] = folder
+                drive.ids[folder.id] = folder
+
+        item = drive.items.get(path.lower())
+        if item is None:
+            item = _DriveItem(self._new_id("01"), path, data, _now())
+            drive.items[path.lower()] = item
+            drive.ids[item.id] = item
+        else:
+            item.data = data
+            item.last_modified = _now()
+            item.version += 1
+        return item
+
+    @staticmethod
+    def _drive_item_json(drive: _Drive, item: _DriveItem) -> dict:
+        item_json = {
+            "id": item.id,
+            "name": item.name,
+            "webUrl": f"{drive.site['webUrl']}/Shared Documents/{item.path}",
+            "lastModifiedDateTime": item.last_modified,
+            "eTag": f"\"{{{item.id}}},{item.version}\""
+        }
+        if item.data is None:
+            children = sum(1 for i in drive.items.values() if i.path.rpartition("/")[0].lower() == item.path.lower())
+            item_json.update(size=0, folder={"childCount": children})
+        else:
+            item_json.update(size=len(item.data), file={"hashes": {"quickXorHash": QuickXorHash(item.data).b64digest()}})
+        return item_json
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):012d}"
+
+
+@dataclass
+class _Request:
+    """A request to the fake Graph api."""
+    method: str
+    path: str
+    query: dict[str, str]
+    headers: dict
+    body: bytes
+    base_url: str
+    params: dict[str, str]
+
+    def json(self) -> dict:
+        """Get the body as json."""
+        return json.loads(self.body) if self.body else {}
+
+
+def _page(items: list, request: _Request, default_page_size: int) -> dict:
+    """Get a page of items with a next link to the next page like Graph's pagination."""
+    page_size = int(request.query.get("$top", default_page_size))
+    skip = int(request.query.get("$skip", 0))
+    page = {"value": items[skip:skip + page_size]}
+
+    if skip + page_size < len(items):
+        query = dict(request.query, **{"$skip": str(skip + page_size)})
+        page["@odata.nextLink"] = f"{GRAPH_URL}{request.path.lstrip('/')}?{urlencode(query)}"
+    return page
+
+
+def _send_bytes(data: bytes, request: _Request) -> tuple:
+    """Get a response with binary data, honoring a Range header."""
+    match = re.fullmatch(r"bytes=(\d+)-(\d*)", request.headers.get("Range", ""))
+    if match is None:
+        return 200, {}, data
+
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else len(data) - 1
+    return 206, {"Content-Range": f"bytes {start}-{end}/{len(data)}"}, data[start:end + 1]
+
+
+def _matches_filter(properties: dict, filter_: str) -> bool:
+    """Check if a message matches a filter made of conditions combined with 'and'."""
+    for condition in filter_.split(" and "):
+        match = _FILTER_PATTERN.fullmatch(condition.strip())
+        if match is None:
+            raise FakeGraphError(400, "BadRequest", f"Unsupported filter: {condition}")
+
+        name, operator, value = match.groups()
+        actual = properties.get(name)
+        expected = {"true": True, "false": False}.get(value, value.strip("'"))
+        if isinstance(actual, bool) != isinstance(expected, bool):
+            raise FakeGraphError(400, "BadRequest", f"Unsupported filter value: {condition}")
+
+        if not {
+            "eq": actual == expected, "ne": actual != expected,
+            "gt": actual > expected, "ge": actual >= expected,
+            "lt": actual < expected, "le": actual <= expected
+        }[operator]:
+            return False
+    return True
+
+
+def _now(hours: float = 0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class _FakeGraphHandler(FakeHTTPHandler):
+    """A request handler passing requests on to the FakeGraph of a FakeGraphServer."""
+    server_state: "FakeGraphServer"
+
+    def _handle(self):
+        """Read the request, pass it to the FakeGraph and write the response."""
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        state = self.server_state
+
+        if state.latency:
+            time.sleep(state.latency)
+
+        is_upload = self.path.startswith("/upload/")
+        throttle_status = state.get_throttle_status()
+        if throttle_status == 429:
+            status, headers, response_body = 429, {"Retry-After": str(state.retry_after)}, {"error": {"code": "TooManyRequests", "message": "Application is over its MailboxConcurrency limit."}}
+        elif throttle_status:
+            status, headers, response_body = throttle_status, {"Retry-After": str(state.retry_after)}, {"error": {"code": "serviceNotAvailable", "message": "Service is unavailable."}}
+        elif not is_upload and not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            status, headers, response_body = FakeGraphError(401, "InvalidAuthenticationToken", "Access token is empty.").to_response()
+        elif not is_upload and self.headers["Authorization"].removeprefix("Bearer ") in state.revoked_tokens:
+            status, headers, response_body = FakeGraphError(401, "InvalidAuthenticationToken", "Access token has been revoked.").to_response()
+        else:
+            request_headers = {name: value for name, value in self.headers.items() if not (state.ignore_range and name == "Range")}
+            status, headers, response_body = state.graph.handle(self.command, self.path, request_headers, body, state.url)
+
+        if response_body is None:
+            data, content_type = b"", None
+        elif isinstance(response_body, bytes):
+            data, content_type = response_body, "application/octet-stream"
+        else:
+            data, content_type = json.dumps(response_body).encode(), "application/json"
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        if state.should_drop(self.command, self.path):
+            # Cut the response off halfway like a dropped connection
+            self.wfile.write(data[:len(data) // 2])
+            self.close_connection = True
+            return
+
+        self.wfile.write(data)
+
+
+# pylint: disable-next=too-many-instance-attributes
+class FakeGraphServer(FakeHTTPServer):
+    """A local HTTP server serving a FakeGraph.
+
+    Latency is added to every request and with throttle_every set every nth request
+    is answered with HTTP 429 and a Retry-After header, like Graph does when throttling.
+    Use throttle_next and drop_next to make the next requests fail.
+    Set ignore_range to ignore Range headers like servers that don't support ranges
+    and add tokens to revoked_tokens to reject them.
+    """
+    handler_class = _FakeGraphHandler
+
+    def __init__(self, graph: FakeGraph | None = None, *, latency: float = 0, throttle_every: int | None = None,
+                 retry_after: float = 0) -> None:
+        """Create a new FakeGraphServer. The server isn't started until start is called.
+
+        Args:
+            graph: The state to serve. Defaults to a new empty FakeGraph.
+            latency: The number of seconds to wait before answering each request. Defaults to 0.
+            throttle_every: Throttle every nth request. None to never throttle. Defaults to None.
+            retry_after: The Retry-After value of throttled responses in seconds. Defaults to 0.
+        """
+        super().__init__()
+        self.graph = graph or FakeGraph()
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled_count = 0
+        self.dropped_count = 0
+        self.ignore_range = False
+        self.revoked_tokens: set[str] = set()
+        self._throttle_statuses: list[int] = []
+        self._drops: list[tuple[str | None, str]] = []
+        self._lock = threading.Lock()
+
+    def connect(self, graph_access: GraphAccess, **client_settings) -> common.GraphClient:
+        """Configure a new GraphClient for the GraphAccess object that sends all requests
+        to graph.microsoft.com to this server instead. See connect.
+
+        Args:
+            graph_access: The GraphAccess object.
+            **client_settings: The settings of the GraphClient. See common.GraphClient.
+
+        Returns:
+            The new GraphClient.
+        """
+        return connect(graph_access, self.url, **client_settings)
+
+    def throttle_next(self, count: int = 1, *, status: int = 429) -> None:
+        """Throttle the next requests with a Retry-After header.
+
+        Args:
+            count: The number of requests to throttle. Defaults to 1.
+            status: The status of the responses, e.g. 503 for an unavailable service. Defaults to 429.
+        """
+        with self._lock:
+            self._throttle_statuses.extend([status] * count)
+
+    def drop_next(self, path_prefix: str = "/", count: int = 1, *, method: str | None = None) -> None:
+        """Drop the connection halfway through the response of the next requests to a path.
+        The requests are handled before the connection is dropped.
+
+        Args:
+            path_prefix: The start of the paths of the requests to drop. Defaults to all paths.
+            count: The number of requests to drop. Defaults to 1.
+            method: The HTTP method of the requests to drop. None for all methods. Defaults to None.
+        """
+        with self._lock:
+            self._drops.extend([(method, path_prefix)] * count)
+
+    def get_throttle_status(self) -> int | None:
+        """Count a request and decide if it should be throttled.
+
+        Returns:
+            The status to throttle the request with or None to handle it.
+        """
+        with self._lock:
+            self.request_count += 1
+            if self._throttle_statuses:
+                status = self._throttle_statuses.pop(0)
+            elif self.throttle_every and self.request_count % self.throttle_every == 0:
+                status = 429
+            else:
+                return None
+            self.throttled_count += 1
+            return status
+
+    def should_drop(self, method: str, path: str) -> bool:
+        """Decide if the connection should be dropped in the response to a request."""
+        with self._lock:
+            for i, (drop_method, path_prefix) in enumerate(self._drops):
+                if method == (drop_method or method) and path.startswith(path_prefix):
+                    del self._drops[i]
+                    self.dropped_count += 1
+                    return True
+            return False
+
+
+def connect(graph_access: GraphAccess, url: str, **client_settings) -> common.GraphClient:
+    """Configure a new GraphClient for the GraphAccess object that sends all requests
+    to graph.microsoft.com to a fake Graph server instead, e.g. one running in another process.
+
+    Args:
+        graph_access: The GraphAccess object.
+        url: The base url of the fake Graph server.
+        **client_settings: The settings of the GraphClient. See common.GraphClient.
+
+    Returns:
+        The new GraphClient.
+    """
+    client = common.configure_client(graph_access, **client_settings)
+    pool_size = client_settings.get("pool_size", 10)
+    client.session.mount(GRAPH_URL, _RedirectAdapter(url, pool_connections=pool_size, pool_maxsize=pool_size))
+    return client
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """A transport adapter that sends requests to graph.microsoft.com to another url."""
+    def __init__(self, base_url: str, **kwargs) -> None:
+        self.base_url = base_url
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):  # pylint: disable=arguments-differ
+        request.url = f"{self.base_url}/{request.url[len(GRAPH_URL):]}"
+        return super().send(request, *args, **kwargs)
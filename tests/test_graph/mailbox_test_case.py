@@ -0,0 +1,28 @@
+"""A base class of the tests that run against the test mailbox of a real tenant.
+The credentials and folders are read from the GRAPH_API, MAIL_USER, MAIL_FOLDER1 and MAIL_FOLDER2 environment variables.
+"""
+
+import unittest
+import json
+import os
+
+from dotenv import load_dotenv
+
+from itk_dev_shared_components.graph import authentication
+
+load_dotenv()
+
+
+class MailboxTestCase(unittest.TestCase):
+    """A test case with a GraphAccess object, the test user and two test folders."""
+    @classmethod
+    def setUpClass(cls) -> None:
+        credentials = json.loads(os.environ['GRAPH_API'])
+        cls.graph_access = authentication.authorize_by_username_password(
+            credentials['username'], credentials['password'],
+            tenant_id=credentials['tenant_id'], client_id=credentials['client_id']
+        )
+
+        cls.user = os.environ['MAIL_USER']
+        cls.folder1 = os.environ['MAIL_FOLDER1']
+        cls.folder2 = os.environ['MAIL_FOLDER2']
@@ -0,0 +1,103 @@
+"""Tests relating to the graph.async_graph module."""
+
+import unittest
+import asyncio
+import threading
+import time
+
+from requests import HTTPError
+
+from itk_dev_shared_components.graph import async_graph, mail
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+USERS = ("test1@test.dk", "test2@test.dk")
+
+
+class AsyncGraphTest(unittest.TestCase):
+    """Tests relating to the graph.async_graph module."""
+    def test_bounded_concurrency(self):
+        """Test that calls run concurrently but never more than max_concurrency at a time."""
+        lock = threading.Lock()
+        running = 0
+        max_running = 0
+
+        def work(value):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return value * 2
+
+        async def main():
+            async with async_graph.AsyncGraphAccess(FakeGraphAccess(), max_concurrency=3) as graph_access:
+                token = await graph_access.get_access_token()
+                results = await asyncio.gather(*(graph_access.run(work, i) for i in range(12)))
+            return token, results
+
+        token, results = asyncio.run(main())
+        self.assertEqual(token, "token")
+        self.assertEqual(results, [i * 2 for i in range(12)])
+        self.assertEqual(max_running, 3)
+
+    def test_mail(self):
+        """Test the async mail functions on several mailboxes at a time against the fake Graph server."""
+        with FakeGraphServer(throttle_every=5) as server:
+            graph_access = FakeGraphAccess()
+            server.connect(graph_access)
+            mail.folder_cache.invalidate()
+            for user in USERS:
+                server.graph.add_emails(user, "Inbox/Queue", 6, attachment_every=2, attachment_size=100)
+                server.graph.add_folder(user, "Inbox/Done")
+
+            async def main():
+                async with async_graph.AsyncGraphAccess(graph_access, max_concurrency=4) as async_access:
+                    folders = await asyncio.gather(*(async_graph.get_emails_from_folder(user, "Inbox/Queue", async_access, fields=("subject", "has_attachments"))
+                                                     for user in USERS))
+                    emails = [email for folder in folders for email in folder]
+
+                    with_attachments = [email for email in emails if email.has_attachments]
+                    attachments = await asyncio.gather(*(async_graph.list_email_attachments(email, async_access) for email in with_attachments))
+                    data = await asyncio.gather(*(async_graph.get_attachment_data(a[0], async_access) for a in attachments))
+
+                    await asyncio.gather(*(async_graph.move_email(email, "Inbox/Done", async_access) for email in emails[:8]))
+                    await asyncio.gather(*(async_graph.delete_email(email, async_access, permanent=True) for email in emails[8:]))
+                return emails, data
+
+            emails, data = asyncio.run(main())
+            self.assertEqual(len(emails), 12)
+            self.assertEqual([len(d.getvalue()) for d in data], [100] * 6)
+            self.assertEqual([len(server.graph.get_folder_emails(user, "Inbox/Done")) for user in USERS], [6, 2])
+            self.assertEqual([len(server.graph.get_folder_emails(user, "Inbox/Queue")) for user in USERS], [0, 0])
+            self.assertGreater(server.throttled_count, 0)
+
+    def test_site(self):
+        """Test uploading and downloading files concurrently against the fake Graph server, including a failing download."""
+        with FakeGraphServer(throttle_every=5) as server:
+            graph_access = FakeGraphAccess()
+            server.connect(graph_access)
+            site_id = server.graph.add_site("test.sharepoint.com:/sites/Test")
+
+            async def main():
+                async with async_graph.AsyncGraphAccess(graph_access, max_concurrency=4) as async_access:
+                    await asyncio.gather(*(async_graph.upload_file_contents(async_access, site_id, f"Folder/File {i}.txt", f"data {i}".encode())
+                                           for i in range(10)))
+                    item_ids = [server.graph.drives[site_id].items[f"folder/file {i}.txt"].id for i in range(10)]
+                    return await asyncio.gather(*(async_graph.download_file_contents(async_access, site_id, item_id)
+                                                  for item_id in item_ids + ["missing"]), return_exceptions=True)
+
+            results = asyncio.run(main())
+            self.assertEqual(results[:10], [f"data {i}".encode() for i in range(10)])
+            self.assertIsInstance(results[10], HTTPError)
+            self.assertEqual(results[10].response.status_code, 404)
+
+    def test_wrong_usage(self):
+        """Test that a concurrency below 1 is rejected."""
+        with self.assertRaises(ValueError):
+            async_graph.AsyncGraphAccess(FakeGraphAccess(), max_concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
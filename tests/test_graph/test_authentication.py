@@ -0,0 +1,66 @@
+"""Tests relating to the graph.authentication module."""
+
+import unittest
+from unittest.mock import patch
+
+from itk_dev_shared_components.graph import authentication
+from itk_dev_shared_components.graph.authentication import GraphAccess
+
+
+class _FakeApp:
+    """An MSAL application that hands out numbered tokens."""
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def get_accounts(self):
+        """Get the accounts of the app."""
+        return ["account"]
+
+    def acquire_token_silent(self, scopes, account):  # pylint: disable=unused-argument
+        """Get a new token."""
+        self.calls += 1
+        return {"access_token": f"token{self.calls}", "expires_in": self.expires_in}
+
+
+class AuthenticationTest(unittest.TestCase):
+    """Tests relating to the graph.authentication module."""
+    def test_token_cache(self):
+        """Test that the token is reused until it's about to expire."""
+        app = _FakeApp()
+        graph_access = GraphAccess(app, [])
+
+        with patch.object(authentication.time, "monotonic", return_value=1000):
+            self.assertEqual(graph_access.get_access_token(), "token1")
+            self.assertEqual(graph_access.get_access_token(), "token1")
+        self.assertEqual(app.calls, 1)
+
+        # Within the refresh margin of the expiry
+        with patch.object(authentication.time, "monotonic", return_value=1000 + 3600 - 60):
+            self.assertEqual(graph_access.get_access_token(), "token2")
+
+        graph_access.invalidate_token()
+        self.assertEqual(graph_access.get_access_token(), "token3")
+
+    def test_short_lived_token(self):
+        """Test that a token valid for less than twice the refresh margin is reused for half its lifetime."""
+        app = _FakeApp(expires_in=300)
+        graph_access = GraphAccess(app, [])
+
+        with patch.object(authentication.time, "monotonic", return_value=1000):
+            self.assertEqual(graph_access.get_access_token(), "token1")
+        with patch.object(authentication.time, "monotonic", return_value=1000 + 149):
+            self.assertEqual(graph_access.get_access_token(), "token1")
+        with patch.object(authentication.time, "monotonic", return_value=1000 + 151):
+            self.assertEqual(graph_access.get_access_token(), "token2")
+
+    def test_error(self):
+        """Test that errors from MSAL are raised."""
+        app = _FakeApp()
+        app.acquire_token_silent = lambda scopes, account: {"error_description": "Bad"}
+        with self.assertRaisesRegex(RuntimeError, "Bad"):
+            GraphAccess(app, []).get_access_token()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Tests relating to the graph.common module."""
+
+import unittest
+import io
+
+from itk_dev_shared_components.graph import common, telemetry
+from itk_dev_shared_components.graph.authentication import GraphAccess
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+USER = "test@test.dk"
+MAIL_FOLDERS = f"https://graph.microsoft.com/v1.0/users/{USER}/mailFolders"
+
+
+class _Sink(io.RawIOBase):
+    """A writable stream that isn't seekable."""
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        return len(b)
+
+
+class _TokenAccess(FakeGraphAccess):
+    """A FakeGraphAccess that caches its token like GraphAccess and gets a new numbered token each time."""
+    get_access_token = GraphAccess.get_access_token
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.token_count = 0
+
+    def _acquire_token(self) -> tuple[str, float]:
+        self.token_count += 1
+        return f"token{self.token_count}", 3600
+
+
+class CommonTest(unittest.TestCase):
+    """Tests relating to the graph.common module."""
+    def setUp(self) -> None:
+        self.server = FakeGraphServer().start()
+        self.addCleanup(self.server.stop)
+        self.graph_access = FakeGraphAccess()
+        self.server.connect(self.graph_access)
+        self.server.graph.add_mailbox(USER)
+
+    def test_retry(self):
+        """Test that throttled requests are retried."""
+        self.server.throttle_next()
+        response = common.get_request(MAIL_FOLDERS, self.graph_access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((self.server.request_count, self.server.throttled_count), (2, 1))
+
+    def test_no_retry(self):
+        """Test that the throttling response is raised when retries are disabled."""
+        self.server.connect(self.graph_access, max_retries=0)
+        self.server.throttle_next()
+        with self.assertRaises(common.requests.HTTPError) as context:
+            common.get_request(MAIL_FOLDERS, self.graph_access)
+        self.assertEqual(context.exception.response.status_code, 429)
+
+    def test_retry_idempotent(self):
+        """Test that HTTP 503 is only retried for idempotent requests."""
+        self.server.throttle_next(status=503)
+        response = common.get_request(MAIL_FOLDERS, self.graph_access)
+        self.assertEqual(response.status_code, 200)
+
+        self.server.throttle_next(status=503)
+        with self.assertRaises(common.requests.HTTPError) as context:
+            common.post_request(MAIL_FOLDERS, self.graph_access, {"displayName": "Unavailable"})
+        self.assertEqual(context.exception.response.status_code, 503)
+
+        self.server.throttle_next()
+        response = common.post_request(MAIL_FOLDERS, self.graph_access, {"displayName": "Throttled"})
+        self.assertEqual(response.json()["displayName"], "Throttled")
+
+        self.assertTrue(common.is_retryable("PATCH", 503, {"Content-Range": "bytes 0-9/10"}))
+        self.assertFalse(common.is_retryable("PATCH", 504))
+        self.assertTrue(common.is_retryable("POST", 429))
+        self.assertFalse(common.is_retryable("GET", 500))
+
+    def test_revoked_token(self):
+        """Test that a rejected token is refreshed and the request is sent once more."""
+        graph_access = _TokenAccess()
+        self.server.connect(graph_access)
+        self.assertEqual(graph_access.get_access_token(), "token1")
+
+        self.server.revoked_tokens.add("token1")
+        response = common.get_request(MAIL_FOLDERS, graph_access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(graph_access.token_count, 2)
+
+        # A new token that is rejected as well isn't retried
+        self.server.revoked_tokens.update(("token2", "token3"))
+        with self.assertRaises(common.requests.HTTPError) as context:
+            common.get_request(MAIL_FOLDERS, graph_access)
+        self.assertEqual(context.exception.response.status_code, 401)
+        self.assertEqual(graph_access.token_count, 3)
+
+    def test_metrics_sink(self):
+        """Test that every attempt of a request is recorded."""
+        stats = telemetry.RequestStats()
+        self.server.connect(self.graph_access, metrics_sink=stats)
+        message_id = self.server.graph.add_email("Metrics@test.dk", "Inbox")
+        self.server.throttle_next()
+        response = common.get_request(f"https://graph.microsoft.com/v1.0/users/Metrics@test.dk/messages/{message_id}", self.graph_access)
+
+        self.assertEqual(len(stats.records), 2)
+        throttled, success = stats.records[0], stats.records[1]
+        self.assertEqual(throttled.status, 429)
+        self.assertEqual(throttled.retry_after, "0")
+        self.assertEqual(success.status, 200)
+        self.assertEqual(success.attempt, 1)
+        self.assertEqual(success.mailbox, "metrics@test.dk")
+        self.assertEqual(success.endpoint_template, "/v1.0/users/{id}/messages/{id}")
+        self.assertEqual(success.response_bytes, len(response.content))
+
+        summary = stats.summary()["GET /v1.0/users/{id}/messages/{id}"]
+        self.assertEqual((summary["count"], summary["throttled"], summary["errors"]), (2, 1, 0))
+        self.assertEqual(stats.throttled_mailboxes(), {"metrics@test.dk": 1})
+        self.assertIn("metrics@test.dk: 1", stats.report())
+
+    def test_stream_download(self):
+        """Test that a dropped download is resumed."""
+        data = bytes(range(256)) * 4000
+        site_id = self.server.graph.add_site("test.sharepoint.com:/sites/Test")
+        item_id = self.server.graph.add_file(site_id, "file.bin", data)
+        self.server.drop_next("/v1.0/sites/")
+
+        file = io.BytesIO()
+        written = common.stream_download(f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item_id}/content",
+                                         self.graph_access, file, chunk_size=1000)
+        self.assertEqual(written, len(data))
+        self.assertEqual(file.getvalue(), data)
+        self.assertEqual(self.server.dropped_count, 1)
+
+        # Without range support the download starts over
+        self.server.ignore_range = True
+        self.server.drop_next("/v1.0/sites/")
+        file = io.BytesIO(b"Existing data")
+        file.seek(0, io.SEEK_END)
+        common.stream_download(f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item_id}/content",
+                               self.graph_access, file, chunk_size=1000)
+        self.assertEqual(file.getvalue(), b"Existing data" + data)
+
+    def test_stream_download_not_seekable(self):
+        """Test that a download to a non-seekable stream fails at once when the server doesn't support ranges."""
+        site_id = self.server.graph.add_site("test.sharepoint.com:/sites/Test")
+        item_id = self.server.graph.add_file(site_id, "file.bin", bytes(range(256)) * 4000)
+        self.server.ignore_range = True
+        self.server.drop_next("/v1.0/sites/")
+
+        with self.assertRaises(common.requests.ConnectionError) as context:
+            common.stream_download(f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/items/{item_id}/content",
+                                   self.graph_access, _Sink(), chunk_size=1000)
+        self.assertIn("isn't seekable", str(context.exception))
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_helpers(self):
+        """Test parsing of mailboxes and Retry-After headers."""
+        self.assertEqual(common.get_mailbox("https://graph.microsoft.com/v1.0/users/Test@Test.dk/messages"), "test@test.dk")
+        self.assertIsNone(common.get_mailbox("https://graph.microsoft.com/v1.0/sites/root"))
+        self.assertEqual(common.parse_retry_after("10"), 10)
+        self.assertEqual(common.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(common.parse_retry_after("foo"))
+        self.assertIsNone(common.parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Tests relating to the graph.drive_sync module and listing drive items against the local fake Graph server."""
+
+import unittest
+import json
+import os
+import tempfile
+
+from itk_dev_shared_components.graph import drive_sync, file
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+SITE_PATH = "test.sharepoint.com:/sites/Test"
+
+
+class DriveSyncTest(unittest.TestCase):
+    """Tests relating to the graph.drive_sync module."""
+    def setUp(self) -> None:
+        self.server = FakeGraphServer(throttle_every=7).start()
+        self.graph_access = FakeGraphAccess()
+        self.server.connect(self.graph_access)
+        self.graph = self.server.graph
+        self.site_id = self.graph.add_site(SITE_PATH)
+
+        temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(temp_dir.cleanup)
+        self.local_dir = temp_dir.name
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_list_drive_items(self):
+        """Test listing a folder with and without subfolders over several pages."""
+        for i in range(205):
+            self.graph.add_file(self.site_id, f"Folder/File {i}.txt", b"data")
+        self.graph.add_file(self.site_id, "Folder/Sub/Deep.txt", b"deep")
+
+        items = list(file.list_drive_items(self.graph_access, self.site_id, "Folder"))
+        self.assertEqual(len(items), 206)
+        self.assertIn("Folder/Sub", {item.path for item in items if item.is_folder})
+
+        items = list(file.list_drive_items(self.graph_access, self.site_id, "/Folder/", recursive=True))
+        self.assertEqual(len(items), 207)
+        deep = items[-1]
+        self.assertEqual(deep.path, "Folder/Sub/Deep.txt")
+        self.assertEqual((deep.size, deep.is_folder), (4, False))
+        self.assertEqual(deep.quick_xor_hash, file.QuickXorHash(b"deep").b64digest())
+
+        self.assertEqual([item.path for item in file.list_drive_items(self.graph_access, self.site_id, "")], ["Folder"])
+
+    def test_sync_folder(self):
+        """Test that only new and changed files are downloaded and that removed files are handled."""
+        self.graph.add_file(self.site_id, "Folder/A.txt", b"a")
+        self.graph.add_file(self.site_id, "Folder/B.txt", b"b")
+        self.graph.add_file(self.site_id, "Folder/Sub/C.txt", b"c")
+
+        result = self.sync()
+        self.assertEqual(sorted(result.downloaded), ["A.txt", "B.txt", "Sub/C.txt"])
+        self.assertEqual(self.read_local("Sub/C.txt"), b"c")
+
+        # The manifest is stored in the local folder
+        with open(os.path.join(self.local_dir, drive_sync.MANIFEST_NAME), encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(sorted(manifest), ["A.txt", "B.txt", "Sub/C.txt"])
+        self.assertEqual(manifest["A.txt"]["size"], 1)
+
+        result = self.sync()
+        self.assertEqual((result.downloaded, sorted(result.unchanged)), ([], ["A.txt", "B.txt", "Sub/C.txt"]))
+
+        # A changed file gets a new eTag
+        self.graph.add_file(self.site_id, "Folder/A.txt", b"changed")
+        self.graph.add_file(self.site_id, "Folder/D.txt", b"d")
+        result = self.sync()
+        self.assertEqual(sorted(result.downloaded), ["A.txt", "D.txt"])
+        self.assertEqual(self.read_local("A.txt"), b"changed")
+
+        # A file missing locally is downloaded again
+        os.remove(os.path.join(self.local_dir, "B.txt"))
+        self.assertEqual(self.sync().downloaded, ["B.txt"])
+
+        # Removed files are only deleted locally when asked to
+        self.graph.delete_file(self.site_id, "Folder/B.txt")
+        self.graph.delete_file(self.site_id, "Folder/Sub/C.txt")
+        result = self.sync()
+        self.assertEqual(sorted(result.removed), ["B.txt", "Sub/C.txt"])
+        self.assertTrue(os.path.isfile(os.path.join(self.local_dir, "B.txt")))
+
+        self.graph.delete_file(self.site_id, "Folder/D.txt")
+        result = self.sync(delete_removed=True)
+        self.assertEqual(result.removed, ["D.txt"])
+        self.assertFalse(os.path.isfile(os.path.join(self.local_dir, "D.txt")))
+        self.assertEqual(self.sync().removed, [])
+
+    def test_sync_last_modified(self):
+        """Test that files are compared by their last modified time when the manifest has no eTag."""
+        self.graph.add_file(self.site_id, "Folder/A.txt", b"a")
+        manifest_path = os.path.join(self.local_dir, "manifest.json")
+        self.sync(manifest_path=manifest_path)
+
+        with open(manifest_path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest["A.txt"]["e_tag"] = None
+        with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        self.assertEqual(self.sync(manifest_path=manifest_path).unchanged, ["A.txt"])
+
+        manifest["A.txt"]["last_modified"] = "2000-01-01T00:00:00Z"
+        with open(manifest_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        self.assertEqual(self.sync(manifest_path=manifest_path).downloaded, ["A.txt"])
+
+    def test_upload_folder(self):
+        """Test that unchanged files are skipped and changed files are replaced, skipped or renamed."""
+        self.write_local("A.txt", b"aaaa")
+        self.write_local("Sub/B.txt", b"b")
+
+        result = self.upload()
+        self.assertEqual(sorted(result.uploaded), ["A.txt", "Sub/B.txt"])
+        self.assertEqual(self.graph.get_file(self.site_id, "Folder/Sub/B.txt"), b"b")
+
+        result = self.upload()
+        self.assertEqual((result.uploaded, sorted(result.skipped)), ([], ["A.txt", "Sub/B.txt"]))
+
+        # A file with the same size but another content has another hash
+        self.write_local("A.txt", b"AAAA")
+        result = self.upload()
+        self.assertEqual((result.uploaded, result.skipped), (["A.txt"], ["Sub/B.txt"]))
+        self.assertEqual(self.graph.get_file(self.site_id, "Folder/A.txt"), b"AAAA")
+
+        self.write_local("A.txt", b"skipped")
+        self.write_local("C.txt", b"c")
+        result = self.upload(conflict="skip")
+        self.assertEqual((result.uploaded, sorted(result.skipped)), (["C.txt"], ["A.txt", "Sub/B.txt"]))
+        self.assertEqual(self.graph.get_file(self.site_id, "Folder/A.txt"), b"AAAA")
+
+        self.write_local("A.txt", b"renamed")
+        result = self.upload(conflict="rename")
+        self.assertEqual(result.uploaded, ["A.txt"])
+        self.assertEqual(self.graph.get_file(self.site_id, "Folder/A.txt"), b"AAAA")
+        self.assertEqual(self.graph.get_file(self.site_id, "Folder/A 1.txt"), b"renamed")
+
+        with self.assertRaises(ValueError):
+            self.upload(conflict="overwrite")
+
+    def sync(self, **kwargs) -> drive_sync.FolderSyncResult:
+        """Sync the remote folder 'Folder' to the local folder."""
+        result = drive_sync.sync_folder(self.graph_access, self.site_id, "Folder", self.local_dir, **kwargs)
+        self.assertEqual(result.failed, {})
+        return result
+
+    def upload(self, **kwargs) -> drive_sync.FolderUploadResult:
+        """Upload the local folder to the remote folder 'Folder'."""
+        result = drive_sync.upload_folder(self.graph_access, self.site_id, self.local_dir, "Folder", **kwargs)
+        self.assertEqual(result.failed, {})
+        return result
+
+    def write_local(self, path: str, data: bytes) -> None:
+        """Write a file in the local folder."""
+        local_path = os.path.join(self.local_dir, path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, 'wb') as local_file:
+            local_file.write(data)
+
+    def read_local(self, path: str) -> bytes:
+        """Read a file in the local folder."""
+        with open(os.path.join(self.local_dir, path), 'rb') as local_file:
+            return local_file.read()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""Tests of the graph modules against the local fake Graph server in fake_graph_server."""
+
+import unittest
+import io
+import os
+import tempfile
+
+from itk_dev_shared_components.graph import common, file, mail, site, telemetry
+from itk_dev_shared_components.graph.mail_queue import MailQueue
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+USER = "test@test.dk"
+
+
+class FakeGraphTest(unittest.TestCase):
+    """Tests of the graph modules against the local fake Graph server."""
+    def setUp(self) -> None:
+        self.server = FakeGraphServer(throttle_every=7).start()
+        self.graph_access = FakeGraphAccess()
+        self.server.connect(self.graph_access)
+        mail.folder_cache.invalidate()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_mail(self):
+        """Test listing, moving and deleting emails and getting their attachments."""
+        graph = self.server.graph
+        graph.add_emails(USER, "Inbox/Queue", 45, attachment_every=10, attachment_size=1000)
+        graph.add_folder(USER, "Inbox/Done")
+
+        emails = mail.get_emails_from_folder(USER, "Inbox/Queue", self.graph_access, limit=1000, fields=("subject", "has_attachments"))
+        self.assertEqual(len(emails), 45)
+        self.assertEqual(emails[0].subject, "Email 44")
+        request_count = self.server.request_count
+        self.assertEqual(emails[1], mail.get_emails_from_folder(USER, "Inbox/Queue", self.graph_access, limit=2, fields=("subject", "has_attachments"))[1])
+        self.assertEqual(self.server.request_count, request_count + 1)
+        self.assertEqual(emails[0].get_text(), "Email number 44")
+
+        email = next(e for e in emails if e.has_attachments)
+        attachments = mail.list_email_attachments(email, self.graph_access)
+        self.assertEqual(len(attachments), 1)
+        attachment = attachments[0]
+        self.assertEqual(mail.get_attachment_data(attachment, self.graph_access).getvalue(), attachment_data(1000))
+
+        unread = list(mail.iter_emails(USER, "Inbox/Queue", self.graph_access, unread_only=True, has_attachments=True, orderby="receivedDateTime"))
+        self.assertEqual([e.subject for e in unread], [f"Email {i}" for i in range(0, 45, 10)])
+
+        old_id = email.id
+        mail.move_email(email, "Inbox/Done", self.graph_access)
+        self.assertNotEqual(email.id, old_id)
+
+        responses = mail.move_emails(list(emails[:30]), "Inbox/Done", self.graph_access)
+        self.assertTrue(all(r.ok for r in responses))
+        self.assertEqual(len(graph.get_folder_emails(USER, "Inbox/Done")), 30)
+
+        mail.delete_email(emails[0], self.graph_access, permanent=True)
+        mail.delete_email(emails[1], self.graph_access)
+        self.assertEqual(len(graph.get_folder_emails(USER, "Inbox/Done")), 28)
+        self.assertEqual(len(graph.get_folder_emails(USER, "Deleted Items")), 1)
+        self.assertGreater(self.server.throttled_count, 0)
+
+    def test_folder_cache(self):
+        """Test that cached folders are resolved without requests and walked from the deepest cached folder."""
+        graph = self.server.graph
+        folder_id = graph.add_folder(USER, "Inbox/Economy/May")
+        self.assertEqual(mail.get_folder_id_from_path(USER, "Inbox/Economy/May", self.graph_access), folder_id)
+
+        request_count = self.server.request_count
+        self.assertEqual(mail.get_folder_id_from_path(USER, "Inbox/Economy/May", self.graph_access), folder_id)
+        self.assertEqual(self.server.request_count, request_count)
+
+        june_id = graph.add_folder(USER, "Inbox/Economy/June")
+        self.assertEqual(mail.get_folder_id_from_path(USER, "Inbox/Economy/June", self.graph_access), june_id)
+        self.assertEqual(self.server.request_count, request_count + 1)
+
+        # Another tenant with the same mailbox address has its own folders
+        with FakeGraphServer() as other_server:
+            other_access = FakeGraphAccess(tenant="other")
+            other_server.connect(other_access)
+            other_server.graph.add_folder(USER, "Inbox/Other")
+            other_id = other_server.graph.add_folder(USER, "Inbox/Economy/May")
+            self.assertNotEqual(other_id, folder_id)
+            self.assertEqual(mail.get_folder_id_from_path(USER, "Inbox/Economy/May", other_access), other_id)
+            self.assertEqual(mail.get_folder_id_from_path(USER, "Inbox/Economy/May", self.graph_access), folder_id)
+
+    def test_batch_metrics(self):
+        """Test that each request in a batch is recorded, including throttled requests."""
+        self.server.throttle_every = None
+        self.server.graph.batch_throttle_every = 5
+        users = ("test1@test.dk", "test2@test.dk")
+        for user in users:
+            self.server.graph.add_emails(user, "Inbox", 5)
+        batch_requests = [{"method": "GET", "url": f"/users/{user}/messages/{email['id']}"}
+                          for user in users for email in self.server.graph.get_folder_emails(user, "Inbox")]
+
+        stats = telemetry.RequestStats()
+        self.server.connect(self.graph_access, metrics_sink=stats)
+        responses = common.batch_request(batch_requests, self.graph_access)
+        self.assertTrue(all(response.ok for response in responses))
+
+        item_records = [record for record in stats.records if record.endpoint_template != "/v1.0/$batch"]
+        self.assertEqual(len(item_records), 12)
+        throttled = [record for record in item_records if record.throttled]
+        self.assertEqual(len(throttled), 2)
+        self.assertEqual((throttled[0].method, throttled[0].endpoint_template), ("GET", "/v1.0/users/{id}/messages/{id}"))
+        self.assertEqual((throttled[0].retry_after, throttled[0].attempt), ("0", 0))
+        self.assertEqual(throttled[0].throttle_headers, {"x-ms-throttle-reason": "MailboxConcurrency"})
+        self.assertEqual(stats.throttled_mailboxes(), {user: 1 for user in users})
+        self.assertEqual([record.attempt for record in item_records if record.status == 200].count(1), 2)
+
+        batch_records = [record for record in stats.records if record.endpoint_template == "/v1.0/$batch"]
+        self.assertEqual([(record.status, record.attempt) for record in batch_records], [(200, 0), (200, 0)])
+
+    def test_mail_queue(self):
+        """Test that two workers process each email exactly once."""
+        self.server.graph.add_emails(USER, "Inbox/Queue", 25)
+        worker1 = MailQueue(USER, "Inbox/Queue", self.graph_access, "worker1")
+        worker2 = MailQueue(USER, "Inbox/Queue", self.graph_access, "worker2")
+
+        claimed = worker1.claim(5)
+        self.assertEqual(len(claimed), 5)
+        self.assertEqual(worker1.recover(), 5)
+
+        subjects = []
+        result1 = worker1.process(lambda email: subjects.append(email.subject), limit=10, batch_size=3)
+        result2 = worker2.process(lambda email: subjects.append(email.subject))
+        self.assertEqual((len(result1.done), len(result2.done)), (10, 15))
+        self.assertEqual(sorted(subjects), sorted(f"Email {i}" for i in range(25)))
+        self.assertEqual(len(self.server.graph.get_folder_emails(USER, "Inbox/Queue/Done")), 25)
+
+    def test_site(self):
+        """Test uploading, listing and downloading files on a site."""
+        graph = self.server.graph
+        site_id = graph.add_site("test.sharepoint.com:/sites/Test")
+        data = os.urandom(site.UPLOAD_CHUNK_MULTIPLE * 3 + 100)
+
+        test_site = site.get_site(self.graph_access, "test.sharepoint.com:/sites/Test", use_cache=False)
+        self.assertEqual(test_site.id, site_id)
+
+        item = site.upload_file(self.graph_access, site_id, "Folder/Big.bin", io.BytesIO(data), chunk_size=site.UPLOAD_CHUNK_MULTIPLE)
+        self.assertEqual(graph.get_file(site_id, "Folder/Big.bin"), data)
+        self.assertEqual(item.quick_xor_hash, file.QuickXorHash(data).b64digest())
+
+        site.upload_file_contents(self.graph_access, site_id, "Folder/Sub/Small.txt", b"small")
+        paths = sorted(i.path for i in file.list_drive_items(self.graph_access, site_id, "Folder", recursive=True))
+        self.assertEqual(paths, ["Folder/Big.bin", "Folder/Sub", "Folder/Sub/Small.txt"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "Big.bin")
+            written = site.download_file(self.graph_access, site_id, item.id, path, verify_checksum=True)
+            self.assertEqual(written, len(data))
+
+        small = file.get_drive_item(self.graph_access, site_id, "Folder/Sub/Small.txt")
+        self.assertEqual(site.download_file_contents(self.graph_access, site_id, small.id), b"small")
+
+
+def attachment_data(size: int) -> bytes:
+    """The attachment data created by FakeGraph.add_emails."""
+    return bytes(range(256)) * (size // 256) + bytes(size % 256)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Tests relating to the graph.file module."""
+
+import unittest
+import os
+
+from itk_dev_shared_components.graph.file import QuickXorHash
+
+
+def _reference_quick_xor_hash(data: bytes) -> bytes:
+    """A direct byte by byte implementation of QuickXorHash."""
+    register = 0
+    shift = 0
+    for byte in data:
+        value = byte << shift
+        register ^= (value & ((1 << 160) - 1)) | (value >> 160)
+        shift = (shift + 11) % 160
+
+    result = bytearray(register.to_bytes(20, 'little'))
+    for i, byte in enumerate(len(data).to_bytes(8, 'little')):
+        result[12 + i] ^= byte
+    return bytes(result)
+
+
+class FileTest(unittest.TestCase):
+    """Tests relating to the graph.file module."""
+    def test_quick_xor_hash(self):
+        """Test QuickXorHash against the reference implementation with data fed in uneven pieces."""
+        self.assertEqual(QuickXorHash().b64digest(), "AAAAAAAAAAAAAAAAAAAAAAAAAAA=")
+
+        for size in (1, 159, 160, 161, 1000, 10_000):
+            data = os.urandom(size)
+            quick_xor_hash = QuickXorHash()
+            for i in range(0, size, 77):
+                quick_xor_hash.update(data[i:i+77])
+
+            self.assertEqual(quick_xor_hash.digest(), _reference_quick_xor_hash(data))
+            self.assertEqual(QuickXorHash(data).digest(), _reference_quick_xor_hash(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 """Tests relating to the graph.mail module."""
 
 import unittest
+import io
 import json
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -66,6 +68,16 @@ class EmailTest(unittest.TestCase):
         file = mail.get_email_as_mime(email, self.graph_access)
         self.assertEqual(file.read(8), b'Received')
 
+        # Stream the attachment and the MIME file and compare to the in-memory versions
+        stream = io.BytesIO()
+        mail.download_attachment(attachment, self.graph_access, stream, chunk_size=1024)
+        self.assertEqual(stream.getvalue(), mail.get_attachment_data(attachment, self.graph_access).getvalue())
+
+        stream = io.BytesIO()
+        size = mail.download_email_as_mime(email, self.graph_access, stream)
+        self.assertEqual(size, len(stream.getvalue()))
+        self.assertEqual(stream.getvalue()[:8], b'Received')
+
         # Move the email
         mail.move_email(email, self.folder2, self.graph_access)
 
@@ -75,6 +87,88 @@ class EmailTest(unittest.TestCase):
         # Move email back
         mail.move_email(email, self.folder1, self.graph_access)
 
+    def test_batch_operations(self):
+        """Test moving emails and listing attachments using json batching."""
+        emails = mail.get_emails_from_folder(self.user, self.folder1, self.graph_access)
+        self.assertEqual(len(emails), 1, "Expected 1 email in test folder!")
+        old_id = emails[0].id
+
+        attachments = mail.list_attachments_bulk(emails, self.graph_access)
+        self.assertEqual(len(attachments), 1)
+        self.assertEqual(len(attachments[0]), 3)
+
+        # Move the email and check the id is updated
+        responses = mail.move_emails(emails, self.folder2, self.graph_access)
+        self.assertTrue(all(r.ok for r in responses))
+        self.assertNotEqual(emails[0].id, old_id)
+
+        # Delete to deleted items folder
+        responses = mail.delete_emails(emails, self.graph_access)
+        self.assertTrue(all(r.ok for r in responses))
+
+        # Move email back
+        responses = mail.move_emails(emails, self.folder1, self.graph_access)
+        self.assertTrue(all(r.ok for r in responses))
+
+    def test_fetch_attachments(self):
+        """Test downloading the attachments of multiple emails concurrently."""
+        emails = mail.get_emails_from_folder(self.user, self.folder1, self.graph_access)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = list(mail.fetch_attachments(emails, temp_dir, self.graph_access))
+            self.assertEqual(len(results), 3)
+
+            for attachment, path in results:
+                self.assertTrue(os.path.isfile(path))
+                self.assertIn(os.path.splitext(attachment.name)[0], os.path.basename(path))
+
+    def test_iter_emails(self):
+        """Test iterating over emails with pagination and filters."""
+        emails = list(mail.iter_emails(self.user, self.folder1, self.graph_access, page_size=1))
+        self.assertEqual(len(emails), 1)
+        self.assertEqual(emails[0].subject, "Test subject")
+
+        emails = list(mail.iter_emails(self.user, self.folder1, self.graph_access, has_attachments=True, filter="subject eq 'Test subject'"))
+        self.assertEqual(len(emails), 1)
+
+        emails = list(mail.iter_emails(self.user, self.folder1, self.graph_access, has_attachments=False))
+        self.assertEqual(len(emails), 0)
+
+        with self.assertRaises(ValueError):
+            next(mail.iter_emails(self.user, self.folder1, self.graph_access, page_size=1001))
+
+    def test_select_fields(self):
+        """Test getting emails with only some fields and loading the body lazily."""
+        emails = mail.get_emails_from_folder(self.user, self.folder1, self.graph_access, fields=("sender", "subject"))
+        email = emails[0]
+        self.assertEqual(email.subject, "Test subject")
+        self.assertIsNone(email.received_time)
+        self.assertIsNone(email.body_type)
+
+        # Accessing the body loads it from Graph
+        self.assertTrue(email.get_text().startswith("Test text"))
+        self.assertIsNotNone(email.body_type)
+
+        with self.assertRaises(ValueError):
+            mail.get_emails_from_folder(self.user, self.folder1, self.graph_access, fields=("foo",))
+
+    def test_folder_cache(self):
+        """Test that cached folder ids match the ids found without the cache."""
+        mail.folder_cache.invalidate()
+        folder_id = mail.get_folder_id_from_path(self.user, self.folder1, self.graph_access, use_cache=False)
+        self.assertIsNone(mail.folder_cache.get(self.graph_access.tenant_key, self.user, self.folder1))
+
+        self.assertEqual(mail.get_folder_id_from_path(self.user, self.folder1, self.graph_access), folder_id)
+        self.assertEqual(mail.folder_cache.get(self.graph_access.tenant_key, self.user, self.folder1), folder_id)
+
+        mail.folder_cache.invalidate(self.graph_access.tenant_key, self.user)
+        self.assertGreater(mail.prewarm_folder_cache(self.user, self.graph_access), 0)
+        self.assertEqual(mail.folder_cache.get(self.graph_access.tenant_key, self.user, self.folder1), folder_id)
+
+        # Invalidating a folder also invalidates its child folders
+        mail.folder_cache.invalidate(self.graph_access.tenant_key, self.user, self.folder1.split("/")[0])
+        self.assertIsNone(mail.folder_cache.get(self.graph_access.tenant_key, self.user, self.folder1))
+
     def test_wrong_usage(self):
         """Test that raised errors actually get raised."""
         with self.assertRaises(ValueError):
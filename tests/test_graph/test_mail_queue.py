@@ -0,0 +1,42 @@
+"""Tests relating to the graph.mail_queue module."""
+
+import unittest
+
+from itk_dev_shared_components.graph import mail
+from itk_dev_shared_components.graph.mail_queue import MailQueue
+from tests.test_graph.mailbox_test_case import MailboxTestCase
+
+
+class MailQueueTest(MailboxTestCase):
+    """Tests relating to the graph.mail_queue module."""
+    def test_process(self):
+        """Test that emails are claimed, processed and moved to the done and failed folders."""
+        queue = MailQueue(self.user, self.folder1, self.graph_access, "test_worker",
+                          done_folder=self.folder2, failed_folder=self.folder2)
+        other_queue = MailQueue(self.user, self.folder1, self.graph_access, "other_worker")
+
+        # Only one worker can claim the email
+        emails = queue.claim(5)
+        self.assertEqual(len(emails), 1)
+        self.assertEqual(other_queue.claim(5), [])
+
+        # A recovered email can be claimed again
+        self.assertEqual(queue.recover(), 1)
+
+        result = queue.process(lambda email: None)
+        self.assertEqual((len(result.done), len(result.failed)), (1, 0))
+        email = result.done[0]
+        mail.move_email(email, self.folder1, self.graph_access)
+
+        def fail(email):
+            raise RuntimeError(email.subject)
+
+        result = queue.process(fail)
+        self.assertEqual(len(result.failed), 1)
+        email, exception = result.failed[0]
+        self.assertEqual(str(exception), "Test subject")
+        mail.move_email(email, self.folder1, self.graph_access)
+
+
+if __name__ == "__main__":
+    unittest.main()
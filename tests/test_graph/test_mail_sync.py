@@ -0,0 +1,54 @@
+"""Tests relating to the graph.mail_sync module."""
+
+import unittest
+import os
+import tempfile
+
+from itk_dev_shared_components.graph import mail
+from itk_dev_shared_components.graph.mail_sync import MailboxSync
+from tests.test_graph.mailbox_test_case import MailboxTestCase
+
+
+class MailSyncTest(MailboxTestCase):
+    """Tests relating to the graph.mail_sync module."""
+    def test_sync(self):
+        """Test that only changes since the last sync are returned."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, "sync.db")
+
+            result = MailboxSync(self.user, self.folder1, self.graph_access, state_path).sync()
+            self.assertEqual(len(result.new), 1)
+            email = result.new[0]
+
+            # A new sync object with the same state file has no changes
+            sync = MailboxSync(self.user, self.folder1, self.graph_access, state_path, fields=("subject",))
+            result = sync.sync()
+            self.assertEqual((len(result.new), len(result.changed), len(result.removed)), (0, 0, 0))
+
+            # Move the email away and back again
+            old_id = email.id
+            mail.move_email(email, self.folder2, self.graph_access)
+            result = sync.sync()
+            self.assertIn(old_id, result.removed)
+
+            mail.move_email(email, self.folder1, self.graph_access)
+            result = sync.sync()
+            self.assertEqual(len(result.new), 1)
+            self.assertEqual(result.new[0].subject, "Test subject")
+
+            # Reset the state and get all emails again
+            sync.reset()
+            result = sync.sync()
+            self.assertEqual(len(result.new), 1)
+
+            # A page that isn't handled is returned again by the next sync
+            sync.reset()
+            pages = sync.iter_sync()
+            self.assertEqual(len(next(pages).new), 1)
+            pages.close()
+            result = sync.sync()
+            self.assertEqual(len(result.new), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests relating to the graph.metadata_cache module."""
+
+import unittest
+import os
+import tempfile
+
+from itk_dev_shared_components.graph import file, metadata_cache, site
+from itk_dev_shared_components.graph.metadata_cache import MetadataCache
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+SITE_PATH = "test.sharepoint.com:/sites/Test"
+
+
+class MetadataCacheTest(unittest.TestCase):
+    """Tests relating to the graph.metadata_cache module."""
+    def test_persistent_cache(self):
+        """Test that entries are shared between caches using the same file and expire after the ttl."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cache.db")
+
+            cache = MetadataCache(path=path)
+            cache.set("site:root", {"id": "site-id"})
+            self.assertEqual(cache.get("site:root"), {"id": "site-id"})
+
+            # A new cache reads the entry from the file
+            self.assertEqual(MetadataCache(path=path).get("site:root"), {"id": "site-id"})
+
+            cache.invalidate("site:root")
+            self.assertIsNone(MetadataCache(path=path).get("site:root"))
+
+            expired_cache = MetadataCache(ttl=-1, path=path)
+            expired_cache.set("site:root", {"id": "site-id"})
+            self.assertIsNone(expired_cache.get("site:root"))
+            self.assertIsNone(MetadataCache(path=path).get("site:root"))
+
+
+class SiteCacheTest(unittest.TestCase):
+    """Tests of how the site and file modules use the metadata cache against the local fake Graph server."""
+    def setUp(self) -> None:
+        self.server = FakeGraphServer().start()
+        self.graph_access = FakeGraphAccess()
+        self.server.connect(self.graph_access)
+        self.site_id = self.server.graph.add_site(SITE_PATH)
+        self.cache = metadata_cache.configure_metadata_cache()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        metadata_cache.configure_metadata_cache()
+
+    def test_get_site(self):
+        """Test that sites are cached per tenant and fetched again when invalidated or expired."""
+        self.assertEqual(self.get_site(self.graph_access).id, self.site_id)
+        self.assertEqual(self.get_site(self.graph_access, requests=0).id, self.site_id)
+        self.assertEqual(self.get_site(self.graph_access, "TEST.sharepoint.com:/sites/test", requests=0).id, self.site_id)
+
+        # Another tenant doesn't use the cached site
+        other_access = FakeGraphAccess(tenant="other")
+        self.server.connect(other_access)
+        self.get_site(other_access)
+        self.get_site(other_access, requests=0)
+
+        self.get_site(self.graph_access, use_cache=False)
+
+        self.cache.invalidate(metadata_cache.site_key(self.graph_access.tenant_key, SITE_PATH))
+        self.get_site(self.graph_access)
+        self.get_site(other_access, requests=0)
+
+        self.cache.invalidate()
+        self.get_site(other_access)
+
+        self.cache.ttl = -1
+        self.get_site(self.graph_access)
+        self.get_site(self.graph_access)
+
+    def test_get_drive_item(self):
+        """Test that cached drive items are only used when asked to and are invalidated by uploads."""
+        site.upload_file_contents(self.graph_access, self.site_id, "Folder/File.txt", b"data")
+        item = file.get_drive_item(self.graph_access, self.site_id, "Folder/File.txt", use_cache=True)
+
+        request_count = self.server.request_count
+        self.assertEqual(file.get_drive_item(self.graph_access, self.site_id, "/Folder/File.txt", use_cache=True), item)
+        self.assertEqual(self.server.request_count, request_count)
+
+        site.upload_file_contents(self.graph_access, self.site_id, "Folder/File.txt", b"new data")
+        new_item = file.get_drive_item(self.graph_access, self.site_id, "Folder/File.txt", use_cache=True)
+        self.assertNotEqual(new_item.e_tag, item.e_tag)
+        self.assertEqual(new_item.size, len(b"new data"))
+
+    def get_site(self, graph_access: FakeGraphAccess, site_path: str = SITE_PATH, *, requests: int = 1, **kwargs) -> site.Site:
+        """Get a site and check the number of requests sent."""
+        request_count = self.server.request_count
+        result = site.get_site(graph_access, site_path, **kwargs)
+        self.assertEqual(self.server.request_count, request_count + requests)
+        return result
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Tests relating to the graph.site module."""
+
+import unittest
+import io
+
+from itk_dev_shared_components.graph import site
+from tests.test_graph.fake_graph_server import FakeGraphAccess, FakeGraphServer
+
+
+class SiteTest(unittest.TestCase):
+    """Tests relating to the graph.site module."""
+    def test_upload_session(self):
+        """Test a chunked upload that is resumed after a dropped connection."""
+        with FakeGraphServer() as server:
+            graph_access = FakeGraphAccess()
+            server.connect(graph_access)
+            site_id = server.graph.add_site("test.sharepoint.com:/sites/Test")
+
+            data = bytes(range(256)) * 5000
+            upload_session = site.create_upload_session(graph_access, site_id, "folder/file.bin")
+            # The first chunk is received, but its response is lost
+            server.drop_next("/upload/", method="PUT")
+            progress = []
+
+            drive_item = site.upload_file(graph_access, site_id, "folder/file.bin", io.BytesIO(data),
+                                          chunk_size=site.UPLOAD_CHUNK_MULTIPLE, upload_session=upload_session,
+                                          progress=lambda uploaded, total: progress.append(uploaded))
+
+            self.assertEqual(drive_item.name, "file.bin")
+            self.assertEqual(server.dropped_count, 1)
+            self.assertEqual(server.graph.get_file(site_id, "folder/file.bin"), data)
+            self.assertEqual(progress[-1], len(data))
+
+    def test_chunk_size(self):
+        """Test that chunk sizes that aren't a multiple of 320 KiB are rejected."""
+        with self.assertRaises(ValueError):
+            site.upload_file(FakeGraphAccess(), "site_id", "file.bin", io.BytesIO(b"data"), chunk_size=1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+"""Tests relating to the graph.telemetry module."""
+
+import unittest
+
+from itk_dev_shared_components.graph import telemetry
+
+
+class TelemetryTest(unittest.TestCase):
+    """Tests relating to the graph.telemetry module."""
+    def test_endpoint_template(self):
+        """Test that ids, names and paths are removed from endpoints."""
+        cases = {
+            "https://graph.microsoft.com/v1.0/users/test@test.dk/messages/AAMk=/move": "/v1.0/users/{id}/messages/{id}/move",
+            "https://graph.microsoft.com/v1.0/users/test@test.dk/mailFolders/inbox/childFolders?$top=100": "/v1.0/users/{id}/mailFolders/{id}/childFolders",
+            "https://graph.microsoft.com/v1.0/sites/site-id/drive/root:/Folder/File.txt:/createUploadSession": "/v1.0/sites/{id}/drive/root:{path}:/createUploadSession",
+            "https://graph.microsoft.com/v1.0/sites/site-id/drive/root:/Folder/File.txt": "/v1.0/sites/{id}/drive/root:{path}:",
+            "https://graph.microsoft.com/v1.0/$batch": "/v1.0/$batch",
+        }
+        for endpoint, template in cases.items():
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(telemetry.get_endpoint_template(endpoint), template)
+
+    def test_throttle_headers(self):
+        """Test that only throttling headers are kept."""
+        headers = {"X-MS-Throttle-Limit-Percentage": "0.8", "Retry-After": "2", "Content-Type": "application/json"}
+        self.assertEqual(telemetry.get_throttle_headers(headers), {"x-ms-throttle-limit-percentage": "0.8"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests relating to the module misc.html_util."""
+
+import unittest
+
+from bs4 import BeautifulSoup
+
+from itk_dev_shared_components.misc import html_util
+from itk_dev_shared_components.graph.mail import Email
+
+
+OUTLOOK_MAIL = """<html xmlns:o="urn:schemas-microsoft-com:office:office">
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8">
+<style><!--
+p.MsoNormal {margin:0cm; font-size:11.0pt;}
+--></style>
+<!--[if gte mso 9]><xml>
+<o:shapedefaults v:ext="edit" spidmax="1026" />
+</xml><![endif]-->
+</head>
+<body lang="DA" link="#0563C1">
+<div class=WordSection1>
+<p class=MsoNormal>Hej Test,<o:p></o:p></p>
+<p class=MsoNormal><o:p>&nbsp;</o:p></p>
+<p class=MsoNormal><![if !supportLists]>1.&nbsp;<![endif]>Sagen er oprettet &#8211; se <a href="https://example.com/?a=1&amp;b=2">linket</a>.<o:p></o:p></p>
+<p class=MsoNormal>Med venlig hilsen<br>
+Test &amp; Co.<o:p></o:p></p>
+</div>
+</body>
+</html>
+"""
+
+NEWSLETTER_MAIL = """<!DOCTYPE html>
+<html><head><title>Nyhedsbrev</title><script>if (a < b && c) { x(); }</script></head>
+<body><table width="100%" cellpadding=0>
+<tr><td style="padding:4px"><img src="cid:logo" alt="logo"/></td></tr>
+<tr><td><h1>Nyheder &ndash; maj</h1><p>L&aelig;s om &quot;det nye&quot; &#x1F600; &copy;</p></td></tr>
+<tr><td><pre>  Formateret
+    tekst  </pre><template><p>Skjult</p></template><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby></td></tr>
+</table></body></html>
+"""
+
+MALFORMED_MAIL = """<div><p>Ikke lukket <b>fed <i>kursiv</b> & tekst &amp mere &#65x < 5
+<a href=x/y title="a>b">link</a></br></br><br></br><![CDATA[data]]><!-- a -- b -->
+<textarea>  a &lt; b  </textarea><p/>slut &bogus; &"""
+
+
+class TestHtmlUtil(unittest.TestCase):
+    """Tests relating to the module misc.html_util."""
+
+    def test_html_to_text(self):
+        """Test that the text is the same as BeautifulSoup's."""
+        for html in (OUTLOOK_MAIL, NEWSLETTER_MAIL, MALFORMED_MAIL, "", "Ren tekst", "<p>  </p>\n<p>\n</p>"):
+            with self.subTest(html=html[:50]):
+                expected = BeautifulSoup(html, "html.parser").get_text().strip()
+                self.assertEqual(html_util.html_to_text(html), expected)
+
+        self.assertIn("Sagen er oprettet – se linket.", html_util.html_to_text(OUTLOOK_MAIL))
+        self.assertNotIn("Skjult", html_util.html_to_text(NEWSLETTER_MAIL))
+
+    def test_get_text_cache(self):
+        """Test that Email.get_text caches the text until the body changes."""
+        email = Email(user="test@email.dk", id="id", received_time="", sender="", receivers=[], subject="",
+                      body="<p>Første</p>", body_type="html", has_attachments=False)
+
+        text = email.get_text()
+        self.assertEqual(text, "Første")
+        self.assertIs(email.get_text(), text)
+
+        email.body = "<p>Anden</p>"
+        self.assertEqual(email.get_text(), "Anden")
+
+        email.body_type = "text"
+        self.assertEqual(email.get_text(), "<p>Anden</p>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Test the part of the API to do with bulk operations."""
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from itk_dev_shared_components.kmd_nova.authentication import NovaAccess
+from itk_dev_shared_components.kmd_nova.nova_objects import NovaCase, CaseParty, Caseworker, Department
+from itk_dev_shared_components.kmd_nova import nova_bulk
+from tests.test_nova_api.test_cases import _get_test_party, _get_test_caseworker, _get_test_department
+
+load_dotenv()
+
+
+class NovaBulkTest(unittest.TestCase):
+    """Test the part of the API to do with bulk operations."""
+    @classmethod
+    def setUpClass(cls):
+        credentials = os.getenv('NOVA_CREDENTIALS').split(',')
+        cls.nova_access = NovaAccess(client_id=credentials[0], client_secret=credentials[1])
+
+    def test_import_cases(self):
+        """Test importing multiple cases and resuming from a checkpoint."""
+        cases = [_create_case(f"Bulk test {i} {datetime.now()}") for i in range(3)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint_path = os.path.join(temp_dir, "checkpoint.txt")
+
+            report = nova_bulk.import_cases(cases, self.nova_access, max_workers=2, checkpoint_path=checkpoint_path)
+            self.assertEqual(len(report.succeeded), 3, report.failed)
+            self.assertEqual(report.skipped, 0)
+
+            # Run again and check that all cases are skipped
+            report = nova_bulk.import_cases(cases, self.nova_access, max_workers=2, checkpoint_path=checkpoint_path)
+            self.assertEqual(len(report.results), 0)
+            self.assertEqual(report.skipped, 3)
+
+    def test_import_failure(self):
+        """Test that a failing case is reported without stopping the import."""
+        bad_case = _create_case(f"Bulk test 0 {datetime.now()}")
+        bad_case.kle_number = "Not a KLE number"
+
+        report = nova_bulk.import_cases([bad_case, _create_case(f"Bulk test 1 {datetime.now()}")], self.nova_access)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.failed[0].case_uuid, bad_case.uuid)
+        self.assertIsNotNone(report.failed[0].error)
+        self.assertEqual(len(report.succeeded), 1)
+
+
+class NovaBulkCheckpointTest(unittest.TestCase):
+    """Test the checkpointing of bulk imports without calling Nova."""
+    def test_input_error(self):
+        """Test that the cases imported before the input fails are checkpointed before the error is raised."""
+        caseworker = Caseworker(uuid="user-uuid", name="Test User", ident="AZX0080")
+        department = Department(id=1, name="Department", user_key="KEY")
+        cases = [_create_case(f"Case {i}", parties=[], caseworker=caseworker, department=department) for i in range(5)]
+
+        def read_cases():
+            yield from cases
+            raise OSError("The input couldn't be read.")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint_path = os.path.join(temp_dir, "checkpoint.txt")
+            with patch.object(nova_bulk.nova_cases, "add_case"), self.assertRaises(OSError):
+                nova_bulk.import_cases(read_cases(), None, max_workers=4, checkpoint_path=checkpoint_path, calls_per_second=1000)
+
+            with open(checkpoint_path, encoding='utf-8') as file:
+                self.assertEqual(sorted(file.read().split()), sorted(case.uuid for case in cases))
+
+
+def _create_case(title: str, *, parties: list[CaseParty] | None = None, caseworker: Caseworker | None = None,
+                 department: Department | None = None) -> NovaCase:
+    """Create a new case with a new uuid.
+
+    Args:
+        title: The title of the case.
+        parties: The case parties. Defaults to the test party.
+        caseworker: The caseworker. Defaults to the test caseworker.
+        department: The responsible department and security unit. Defaults to the test department.
+
+    Returns:
+        The new case.
+    """
+    department = department or _get_test_department()
+    return NovaCase(uuid=str(uuid.uuid4()), title=title, case_date=datetime.now(), progress_state="Opstaaet",
+                    case_parties=parties if parties is not None else [_get_test_party()],
+                    kle_number="23.05.01", proceeding_facet="G01", sensitivity="Fortrolige",
+                    caseworker=caseworker or _get_test_caseworker(), responsible_department=department, security_unit=department)
+
+
+if __name__ == '__main__':
+    unittest.main()
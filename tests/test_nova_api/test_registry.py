@@ -0,0 +1,93 @@
+"""Test the registry of caseworkers and departments."""
+import unittest
+from datetime import datetime
+
+from itk_dev_shared_components.kmd_nova.nova_objects import Caseworker, Department, NovaCase
+from itk_dev_shared_components.kmd_nova.nova_registry import NovaRegistry
+from itk_dev_shared_components.kmd_nova import util
+
+
+class NovaRegistryTest(unittest.TestCase):
+    """Test the registry of caseworkers and departments."""
+    def test_lookup(self):
+        """Test looking up caseworkers and departments on different identifiers."""
+        user = Caseworker(uuid="user-uuid", name="Test User", ident="AZX0080")
+        group = Caseworker(uuid="group-uuid", name="Test Group", ident="819697", type='group')
+        department = Department(id=818485, name="Borgerservice", user_key="4BBORGER")
+
+        registry = NovaRegistry()
+        registry.add_caseworker(user)
+        registry.add_caseworker(group)
+        registry.add_department(department)
+
+        self.assertIs(registry.get_caseworker("AZX0080"), user)
+        self.assertIs(registry.get_caseworker("user-uuid"), user)
+        self.assertIs(registry.get_caseworker(819697), group)
+        self.assertIs(registry.get_department("818485"), department)
+
+        self.assertEqual(registry.caseworker_identity("AZX0080"), {"kspIdentity": {"racfId": "AZX0080", "fullName": "Test User"}})
+        self.assertEqual(registry.caseworker_identity("group-uuid"), {"losIdentity": {"administrativeUnitId": "819697", "fullName": "Test Group"}})
+        self.assertEqual(registry.caseworker_task_reference("AZX0080"), {"caseworkerPersonId": "user-uuid"})
+        self.assertEqual(registry.caseworker_task_reference("819697"), {"caseworkerGroupId": "group-uuid"})
+        self.assertEqual(registry.department_identity(818485)["losIdentity"]["userKey"], "4BBORGER")
+
+        # Each call gets its own dictionary, so changing one doesn't change the next
+        registry.caseworker_identity("AZX0080")["kspIdentity"]["fullName"] = "Changed"
+        self.assertEqual(registry.caseworker_identity("AZX0080")["kspIdentity"]["fullName"], "Test User")
+        registry.department_identity(818485)["losIdentity"]["userKey"] = "Changed"
+        self.assertEqual(registry.department_identity(818485)["losIdentity"]["userKey"], "4BBORGER")
+
+        # Caseworkers of unknown types are left out like in the write functions
+        other = Caseworker(uuid="other-uuid", name="Other", ident="OTHER", type='other')
+        registry.add_caseworker(other)
+        self.assertIsNone(registry.caseworker_identity("OTHER"))
+        self.assertEqual(registry.caseworker_task_reference("OTHER"), {})
+        self.assertEqual(util.caseworker_fields(other), {})
+        self.assertEqual(util.caseworker_fields(None), {})
+        self.assertEqual(util.caseworker_fields(user), {"caseworker": {"kspIdentity": {"racfId": "AZX0080", "fullName": "Test User"}}})
+
+        with self.assertRaises(KeyError):
+            registry.get_caseworker("Unknown")
+
+        with self.assertRaises(KeyError):
+            registry.get_department(1)
+
+    def test_loader(self):
+        """Test that missing objects are loaded once and then memoized."""
+        calls = []
+
+        def load_caseworker(key: str) -> Caseworker:
+            calls.append(key)
+            return Caseworker(uuid="user-uuid", name="Test User", ident=key)
+
+        registry = NovaRegistry(caseworker_loader=load_caseworker)
+        self.assertEqual(registry.get_caseworker("AZX0080").ident, "AZX0080")
+        self.assertEqual(registry.get_caseworker("AZX0080").ident, "AZX0080")
+        self.assertEqual(registry.get_caseworker("user-uuid").ident, "AZX0080")
+        self.assertEqual(calls, ["AZX0080"])
+
+    def test_resolve_case(self):
+        """Test that a case with only identifiers is resolved to the registered objects."""
+        user = Caseworker(uuid="user-uuid", name="Test User", ident="AZX0080")
+        department = Department(id=818485, name="Borgerservice", user_key="4BBORGER")
+        registry = NovaRegistry(caseworker_loader=lambda key: user, department_loader=lambda id_: department)
+
+        unresolved_department = Department(id=818485, name="", user_key="")
+        case = NovaCase(uuid="case-uuid", title="Registry test", case_date=datetime.now(), progress_state="Opstaaet",
+                        case_parties=[], kle_number="23.05.01", proceeding_facet="G01", sensitivity="Fortrolige",
+                        caseworker=Caseworker(uuid="", name="", ident="AZX0080"),
+                        responsible_department=unresolved_department, security_unit=unresolved_department)
+
+        resolved = registry.resolve_case(case)
+        self.assertIs(resolved.caseworker, user)
+        self.assertIs(resolved.security_unit, department)
+        self.assertIs(resolved.responsible_department, department)
+        self.assertEqual(resolved.title, "Registry test")
+        self.assertEqual(case.caseworker.name, "")
+
+        with self.assertRaises(KeyError):
+            NovaRegistry().resolve_case(case)
+
+
+if __name__ == '__main__':
+    unittest.main()